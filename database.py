@@ -231,6 +231,9 @@ def atualizar_questao(questao_id, dados_dict):
     cursor.execute(f"UPDATE questoes SET {set_clause} WHERE id = ?", valores)
     conn.commit()
     conn.close()
+    # Os pools de distratores calculados para a versão anterior deixam de valer
+    from motor_gerador.cache_pools import invalidar_pool_questao
+    invalidar_pool_questao(questao_id)
 
 def obter_questao_por_id(questao_id):
     conn = connect_db()
@@ -247,6 +250,8 @@ def excluir_questao(questao_id):
     cursor.execute("DELETE FROM questoes WHERE id = ?", (questao_id,))
     conn.commit()
     conn.close()
+    from motor_gerador.cache_pools import invalidar_pool_questao
+    invalidar_pool_questao(questao_id)
     return True
 # ----------------------------------------------------
 # FUNÇÕES PARA GERAÇÃO DE PROVAS (AJUSTADAS - D1)
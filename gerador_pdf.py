@@ -32,69 +32,62 @@ def copiar_imagens_para_destino(pasta_destino, log_dialog=None):
             log_message(f"⚠️  Imagem não encontrada: {origem}")
 
 
-def criar_pdf_provas(nome_base, versoes_geradas, pasta_destino, dados_pdf, log_dialog=None):
+class CompiladorProvas:
     """
-    Gera os PDFs das provas e gabaritos.
-    Usa dados_pdf["numeroQuestoes"] como número exibido na capa (total efetivo gerado).
+    Compila os cadernos um a um, à medida que as versões chegam (não precisa esperar
+    todas), e no fim o gabarito de todas as versões recebidas, em ordem de letra.
     """
-    def log_message(message):
-        if log_dialog:
-            log_dialog.append_log(message)
-        else:
-            print(message)
 
-    # DEBUG: inspeção inicial dos dados recebidos
-    log_message("DEBUG criar_pdf_provas: dados_pdf keys = " + ", ".join(map(str, dados_pdf.keys() if isinstance(dados_pdf, dict) else [])))
-    log_message(f"DEBUG criar_pdf_provas: dados_pdf['numeroQuestoes'] = {dados_pdf.get('numeroQuestoes') if isinstance(dados_pdf, dict) else 'N/A'}")
-    log_message(f"DEBUG criar_pdf_provas: versoes_geradas type = {type(versoes_geradas)}, len = {len(versoes_geradas) if hasattr(versoes_geradas, '__len__') else 'N/A'}")
-    if versoes_geradas:
-        primeira = versoes_geradas[0]
+    def __init__(self, nome_base, pasta_destino, dados_pdf, log_dialog=None):
+        self.nome_base = nome_base
+        self.pasta_destino = pasta_destino
+        self.dados_pdf = dados_pdf
+        self.log_dialog = log_dialog
+        self.delete_temp_files = True
+        self.gabaritos = {}  # letra -> itens do gabarito da versão
+
+        self.log_message("📁 Copiando imagens para a pasta de destino...")
+        copiar_imagens_para_destino(pasta_destino, log_dialog)
+
+        template_env = Environment(
+            loader=FileSystemLoader(searchpath=TEMPLATES_DIR),  # ← DEVE SER TEMPLATES_DIR
+            block_start_string='<<%',
+            block_end_string='%>>',
+            variable_start_string='<<',
+            variable_end_string='>>',
+            comment_start_string='(*',
+            comment_end_string='*)',
+            autoescape=False
+        )
+
         try:
-            log_message("DEBUG criar_pdf_provas: primeiras keys da versao = " + ", ".join(map(str, primeira.keys())) if isinstance(primeira, dict) else f"primeira repr: {repr(primeira)[:200]}")
-        except Exception:
-            pass
+            self.template_prova = template_env.get_template('modelo_prova.tex')
+            self.template_gabarito = template_env.get_template('modelo_gabarito.tex')
+            self.log_message(f"📄 Templates carregados de: {TEMPLATES_DIR}")
+        except Exception as e:
+            raise FileNotFoundError(f"Não foi possível encontrar os templates em {TEMPLATES_DIR}. Erro: {e}")
 
-    # ⭐ ADICIONE ESTA LINHA:
-    log_message("📁 Copiando imagens para a pasta de destino...")
-    copiar_imagens_para_destino(pasta_destino, log_dialog)
-
-    template_env = Environment(
-        loader=FileSystemLoader(searchpath=TEMPLATES_DIR),  # ← DEVE SER TEMPLATES_DIR
-        block_start_string='<<%',
-        block_end_string='%>>',
-        variable_start_string='<<',
-        variable_end_string='>>',
-        comment_start_string='(*',
-        comment_end_string='*)',
-        autoescape=False
-    )
-    
-    delete_temp_files = True
-    
-    try:
-        template_prova = template_env.get_template('modelo_prova.tex')
-        template_gabarito = template_env.get_template('modelo_gabarito.tex')
-        log_message(f"📄 Templates carregados de: {TEMPLATES_DIR}")
-    except Exception as e:
-        raise FileNotFoundError(f"Não foi possível encontrar os templates em {TEMPLATES_DIR}. Erro: {e}")
+    def log_message(self, message):
+        if self.log_dialog:
+            self.log_dialog.append_log(message)
+        else:
+            print(message)
 
-    todos_gabaritos = []
+    def _nome_arquivo_caderno(self, letra_versao):
+        return f"{self.nome_base.replace(' ', '_')}_caderno_{letra_versao}"
 
-    log_message(f"Iniciando compilação de {len(versoes_geradas)} versão(ões)...")
-    
-    # O loop agora itera sobre a nova estrutura de dados (lista de dicionários)
-    for versao_data in versoes_geradas:
-        
+    def adicionar_versao(self, versao_data):
+        """Gera o .tex e compila o PDF do caderno desta versão"""
         # 1. Desempacota os dados corretamente, resolvendo o erro 'str' object has no attribute 'get'
         letra_versao = versao_data.get('letra', 'N/A')
         questoes_da_versao = versao_data.get('questoes', [])
-        
-        log_message(f"\nGerando arquivos para o Caderno {letra_versao}...")
-        
+
+        self.log_message(f"\nGerando arquivos para o Caderno {letra_versao}...")
+
         # 2. Usa a nomenclatura que você pediu
-        nome_base_arquivo = f"{nome_base.replace(' ', '_')}_caderno_{letra_versao}"
-        caminho_tex = os.path.join(pasta_destino, f"{nome_base_arquivo}.tex")
-        
+        nome_base_arquivo = self._nome_arquivo_caderno(letra_versao)
+        caminho_tex = os.path.join(self.pasta_destino, f"{nome_base_arquivo}.tex")
+
         # 3. A lógica do gabarito agora itera sobre a lista de questões correta
         itens_gabarito_versao = []
         for q in questoes_da_versao:
@@ -103,72 +96,111 @@ def criar_pdf_provas(nome_base, versoes_geradas, pasta_destino, dados_pdf, log_d
                 "id": q.get("id_base", "N/A"),
                 "tema": q.get("tema", "N/A")
             })
-        todos_gabaritos.append({ "versao": f"Caderno {letra_versao}", "itens": itens_gabarito_versao })
-        
+        self.gabaritos[letra_versao] = itens_gabarito_versao
+
         # 4. Prepara os dados para o template da prova
-        dados_template = dados_pdf.copy()
+        dados_template = self.dados_pdf.copy()
         dados_template['questoes'] = questoes_da_versao
-        
+
         dados_template['versao'] = letra_versao
 
         with open(caminho_tex, 'w', encoding='utf-8') as f:
-            f.write(template_prova.render(dados_template))
-        log_message(f"Arquivo .tex do Caderno {letra_versao} criado.")
-        log_message(f"Compilando PDF do Caderno {letra_versao} (isso pode levar um momento)...")
+            f.write(self.template_prova.render(dados_template))
+        self.log_message(f"Arquivo .tex do Caderno {letra_versao} criado.")
+        self.log_message(f"Compilando PDF do Caderno {letra_versao} (isso pode levar um momento)...")
+
+        comando = ['xelatex', '-interaction=nonstopmode', '-output-directory', self.pasta_destino, caminho_tex]
 
-        comando = ['xelatex', '-interaction=nonstopmode', '-output-directory', pasta_destino, caminho_tex]
-        
         process = None
         try:
             for run_count in range(2):
                 process = subprocess.run(comando, capture_output=True, text=True, encoding='utf-8', errors='ignore')
                 if process.returncode != 0:
                     process.check_returncode()
-            log_message(f"✅ PDF do Caderno {letra_versao} gerado com sucesso.")
+            self.log_message(f"✅ PDF do Caderno {letra_versao} gerado com sucesso.")
 
         except subprocess.CalledProcessError:
-            log_message(f"❌ Erro ao compilar o PDF do Caderno {letra_versao}.")
+            self.log_message(f"❌ Erro ao compilar o PDF do Caderno {letra_versao}.")
             if process:
-                log_message("--- Saída do Compilador LaTeX (stdout) ---")
-                log_message(process.stdout)
+                self.log_message("--- Saída do Compilador LaTeX (stdout) ---")
+                self.log_message(process.stdout)
             raise Exception(f"Erro na compilação do LaTeX. Verifique a janela de log.")
 
-    if todos_gabaritos:
-        log_message("\nGerando PDF do Gabarito...")
-        caminho_tex_gabarito = os.path.join(pasta_destino, f"{nome_base.replace(' ', '_')}_GABARITO.tex")
-        with open(caminho_tex_gabarito, 'w', encoding='utf-8') as f:
-            f.write(template_gabarito.render({"versoes": todos_gabaritos}))
-        comando_gabarito = ['xelatex', '-interaction=nonstopmode', '-output-directory', pasta_destino, caminho_tex_gabarito]
-        try:
-            for _ in range(2):
-                subprocess.run(comando_gabarito, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
-            log_message("✅ PDF do Gabarito gerado com sucesso.")
-        except subprocess.CalledProcessError as e:
-            log_message("❌ Erro ao compilar o PDF do Gabarito.")
-            log_message(f"--- Saída do Compilador LaTeX ---\n{e.stdout}\n--------------------")
-            raise Exception("Erro na compilação do gabarito. Verifique a janela de log.")
-
-    if delete_temp_files:
-        log_message("\nLimpando arquivos temporários...")
-        extensoes_para_limpar = ['.aux', '.log', '.out', '.tex']
-        
-        # --- CORREÇÃO DA LIMPEZA: Usa a mesma lógica de nomenclatura ---
-        for versao_data in versoes_geradas:
-            letra_versao = versao_data.get('letra', 'N/A')
-            nome_base_arquivo = f"{nome_base.replace(' ', '_')}_caderno_{letra_versao}"
+    def finalizar(self):
+        """Gabarito de todas as versões compiladas e limpeza dos arquivos temporários"""
+        nome_base = self.nome_base
+        pasta_destino = self.pasta_destino
+        todos_gabaritos = [{"versao": f"Caderno {letra}", "itens": itens}
+                           for letra, itens in sorted(self.gabaritos.items())]
+
+        if todos_gabaritos:
+            self.log_message("\nGerando PDF do Gabarito...")
+            caminho_tex_gabarito = os.path.join(pasta_destino, f"{nome_base.replace(' ', '_')}_GABARITO.tex")
+            with open(caminho_tex_gabarito, 'w', encoding='utf-8') as f:
+                f.write(self.template_gabarito.render({"versoes": todos_gabaritos}))
+            comando_gabarito = ['xelatex', '-interaction=nonstopmode', '-output-directory', pasta_destino, caminho_tex_gabarito]
+            try:
+                for _ in range(2):
+                    subprocess.run(comando_gabarito, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+                self.log_message("✅ PDF do Gabarito gerado com sucesso.")
+            except subprocess.CalledProcessError as e:
+                self.log_message("❌ Erro ao compilar o PDF do Gabarito.")
+                self.log_message(f"--- Saída do Compilador LaTeX ---\n{e.stdout}\n--------------------")
+                raise Exception("Erro na compilação do gabarito. Verifique a janela de log.")
+
+        if self.delete_temp_files:
+            self.log_message("\nLimpando arquivos temporários...")
+            extensoes_para_limpar = ['.aux', '.log', '.out', '.tex']
+
+            # --- CORREÇÃO DA LIMPEZA: Usa a mesma lógica de nomenclatura ---
+            for letra_versao in self.gabaritos:
+                nome_base_arquivo = self._nome_arquivo_caderno(letra_versao)
+                for ext in extensoes_para_limpar:
+                    arquivo_para_deletar = os.path.join(pasta_destino, nome_base_arquivo + ext)
+                    if os.path.exists(arquivo_para_deletar):
+                        try: os.remove(arquivo_para_deletar)
+                        except OSError: pass
+
+            nome_gabarito = f"{nome_base.replace(' ', '_')}_GABARITO"
             for ext in extensoes_para_limpar:
-                arquivo_para_deletar = os.path.join(pasta_destino, nome_base_arquivo + ext)
-                if os.path.exists(arquivo_para_deletar):
-                    try: os.remove(arquivo_para_deletar)
+                arquivo_gabarito_para_deletar = os.path.join(pasta_destino, nome_gabarito + ext)
+                if os.path.exists(arquivo_gabarito_para_deletar):
+                    try: os.remove(arquivo_gabarito_para_deletar)
                     except OSError: pass
-        
-        nome_gabarito = f"{nome_base.replace(' ', '_')}_GABARITO"
-        for ext in extensoes_para_limpar:
-            arquivo_gabarito_para_deletar = os.path.join(pasta_destino, nome_gabarito + ext)
-            if os.path.exists(arquivo_gabarito_para_deletar):
-                try: os.remove(arquivo_gabarito_para_deletar)
-                except OSError: pass
-        log_message("Limpeza concluída.")
+            self.log_message("Limpeza concluída.")
+
+
+def criar_pdf_provas(nome_base, versoes_geradas, pasta_destino, dados_pdf, log_dialog=None):
+    """
+    Gera os PDFs das provas e gabaritos.
+    Usa dados_pdf["numeroQuestoes"] como número exibido na capa (total efetivo gerado).
+    """
+    def log_message(message):
+        if log_dialog:
+            log_dialog.append_log(message)
+        else:
+            print(message)
+
+    # DEBUG: inspeção inicial dos dados recebidos
+    log_message("DEBUG criar_pdf_provas: dados_pdf keys = " + ", ".join(map(str, dados_pdf.keys() if isinstance(dados_pdf, dict) else [])))
+    log_message(f"DEBUG criar_pdf_provas: dados_pdf['numeroQuestoes'] = {dados_pdf.get('numeroQuestoes') if isinstance(dados_pdf, dict) else 'N/A'}")
+    log_message(f"DEBUG criar_pdf_provas: versoes_geradas type = {type(versoes_geradas)}, len = {len(versoes_geradas) if hasattr(versoes_geradas, '__len__') else 'N/A'}")
+    if versoes_geradas:
+        primeira = versoes_geradas[0]
+        try:
+            log_message("DEBUG criar_pdf_provas: primeiras keys da versao = " + ", ".join(map(str, primeira.keys())) if isinstance(primeira, dict) else f"primeira repr: {repr(primeira)[:200]}")
+        except Exception:
+            pass
+
+    compilador = CompiladorProvas(nome_base, pasta_destino, dados_pdf, log_dialog)
+
+    log_message(f"Iniciando compilação de {len(versoes_geradas)} versão(ões)...")
+    
+    # O loop agora itera sobre a nova estrutura de dados (lista de dicionários)
+    for versao_data in versoes_geradas:
+        compilador.adicionar_versao(versao_data)
+
+    compilador.finalizar()
         
 def gerar_pdf_cardapio(questoes, caminho_saida, template_file, contexto_extra, log_dialog=None):
     """
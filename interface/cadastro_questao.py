@@ -18,9 +18,7 @@ from .custom_widgets import (
     MeuSpinBox, NoScrollSlider, NoScrollComboBox, MeuImagemPreviewLabel,
     )
 import random
-import io
 import sys
-from contextlib import redirect_stdout
 from motor_gerador.core import _gerar_variante_questao
 from constants import UNIDADES_PARA_DROPDOWN
 
@@ -1097,25 +1095,24 @@ class CadastroQuestaoScreen(QWidget):
             # Usamos uma sequência de sementes previsível para a busca (0, 1, 2, ...)
             seed_teste = tentativa
 
-            log_stream = io.StringIO()
-            with redirect_stdout(log_stream):
-                try:
-                    # Chama o motor dentro do loop com a semente da vez
-                    variante_tentativa = _gerar_variante_questao(questao_base, seed=seed_teste)
-                except Exception as e:
-                    print(f"ERRO CRÍTICO DURANTE O TESTE (tentativa {tentativa}):\n{e}")
-                    variante_tentativa = None
-
-            log_output = log_stream.getvalue().strip()
+            try:
+                # Chama o motor dentro do loop com a semente da vez
+                resultado = _gerar_variante_questao(questao_base, seed=seed_teste)
+            except Exception as e:
+                log_final_erro = f"ERRO CRÍTICO DURANTE O TESTE (tentativa {tentativa}):\n{e}"
+                resultado = None
 
-            if variante_tentativa:
+            if resultado is not None and resultado.ok:
                 # SUCESSO! Guardamos o resultado e paramos o loop de busca
-                variante_sucesso = variante_tentativa
+                variante_sucesso = resultado.variante
                 break  # Interrompe o loop na primeira tentativa bem-sucedida
             else:
-                # FALHA NESTA TENTATIVA. Guardamos o último log de erro para o caso de todas falharem.
-                if log_output:
-                    log_final_erro = log_output
+                # FALHA NESTA TENTATIVA. O motivo da falha vem no próprio resultado (não é preciso capturar o stdout)
+                if resultado is not None and resultado.motivo:
+                    log_final_erro = resultado.motivo
+                # Falha que não depende do seed (erro no código, enunciado...): não adianta insistir
+                if resultado is not None and resultado.permanente:
+                    break
         # --- FIM DA NOVA LÓGICA DE BUSCA ---
 
         # 3. Exibe o resultado final após o loop terminar
@@ -1145,9 +1142,9 @@ class CadastroQuestaoScreen(QWidget):
             titulo = "❌ Teste Falhou Após Múltiplas Tentativas"
             
             if log_final_erro:
-                mensagem = f"Após {max_tentativas} tentativas, não foi possível gerar uma variante válida.\n\nÚltimo erro encontrado:\n---\n{log_final_erro}"
+                mensagem = f"Após {tentativa + 1} tentativa(s), não foi possível gerar uma variante válida.\n\nÚltimo erro encontrado:\n---\n{log_final_erro}"
             else:
-                mensagem = f"Após {max_tentativas} tentativas, não foi possível gerar uma variante válida (o motor não retornou um erro específico)."
+                mensagem = f"Após {tentativa + 1} tentativa(s), não foi possível gerar uma variante válida (o motor não retornou um erro específico)."
             
             QMessageBox.warning(self, titulo, mensagem)
 
@@ -17,7 +17,7 @@ from database import (
 )
 from .configuracoes_dialog import ConfiguracoesDialog
 from motor_gerador.core import gerar_versoes_prova
-from gerador_pdf import criar_pdf_provas
+from gerador_pdf import CompiladorProvas
 from .custom_widgets import (
     MeuLineEdit, MeuSpinBox, MeuDoubleSpinBox, MeuComboBox, MeuLabel, MeuGroupBox, EstilosApp,
     NoScrollComboBox, NoScrollSpinBox, MeuCheckBox, MeuBotao
@@ -431,12 +431,22 @@ class GeradorProvasScreen(QWidget):
         }
         self.temp_nome_arquivo_base = self.nome_input.text()
 
+        # Cadernos compilados à medida que as versões ficam prontas
+        self._versoes_pendentes = []
+        self._compilador = None
+        self._pasta_destino = None
+        self._compilando = False
+        self._geracao_concluida = False
+        self._geracao_interrompida = False
+
         # --- ETAPA 3: Cria e Inicia a Thread ---
         self.thread = QThread()
         self.worker = GeradorWorker(questoes_base, num_versoes, opcoes_geracao)
         self.worker.moveToThread(self.thread)
 
         self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.log_dialog.atualizar_progresso)
+        self.worker.versao_concluida.connect(self._handle_versao_concluida)
         self.worker.finished.connect(self._handle_geracao_concluida)
         self.worker.error.connect(self._handle_geracao_erro)
 
@@ -446,57 +456,107 @@ class GeradorProvasScreen(QWidget):
         
         self.thread.start()
 
-    def _handle_geracao_concluida(self, versoes_geradas):
+    def _handle_versao_concluida(self, versao_data):
         """
-        Este método é chamado quando a thread termina com sucesso.
-        Ele recebe os resultados e continua o processo na thread principal.
+        Chamado a cada versão pronta (na ordem de conclusão): o caderno é compilado
+        enquanto as demais versões ainda estão sendo geradas.
         """
-        if not versoes_geradas:
-            self._handle_geracao_erro("O motor gerador não retornou nenhuma versão.")
+        self._versoes_pendentes.append(versao_data)
+        self._compilar_pendentes()
+
+    def _compilar_pendentes(self):
+        # append_log e o diálogo de pasta processam eventos: versões que chegam nesse meio
+        # tempo só entram na fila e são compiladas por quem já está compilando
+        if self._compilando or self._geracao_interrompida:
             return
+        self._compilando = True
+        try:
+            if self._compilador is None:
+                if not self._versoes_pendentes or not self._preparar_compilador(self._versoes_pendentes[0]):
+                    return
+            while self._versoes_pendentes:
+                self._compilador.adicionar_versao(self._versoes_pendentes.pop(0))
+            if self._geracao_concluida:
+                self._finalizar_pdf()
+        except Exception as e:
+            self._interromper_geracao()
+            error_message = f"Ocorreu um erro na criação do PDF: {e}"
+            self.log_dialog.append_log(f"\n❌ ERRO: {error_message}")
+            self.log_dialog.finish(success=False)
+            QMessageBox.critical(self, "Erro na Geração do PDF", error_message)
+            self.btn_gerar.setEnabled(True)
+        finally:
+            self._compilando = False
 
-        self.log_dialog.append_log("Variações geradas. Solicitando pasta de destino...")
+    def _preparar_compilador(self, primeira_versao):
+        """
+        Na primeira versão pronta: ajusta a capa e pede a pasta de destino (a geração
+        continua enquanto isso). Retorna False se o usuário cancelar.
+        """
+        self.log_dialog.append_log(f"Caderno {primeira_versao.get('letra')} gerado. Solicitando pasta de destino...")
 
         # ⭐⭐ CORREÇÃO: Pegue o número REAL de questões da PRIMEIRA versão gerada
         # Isso reflete exatamente o que foi gerado após todas as restrições de grupos
-        if versoes_geradas and len(versoes_geradas) > 0:
-            primeira_versao = versoes_geradas[0]
-            num_questoes_reais = len(primeira_versao.get('questoes', []))
-            
-            # ⭐⭐ ATUALIZE os dados do PDF com o número REAL
-            self.temp_dados_pdf["numeroQuestoes"] = num_questoes_reais
-            
-            # ⭐⭐ RECALCULE o valor por questão se necessário
-            if self.check_distribuir_valor.isChecked():
-                valor_total = self.valor_total_spinbox.value()
-                valor_por_questao = valor_total / num_questoes_reais if num_questoes_reais > 0 else 0
-                valor_por_questao_display = f"{valor_por_questao:.2f}".replace('.', ',')
-                self.temp_dados_pdf["valorPorQuestao"] = valor_por_questao_display
-                
-            self.log_dialog.append_log(f"✅ Número real de questões na prova: {num_questoes_reais}")
+        num_questoes_reais = len(primeira_versao.get('questoes', []))
+
+        # ⭐⭐ ATUALIZE os dados do PDF com o número REAL
+        self.temp_dados_pdf["numeroQuestoes"] = num_questoes_reais
+
+        # ⭐⭐ RECALCULE o valor por questão se necessário
+        if self.check_distribuir_valor.isChecked():
+            valor_total = self.valor_total_spinbox.value()
+            valor_por_questao = valor_total / num_questoes_reais if num_questoes_reais > 0 else 0
+            valor_por_questao_display = f"{valor_por_questao:.2f}".replace('.', ',')
+            self.temp_dados_pdf["valorPorQuestao"] = valor_por_questao_display
+
+        self.log_dialog.append_log(f"✅ Número real de questões na prova: {num_questoes_reais}")
 
         pasta_destino = QFileDialog.getExistingDirectory(self, "Selecione a pasta para salvar as provas")
         if not pasta_destino:
+            self._interromper_geracao()
             self.log_dialog.append_log("Operação cancelada pelo usuário.")
             self.btn_gerar.setEnabled(True)
             self.log_dialog.close()
+            return False
+
+        self._pasta_destino = pasta_destino
+        self._compilador = CompiladorProvas(self.temp_nome_arquivo_base, pasta_destino, self.temp_dados_pdf,
+                                            self.log_dialog)
+        return True
+
+    def _interromper_geracao(self):
+        """Descarta as versões pendentes e pede ao worker que não gere as restantes"""
+        self._geracao_interrompida = True
+        self._versoes_pendentes.clear()
+        if self.worker is not None:
+            self.worker.is_running = False
+
+    def _finalizar_pdf(self):
+        self._compilador.finalizar()
+        self.log_dialog.finish(success=True)
+        QMessageBox.information(self, "Sucesso", f"Provas e gabarito gerados com sucesso em:\n{self._pasta_destino}")
+        self.btn_gerar.setEnabled(True)
+
+    def _handle_geracao_concluida(self, versoes_geradas):
+        """
+        Este método é chamado quando a thread termina com sucesso. Os cadernos já foram
+        (ou estão sendo) compilados à medida que as versões chegaram; falta o gabarito.
+        """
+        self.worker = None  # Removido pela própria thread (deleteLater)
+        if self._geracao_interrompida:
+            return
+        if not versoes_geradas:
+            self._handle_geracao_erro("O motor gerador não retornou nenhuma versão.")
             return
 
-        try:
-            criar_pdf_provas(self.temp_nome_arquivo_base, versoes_geradas, pasta_destino, self.temp_dados_pdf, self.log_dialog)
-            
-            self.log_dialog.finish(success=True)
-            QMessageBox.information(self, "Sucesso", f"Provas e gabarito gerados com sucesso em:\n{pasta_destino}")
-        except Exception as e:
-            error_message = f"Ocorreu um erro na criação do PDF: {e}"
-            self.log_dialog.append_log(f"\n❌ ERRO: {error_message}")
-            self.log_dialog.finish(success=False)
-            QMessageBox.critical(self, "Erro na Geração do PDF", error_message)
-        finally:
-            self.btn_gerar.setEnabled(True)
+        self.log_dialog.append_log("Variações geradas.")
+        self._geracao_concluida = True
+        self._compilar_pendentes()
 
     def _handle_geracao_erro(self, mensagem_erro):
         """Este método é chamado se a thread encontrar um erro."""
+        self._geracao_interrompida = True
+        self._versoes_pendentes.clear()
         error_message = f"Ocorreu um erro durante a geração das versões:\n{mensagem_erro}"
         self.log_dialog.append_log(f"\n❌ ERRO: {error_message}")
         self.log_dialog.finish(success=False)
@@ -1,9 +1,13 @@
 # interface/log_dialog.py
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QPushButton, QApplication
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QPushButton, QApplication, QLabel
+from PyQt5.QtCore import Qt, pyqtSignal
 from .custom_widgets import MeuTextEdit, EstilosApp
+from motor_gerador import eventos
 
 class LogDialog(QDialog):
+    # Resumo da execução chega pela thread da geração; o sinal o entrega na thread da interface
+    resumo_recebido = pyqtSignal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Progresso da Geração")
@@ -15,6 +19,10 @@ class LogDialog(QDialog):
         self.log_text_edit = MeuTextEdit()
         self.log_text_edit.setReadOnly(True)
         layout.addWidget(self.log_text_edit)
+
+        # Andamento da geração (pools, questões, versões e ETA), substituído a cada atualização
+        self.progresso_label = QLabel("")
+        layout.addWidget(self.progresso_label)
         
         self.close_button = QPushButton("Fechar")
         self.close_button.setEnabled(False)
@@ -31,24 +39,38 @@ class LogDialog(QDialog):
         
         self.append_log("Iniciando a geração das provas...")
 
+        # Resumo agregado de cada execução (eventos do motor, inclusive dos workers)
+        self.resumo_recebido.connect(self.append_log)
+        eventos.registro.assinar_resumo(self._receber_resumo)
+
+    def _receber_resumo(self, resumo):
+        self.resumo_recebido.emit(resumo.formatar())
+
     def append_log(self, message):
         """Adiciona uma mensagem ao log"""
         self.log_text_edit.append(message)
         QApplication.processEvents()  # Força a interface a se atualizar
 
-    '''def append_cache_stats(self):
+    def atualizar_progresso(self, texto):
+        """Mostra o andamento atual (não entra no log)"""
+        self.progresso_label.setText(texto)
+
+    def append_cache_stats(self):
         """Adiciona estatísticas do cache ao log de forma formatada"""
-        from motor_gerador import get_cache_stats_formatted
-        
-        stats_text = get_cache_stats_formatted()
-        self.append_log(stats_text)'''
+        try:
+            from motor_gerador import get_cache_stats_formatted
+            stats_text = get_cache_stats_formatted()
+        except Exception as e:
+            stats_text = f"⚠️  Estatísticas de cache indisponíveis: {e}"
+        self.append_log(stats_text)
 
     def finish(self, success=True):
         """Finaliza o processo, habilitando o botão de fechar"""
         if success:
             self.append_log("\n--- Processo Finalizado com Sucesso! ---")
             # Adiciona estatísticas do cache ao final com sucesso
-            #self.append_cache_stats()
+            self.append_cache_stats()
         else:
             self.append_log("\n--- Processo Interrompido por Erro ---")
+        eventos.registro.cancelar_assinatura_resumo(self._receber_resumo)
         self.close_button.setEnabled(True)
\ No newline at end of file
@@ -1,7 +1,7 @@
 # interface/worker_gerador.py
 
 from PyQt5.QtCore import QObject, pyqtSignal
-from motor_gerador.core import gerar_versoes_prova, gerar_prova_por_ids
+from motor_gerador.core import gerar_versoes_prova_em_fluxo, gerar_prova_por_ids
 
 class GeradorWorker(QObject):
     """
@@ -11,7 +11,8 @@ class GeradorWorker(QObject):
     # Sinais que o trabalhador pode emitir
     finished = pyqtSignal(list)  # Emite a lista de versões geradas quando termina
     error = pyqtSignal(str)      # Emite uma mensagem de erro se algo der errado
-    progress = pyqtSignal(str)   # Emite atualizações de progresso (opcional, mas bom ter)
+    progress = pyqtSignal(str)   # Emite atualizações de progresso (pools, questões, versões, ETA)
+    versao_concluida = pyqtSignal(dict)  # Emite cada versão assim que fica pronta (ordem de conclusão)
 
     def __init__(self, questoes_base, num_versoes, opcoes_geracao):
         super().__init__()
@@ -27,23 +28,35 @@ class GeradorWorker(QObject):
         try:
             self.progress.emit(f"Iniciando geração de {self.num_versoes} versões...")
             
-            # Chama a função pesada
-            versoes_geradas = gerar_versoes_prova(
+            # Chama a função pesada; cada versão segue para a interface assim que fica
+            # pronta (o PDF dos primeiros cadernos começa antes de a geração terminar)
+            versoes_geradas = []
+            for versao_data in gerar_versoes_prova_em_fluxo(
                 self.questoes_base, 
                 self.num_versoes, 
-                self.opcoes_geracao
-            )
+                self.opcoes_geracao,
+                ao_progredir=self._avisar_progresso
+            ):
+                versoes_geradas.append(versao_data)
+                self.versao_concluida.emit(versao_data)
+                if not self.is_running:
+                    # Interface desistiu (ex.: pasta de destino cancelada): o restante não é gerado
+                    break
             
             if not versoes_geradas:
                 raise Exception("O motor gerador não retornou nenhuma versão.")
 
-            # Se tudo deu certo, emite o sinal de 'finished' com os resultados
+            # Se tudo deu certo, emite o sinal de 'finished' com os resultados (em ordem de letra)
+            versoes_geradas.sort(key=lambda versao: versao['letra'])
             self.finished.emit(versoes_geradas)
 
         except Exception as e:
             # Se deu erro, emite o sinal de 'error'
             self.error.emit(str(e))
 
+    def _avisar_progresso(self, progresso):
+        self.progress.emit(progresso.descrever())
+
 class GeradorPorIdWorker(QObject):
     """
     Um trabalhador que executa a geração de provas por IDs em uma thread separada
@@ -1,23 +1,30 @@
 # main.py
 
 import sys
-from PyQt5.QtWidgets import QApplication
-from interface.main_window import MainWindow
-from PyQt5.QtGui import QFont
-#from interface.MenuInicial import MenuInicialWindow
-from database import init_db
 
 if __name__ == '__main__':
+    # Importações da interface só aqui: os workers de geração (processos "spawn")
+    # reimportam este arquivo e não devem carregar o PyQt5 nem as telas
+    from PyQt5.QtWidgets import QApplication
+    from interface.main_window import MainWindow
+    from PyQt5.QtGui import QFont
+    #from interface.MenuInicial import MenuInicialWindow
+    from database import init_db
+    from motor_gerador.sandbox import encerrar_servico_persistente
+
     # Garante que o banco de dados e as tabelas existam
     init_db()
-    
+
     # Inicia o aplicativo
     app = QApplication(sys.argv)
 
     # Define a fonte padrão para toda a aplicação.
     default_font = QFont("Arial", 12)
     app.setFont(default_font)
-    
+
+    # Workers de geração sobrevivem entre execuções; encerrados junto com o aplicativo
+    app.aboutToQuit.connect(encerrar_servico_persistente)
+
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -5,6 +5,7 @@ Motor Gerador - Sistema avançado para geração de questões e provas
 from .utils import (
     _get_math_context,
     formatar_unidade,
+    formatar_unidades,
     _executar_logica_tabela
 )
 
@@ -12,9 +13,11 @@ from .utils import (
 __all__ = [
     # Utilitários
     'formatar_unidade',
+    'formatar_unidades',
     '_get_math_context',
     '_executar_logica_tabela',
-    'gerar_prova_por_ids'  # ✅ ADICIONAR AQUI
+    'gerar_prova_por_ids',  # ✅ ADICIONAR AQUI
+    'get_cache_stats_formatted'
 ]
 
 # Versão
@@ -46,4 +49,38 @@ def get_optimizer_functions():
         _gerar_pool_combinatorio,
         optimize_memory_usage
     )
-    return CombinatorialEngine, _gerar_pool_combinatorio, optimize_memory_usage
\ No newline at end of file
+    return CombinatorialEngine, _gerar_pool_combinatorio, optimize_memory_usage
+
+
+def _com_workers(stats, contadores):
+    """Soma aos stats de um cache do processo principal os (hits, misses) contados nos workers"""
+    if not contadores:
+        return stats
+    hits = stats['hits'] + contadores[0]
+    misses = stats['misses'] + contadores[1]
+    hit_rate = (hits / (hits + misses) * 100) if hits + misses > 0 else 0
+    return dict(stats, hits=hits, misses=misses, hit_rate=f"{hit_rate:.1f}%")
+
+
+def get_cache_stats_formatted():
+    """
+    Estatísticas dos caches do motor, formatadas para o log: hits/misses somam o processo
+    principal e os workers isolados; as entradas em memória são as do processo principal
+    """
+    from .memory_optimizer import analysis_cache
+    from .cache_pools import pool_cache
+    from .questao_compilada import questoes_compiladas
+    from .sandbox import caches_dos_workers
+
+    workers = caches_dos_workers()
+    analises = _com_workers(analysis_cache.stats(), workers.get('analises'))
+    pools = _com_workers(pool_cache.stats(), workers.get('pools'))
+    compiladas = _com_workers(questoes_compiladas.stats(), workers.get('compiladas'))
+    return (
+        "\n📊 Estatísticas de cache:\n"
+        f"   Questões compiladas: {compiladas['hits']} hits / {compiladas['misses']} misses "
+        f"({compiladas['hit_rate']}, {compiladas['entries']} em memória)\n"
+        f"   Análises AST: {analises['hits']} hits / {analises['misses']} misses "
+        f"({analises['hit_rate']}, {analises['entries']} em memória)\n"
+        f"   Pools em disco: {pools['hits']} hits / {pools['misses']} misses ({pools['hit_rate']})"
+    )
@@ -0,0 +1,174 @@
+"""
+Cache persistente em disco para os pools de distratores do motor combinatório
+"""
+
+import os
+import pickle
+import sqlite3
+import time
+
+from database import DB_NAME
+
+from . import eventos
+from .eventos import AVISO
+
+# O cache fica ao lado do banco de questões
+CACHE_DB_NAME = os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), 'cache_pools.db')
+
+# O instante de acesso (ordem LRU) só é regravado se for mais antigo que isso:
+# leituras repetidas não disputam a trava de escrita do SQLite
+INTERVALO_ATUALIZACAO_ACESSO = 3600.0
+
+
+class PoolCache:
+    """Cache de pools em SQLite, com tamanho total limitado e remoção LRU"""
+
+    def __init__(self, caminho: str = CACHE_DB_NAME, max_bytes: int = 64 * 1024 * 1024):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._tabela_criada = False
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        if not self._tabela_criada:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pools (
+                    chave TEXT PRIMARY KEY,
+                    questao_id INTEGER,
+                    dados BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    ultimo_acesso REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pools_questao ON pools (questao_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pools_acesso ON pools (ultimo_acesso)")
+            conn.commit()
+            self._tabela_criada = True
+        return conn
+
+    def get(self, chave: str):
+        """
+        Retorna o pool armazenado (ou None). O instante do último acesso só é atualizado
+        se tiver mais de INTERVALO_ATUALIZACAO_ACESSO; entradas ilegíveis são removidas.
+        """
+        conn = None
+        try:
+            conn = self._conectar()
+            row = conn.execute("SELECT dados, ultimo_acesso FROM pools WHERE chave = ?", (chave,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            dados, ultimo_acesso = row
+            try:
+                pool = pickle.loads(dados)
+            except MemoryError:
+                raise
+            except Exception as e:
+                # Entrada corrompida ou de uma versão incompatível: vale como ausente
+                eventos.emitir(AVISO, 'cache', "   ⚠️  Pool ilegível no cache, removido: %s", e)
+                conn.execute("DELETE FROM pools WHERE chave = ?", (chave,))
+                conn.commit()
+                self.misses += 1
+                return None
+            agora = time.time()
+            if agora - ultimo_acesso > INTERVALO_ATUALIZACAO_ACESSO:
+                conn.execute("UPDATE pools SET ultimo_acesso = ? WHERE chave = ?", (agora, chave))
+                conn.commit()
+            self.hits += 1
+            return pool
+        except sqlite3.Error as e:
+            eventos.emitir(AVISO, 'cache', "   ⚠️  Cache de pools indisponível: %s", e)
+            self.misses += 1
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def set(self, chave: str, pool, questao_id=None):
+        """Armazena o pool e remove as entradas menos recentes se o limite for excedido"""
+        dados = pickle.dumps(pool, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dados) > self.max_bytes:
+            return
+        if not isinstance(questao_id, int):
+            questao_id = None
+
+        conn = None
+        try:
+            conn = self._conectar()
+            conn.execute(
+                "INSERT OR REPLACE INTO pools (chave, questao_id, dados, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?, ?)",
+                (chave, questao_id, sqlite3.Binary(dados), len(dados), time.time())
+            )
+            self._remover_excedente(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            eventos.emitir(AVISO, 'cache', "   ⚠️  Não foi possível gravar no cache de pools: %s", e)
+        finally:
+            if conn:
+                conn.close()
+
+    def _remover_excedente(self, conn):
+        """Remoção LRU até o tamanho total voltar a caber em max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM pools").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        chaves_removidas = []
+        for chave, tamanho in conn.execute("SELECT chave, tamanho FROM pools ORDER BY ultimo_acesso ASC"):
+            if total <= self.max_bytes:
+                break
+            chaves_removidas.append((chave,))
+            total -= tamanho
+        conn.executemany("DELETE FROM pools WHERE chave = ?", chaves_removidas)
+
+    def invalidar_questao(self, questao_id):
+        """Remove todos os pools associados a uma questão"""
+        if not os.path.exists(self.caminho):
+            return
+        conn = None
+        try:
+            conn = self._conectar()
+            conn.execute("DELETE FROM pools WHERE questao_id = ?", (questao_id,))
+            conn.commit()
+        except sqlite3.Error as e:
+            eventos.emitir(AVISO, 'cache', "   ⚠️  Não foi possível invalidar o cache da questão %s: %s", questao_id, e)
+        finally:
+            if conn:
+                conn.close()
+
+    def clear(self):
+        """Limpa todo o cache"""
+        if not os.path.exists(self.caminho):
+            return
+        conn = None
+        try:
+            conn = self._conectar()
+            conn.execute("DELETE FROM pools")
+            conn.commit()
+        except sqlite3.Error as e:
+            eventos.emitir(AVISO, 'cache', "   ⚠️  Não foi possível limpar o cache de pools: %s", e)
+        finally:
+            if conn:
+                conn.close()
+
+    def stats(self):
+        """Retorna estatísticas de uso do cache nesta sessão"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{hit_rate:.1f}%",
+            'max_bytes': self.max_bytes,
+        }
+
+
+# Instância global do cache
+pool_cache = PoolCache()
+
+
+def invalidar_pool_questao(questao_id):
+    """Invalida os pools de uma questão - chamado quando ela é editada ou excluída"""
+    pool_cache.invalidar_questao(questao_id)
@@ -3,33 +3,245 @@ Módulo principal com as funções centrais de geração de provas e cardápios
 """
 
 import random
-import re
-import os
 from collections import Counter
 from itertools import groupby
-
-from PyQt5.QtWidgets import QApplication
+from string import Formatter
 
 #from .cache_manager import calculation_cache, iniciar_nova_geracao_cache, print_cache_stats_to_log
-from .utils import _get_math_context, _executar_logica_tabela, formatar_unidade
-import time
+from . import eventos
+from .eventos import AVISO, ERRO, INFO
+from .utils import (_novo_contexto, _semear_geradores_globais, _preimportar_bibliotecas,
+                    _executar_logica_tabela, formatar_unidade, formatar_unidades)
+from .seeds import derivar_rng, derivar_seed, seed_da_execucao
+from .questao_compilada import obter_questao_compilada
+from .imagens import RegistroImagens
+from .memory_optimizer import _decode_index, _sample_without_replacement
+from .sandbox import ExecucaoInterrompida, TEMPO_LIMITE_POOL, em_worker, iniciar_servico
+
+
+# Classificação das falhas de uma variante
+FALHA_PERMANENTE = "permanente"  # não depende do seed: tentar de novo não adianta
+FALHA_SEED = "seed"              # depende dos valores sorteados: outro seed pode dar certo
+
+
+class ResultadoVariante:
+    """Resultado de _gerar_variante_questao: a variante gerada ou a falha classificada"""
+
+    __slots__ = ("variante", "falha", "motivo")
+
+    def __init__(self, variante=None, falha=None, motivo=""):
+        self.variante = variante
+        self.falha = falha
+        self.motivo = motivo
+
+    @property
+    def ok(self):
+        return self.variante is not None
+
+    @property
+    def permanente(self):
+        return self.falha == FALHA_PERMANENTE
+
+
+def _falha(tipo, motivo, questao_id=None):
+    """Informa a falha e a devolve classificada"""
+    eventos.emitir(AVISO, 'variante', motivo, questao_id=questao_id)
+    return ResultadoVariante(falha=tipo, motivo=motivo)
+
+
+def _questao_usa_pool(questao_base):
+    """Indica se a questão gera as alternativas pelo motor combinatório"""
+    return (questao_base.get("formato_questao", "Múltipla Escolha") == "Múltipla Escolha"
+            and bool(questao_base.get("gerar_alternativas_auto"))
+            and bool(questao_base.get("parametros"))
+            and questao_base.get("tipo_questao", "Código (Python)") == "Código (Python)")
+
+
+def _questao_usa_pool_completo(questao_base):
+    """
+    Indica se a questão precisa do pool completo (estágio de pools da execução): só as do
+    Modo 1. As do Modo 2 pedem ao motor só os distratores necessários (parada antecipada).
+    """
+    return _questao_usa_pool(questao_base) and obter_questao_compilada(questao_base).resposta_multivalor
+
+
+def _obter_pool(questao_base, pools=None):
+    """
+    Retorna o pool da questão a partir dos pools da execução (se houver)
+    ou o calcula, memorizando o resultado em `pools`
+    """
+    questao_id = questao_base.get('id')
+    if pools is not None and pools.get(questao_id) is not None:
+        return pools[questao_id]
+
+    pool = _calcular_pool_questao(questao_base)
+    if pools is not None and questao_id is not None and pool is not None:
+        pools[questao_id] = pool
+    return pool
+
+
+def _executar_isolado(servico, funcao, questao_base, *args, tempo_limite=None):
+    """
+    Executa funcao(questao_base, *args) no serviço de execução isolada (processo à
+    parte, com orçamento de tempo e memória) ou, sem serviço, aqui mesmo.
+    A questão vai a cada worker uma vez por execução; as tarefas seguintes só a referenciam.
+    Retorna None se a questão for interrompida.
+    """
+    if servico is None:
+        return funcao(questao_base, *args)
+    questao_id = questao_base.get('id')
+    if questao_id is not None:
+        questao_base = servico.compartilhar(('questao', questao_id), questao_base)
+    try:
+        return servico.executar(funcao, questao_base, *args,
+                                questao_id=questao_id, tempo_limite=tempo_limite)
+    except ExecucaoInterrompida as e:
+        if not e.repetida:
+            eventos.emitir(AVISO, 'isolamento', "⛔ %s. A questão não será gerada nesta execução.", e,
+                           questao_id=questao_id)
+        return None
+
+
+def _obter_pool_isolado(servico, questao_base, pools=None):
+    """_obter_pool com o cálculo feito no serviço de execução isolada"""
+    questao_id = questao_base.get('id')
+    if pools is not None and pools.get(questao_id) is not None:
+        return pools[questao_id]
+
+    pool = _executar_isolado(servico, _calcular_pool_questao, questao_base, tempo_limite=TEMPO_LIMITE_POOL)
+    if pools is not None and questao_id is not None and pool is not None:
+        pools[questao_id] = pool
+    return pool
+
+
+def _resolver_imagem(variante, imagens):
+    """
+    Liga a variante à entrada da imagem no registro da execução: `imagem` fica com o
+    caminho verificado (ou vazio, se a imagem não existe) e `imagem_info` com uma cópia
+    da entrada em dicionário (formato e dimensões)
+    """
+    info = imagens.resolver(variante.get("imagem"), variante.get("id_base"))
+    variante["imagem_info"] = info.como_dict() if info is not None else None
+    variante["imagem"] = info.caminho if info is not None and info.existe else ""
+    return variante
+
+
+def _gerar_variante_isolada(servico, questao_base, seed, pools=None, imagens=None):
+    """
+    _gerar_variante_questao no serviço de execução isolada. O pool é calculado antes
+    (uma vez, também isolado) e, como a questão, vai a cada worker uma vez por execução.
+    Uma questão interrompida pelo serviço é uma falha permanente (nesta execução).
+    A imagem é verificada aqui, pelo registro da execução `imagens` (uma vez por imagem).
+    """
+    questao_id = questao_base.get('id')
+    if servico is None:
+        with eventos.medir('variante', questao_id):
+            resultado = _gerar_variante_questao(questao_base, seed, pools=pools)
+    else:
+        pools_da_questao = None
+        if _questao_usa_pool_completo(questao_base):
+            pool = _obter_pool_isolado(servico, questao_base, pools)
+            if pool is not None:
+                pools_da_questao = servico.compartilhar(('pool', questao_id), {questao_id: pool})
+
+        resultado = None
+        if questao_id not in servico.bloqueadas:
+            with eventos.medir('variante', questao_id):
+                resultado = _executar_isolado(servico, _gerar_variante_questao, questao_base, seed, pools_da_questao)
+        if resultado is None:
+            return ResultadoVariante(falha=FALHA_PERMANENTE,
+                                     motivo=f"Questão ID {questao_id} interrompida: {servico.bloqueadas.get(questao_id)}")
+
+    if resultado.ok:
+        _resolver_imagem(resultado.variante, imagens if imagens is not None else RegistroImagens())
+    return resultado
+
+
+def _tabelas_formatadas_modo1(compilada, pool_de_tuplas, chaves, unidade, permitir_negativos):
+    """
+    Modo 1: para cada chave, os valores do pool (filtrados) já formatados, sem
+    repetições de texto e em ordem numérica. Calculado uma vez por pool e reutilizado
+    por todas as variantes. Retorna None se alguma chave ficar sem valores.
+    """
+    memo_chave = (tuple(chaves), unidade, bool(permitir_negativos))
+    memo = compilada.tabelas_modo1.get(memo_chave)
+    if memo is not None and memo[0] is pool_de_tuplas:
+        return memo[1]
+
+    pools_por_variavel = {chave: set() for chave in chaves}
+    for resultado_tupla in pool_de_tuplas:
+        for chave, valor in resultado_tupla:
+            if chave in pools_por_variavel:
+                pools_por_variavel[chave].add(valor)
+
+    tabelas = {}
+    for chave, valores_set in pools_por_variavel.items():
+        valores_filtrados = {v for v in valores_set if abs(v) > 1e-9}
+        if not permitir_negativos:
+            valores_filtrados = {v for v in valores_filtrados if v >= 0}
+        if not valores_filtrados:
+            return None
+        textos = formatar_unidades(sorted(valores_filtrados), unidade, incluir_unidade=False)
+        tabelas[chave] = list(dict.fromkeys(textos))
+
+    compilada.tabelas_modo1[memo_chave] = (pool_de_tuplas, tabelas)
+    return tabelas
+
+
+def _campos_do_formato(formato_texto, chaves):
+    """Chaves referenciadas pelo formato_texto (todas, se ele não puder ser analisado)"""
+    try:
+        campos = {campo.split('.')[0].split('[')[0] for _, campo, _, _ in Formatter().parse(formato_texto) if campo}
+    except ValueError:
+        return list(chaves)
+    return [chave for chave in chaves if chave in campos]
+
+
+_MOTIVO_MEMORIA = "AVISO: O código da questão ID %s excedeu a memória disponível."
 
 
-def _gerar_variante_questao(questao_base, seed):
+def _calcular_pool_questao(questao_base):
     """
-    Gera uma variante única de uma questão base
+    Executa o código da questão uma vez e calcula o seu pool de distratores.
+    Usado pelo estágio de pools, que roda antes da montagem das versões.
+    O sorteio é derivado do próprio código: o pool depende só do conteúdo da questão.
+    """
+    from .memory_optimizer import _gerar_pool_combinatorio
+
+    params = questao_base.get("parametros", "")
+    compilada = obter_questao_compilada(questao_base)
+    contexto = _novo_contexto()
+    contexto['avisos'] = []
+    rng = derivar_rng('pool', params)
+    contexto['rng'] = rng
+    contexto['random'] = rng
+    try:
+        compilada.executar(contexto)
+        return _gerar_pool_combinatorio(questao_base, params, contexto)
+    except MemoryError:
+        # No worker, segue até o laço do worker: ele é reciclado e a questão, bloqueada
+        if em_worker():
+            raise
+        eventos.emitir(AVISO, 'pool', _MOTIVO_MEMORIA + " Pool não calculado.",
+                       questao_base.get('id', 'N/A'), questao_id=questao_base.get('id'))
+        return None
+    except Exception as e:
+        eventos.emitir(AVISO, 'pool', "AVISO: Erro no código da questão ID %s: '%s'. Pool não calculado.",
+                       questao_base.get('id', 'N/A'), e, questao_id=questao_base.get('id'))
+        return None
+
+
+def _gerar_variante_questao(questao_base, seed, pools=None):
+    """
+    Gera uma variante única de uma questão base.
+    O mesmo `seed` produz sempre a mesma variante (None = sorteio não reproduzível).
+    `pools` (opcional) mapeia ID da questão -> pool já calculado nesta execução.
+    Retorna um ResultadoVariante: a variante, ou a falha classificada como permanente
+    (erro no código/enunciado, pool insuficiente) ou dependente do seed.
     """
     is_multi_valor = False
     try:
-        rng = random.Random()
-        '''if seed is not None:
-            #random.seed(seed)
-            rng = random.Random()'''
-
-        # Gerar seed única combinando múltiplos fatores
-        timestamp = int(time.time() * 1000)
-        unique_seed = hash(f"{seed}_{timestamp}_{os.getpid()}_{random.getrandbits(64)}")
-        rng.seed(unique_seed)
+        rng = random.Random(derivar_seed('variante', seed) if seed is not None else None)
         
         # Gera chave única para cache
         questao_id = questao_base.get('id', 'N/A')
@@ -41,12 +253,14 @@ def _gerar_variante_questao(questao_base, seed):
             print(f"   💾 Variante em cache - Questão {questao_id}")
             return cached_variante'''
         
+        compilada = obter_questao_compilada(questao_base)
         formato_questao = questao_base.get("formato_questao", "Múltipla Escolha")
         num_alternativas = questao_base.get("num_alternativas", 5)
         unidade = questao_base.get("unidade_resposta", "")
         permitir_negativos = questao_base.get("permitir_negativos", False)
 
-        contexto = _get_math_context()
+        # Bibliotecas e builtins vêm da camada base; o script só escreve nesta camada
+        contexto = _novo_contexto()
         contexto['avisos'] = []
         
         if questao_base.get("parametros"):
@@ -57,52 +271,26 @@ def _gerar_variante_questao(questao_base, seed):
                     # ✅ INJETAR o rng no contexto antes de executar
                     contexto['rng'] = rng
                     contexto['random'] = rng  # Substitui o random padrão
-                    exec(params, contexto)
-                    # ✅ LIMPAR do contexto após execução
-                    del contexto['rng']
-                    del contexto['random']
+                    # Scripts com `import random` ou np.random também ficam reproduzíveis
+                    _preimportar_bibliotecas(compilada.bibliotecas)
+                    _semear_geradores_globais(rng)
+                    compilada.executar(contexto)
+                except MemoryError:
+                    raise
                 except Exception as e:
                     id_questao = questao_base.get('id', 'N/A')
                     aviso = f"AVISO: Erro no código da questão ID {id_questao}: '{e}'. A questão não será gerada."
-                    print(aviso)
-                    return None
+                    # Erros de sintaxe/nomes/importação não dependem dos valores sorteados
+                    permanente = isinstance(e, (SyntaxError, NameError, ImportError))
+                    return _falha(FALHA_PERMANENTE if permanente else FALHA_SEED, aviso, id_questao)
             else:
+                _semear_geradores_globais(rng)
                 _executar_logica_tabela(params, contexto)
         
         resposta_valor_calculado = contexto.get('resposta_valor') or contexto.get('resposta')
-        
-        # Limpa contexto
-        for key in ['random', 'math', 'np', 'cmath', 'sp', '__builtins__']:
-            if key in contexto: del contexto[key]
-
-        enunciado_template = questao_base.get("enunciado", "")
-        contexto_formatado = contexto.copy()
-
-        # Processa placeholders com unidades
-        placeholders = re.findall(r'\{(\w+)\}(?:\s*)(\S+)\b', enunciado_template)
-        for var_name, potential_unit_text in placeholders:
-            if var_name in contexto_formatado and isinstance(contexto_formatado[var_name], (int, float)) and len(potential_unit_text) > 1:
-                from .utils import PREFIX_DIVISORS, VALID_BASE_UNITS
-                prefix = potential_unit_text[0]
-                base_unit = potential_unit_text[1:]
-                
-                if prefix in PREFIX_DIVISORS and base_unit in VALID_BASE_UNITS:
-                    original_value = float(contexto_formatado[var_name])
-                    divisor = PREFIX_DIVISORS[prefix]
-                    converted_value = original_value / divisor
-                    contexto_formatado[var_name] = int(converted_value) if converted_value == int(converted_value) else converted_value
-
-        # Arredonda floats para exibição limpa
-        for key, value in contexto_formatado.items():
-            if isinstance(value, float):
-                rounded_value = round(value, 2)
-                if rounded_value == int(rounded_value):
-                    contexto_formatado[key] = int(rounded_value)
-                else:
-                    contexto_formatado[key] = rounded_value
 
-        enunciado_final = enunciado_template.format(**contexto_formatado)
-        enunciado_final = re.sub(r'(\d+)\.(\d+)', r'\1,\2', enunciado_final)
+        # Só os campos referenciados no enunciado são convertidos/arredondados
+        enunciado_final = compilada.enunciado.formatar(contexto)
         
         alternativas_valores = []
         resposta_valor = None
@@ -113,181 +301,151 @@ def _gerar_variante_questao(questao_base, seed):
                 if isinstance(resposta_valor_calculado, dict) and "valores" in resposta_valor_calculado and "formato_texto" in resposta_valor_calculado:                   
                     is_multi_valor = True
                     
-                    # Importação local para evitar circularidade
-                    from .memory_optimizer import _gerar_pool_combinatorio
-                    pool_de_tuplas = _gerar_pool_combinatorio(questao_base, params, contexto)
+                    pool_de_tuplas = _obter_pool(questao_base, pools)
 
                     if not pool_de_tuplas:
-                        return None
-
-                    pools_por_variavel = {chave: set() for chave in resposta_valor_calculado["valores"].keys()}
-                    for resultado_tupla in pool_de_tuplas:
-                        for chave, valor in resultado_tupla:
-                            if chave in pools_por_variavel:
-                                pools_por_variavel[chave].add(valor)
-
-                    pools_filtrados = {}
-                    for chave, valores_set in pools_por_variavel.items():
-                        valores_filtrados = {v for v in valores_set if abs(v) > 1e-9}
-                        if not permitir_negativos:
-                            valores_filtrados = {v for v in valores_filtrados if v >= 0}
-                        
-                        if not valores_filtrados:
-                            return None
-                            
-                        pools_filtrados[chave] = list(valores_filtrados)
-
-                    def formatar_dict_inteligentemente(valores_dict, formato_template, unidade_base):
-                        valores_formatados = {}
-                        for chave, valor_num in valores_dict.items():
-                            valores_formatados[chave] = formatar_unidade(valor_num, unidade_base, incluir_unidade=False)
-                        return formato_template.format(**valores_formatados).replace('.', ',')
+                        return _falha(FALHA_PERMANENTE, f"AVISO: ID {questao_id}: pool de distratores vazio. Questão descartada.", questao_id)
+
+                    chaves = list(resposta_valor_calculado["valores"].keys())
+                    tabelas = _tabelas_formatadas_modo1(compilada, pool_de_tuplas, chaves, unidade, permitir_negativos)
+                    if tabelas is None:
+                        return _falha(FALHA_PERMANENTE, f"AVISO: ID {questao_id}: alguma chave ficou sem valores válidos no pool. Questão descartada.", questao_id)
 
                     formato_texto = resposta_valor_calculado.get("formato_texto", "")
                     resposta_correta_dict_numerico = resposta_valor_calculado["valores"]
                     
                     if not permitir_negativos and any(v < 0 for v in resposta_correta_dict_numerico.values() if isinstance(v, (int, float))):
-                        return None
+                        return _falha(FALHA_SEED, f"FALHA: Resposta correta negativa não permitida para ID {questao_id}.", questao_id)
                     if any(abs(v) < 1e-9 for v in resposta_correta_dict_numerico.values() if isinstance(v, (int, float))):
-                        return None
+                        return _falha(FALHA_SEED, f"FALHA: Resposta correta zero não permitida para ID {questao_id}.", questao_id)
                     
-                    resposta_valor = formatar_dict_inteligentemente(resposta_correta_dict_numerico, formato_texto, unidade)
+                    resposta_formatada = {chave: formatar_unidade(valor_num, unidade, incluir_unidade=False)
+                                          for chave, valor_num in resposta_correta_dict_numerico.items()}
+                    resposta_valor = formato_texto.format(**resposta_formatada).replace('.', ',')
                     alternativas_valores = [resposta_valor]
 
-                    tentativas, limite_tentativas = 0, 500
-                    while len(alternativas_valores) < num_alternativas:
-                        if tentativas > limite_tentativas:
-                            print(f"AVISO: ID {questao_base.get('id', 'N/A')}: Limite de tentativas atingido. Questão descartada.")
-                            return None
-                        
-                        distrator_dict_numerico = {chave: rng.choice(pool) for chave, pool in pools_filtrados.items()}
-                        distrator_texto = formatar_dict_inteligentemente(distrator_dict_numerico, formato_texto, unidade)
-                
-                        if distrator_texto not in alternativas_valores:
+                    # Só as chaves que aparecem no texto distinguem alternativas
+                    chaves_texto = _campos_do_formato(formato_texto, chaves)
+                    listas = [tabelas[chave] for chave in chaves_texto]
+                    total_combinacoes = 1
+                    for lista in listas:
+                        total_combinacoes *= len(lista)
+
+                    # Verificação exata de viabilidade (a resposta correta ocupa uma combinação)
+                    num_distratores = num_alternativas - 1
+                    correta_no_espaco = all(resposta_formatada[chave] in tabelas[chave] for chave in chaves_texto)
+                    if total_combinacoes - correta_no_espaco < num_distratores:
+                        # Sem a resposta correta no espaço ainda faltariam combinações: vale para qualquer seed
+                        tipo = FALHA_PERMANENTE if total_combinacoes < num_distratores else FALHA_SEED
+                        return _falha(tipo, f"AVISO: ID {questao_id}: apenas {total_combinacoes - correta_no_espaco} "
+                                            f"combinação(ões) distinta(s) para {num_distratores} distratores. Questão descartada.", questao_id)
+
+                    # Combinações de índices sem reposição no espaço de base mista
+                    vistos = {resposta_valor}
+                    for indice in _sample_without_replacement(total_combinacoes, rng):
+                        combinacao = _decode_index(indice, listas)
+                        distrator_texto = formato_texto.format(**dict(zip(chaves_texto, combinacao))).replace('.', ',')
+                        if distrator_texto not in vistos:
+                            vistos.add(distrator_texto)
                             alternativas_valores.append(distrator_texto)
-                        
-                        tentativas += 1
+                            if len(alternativas_valores) >= num_alternativas:
+                                break
+
+                    if len(alternativas_valores) < num_alternativas:
+                        return _falha(FALHA_SEED, f"AVISO: ID {questao_id}: textos repetidos entre combinações. Questão descartada.", questao_id)
                     
                 # Modo 2: Resposta única
                 elif isinstance(resposta_valor_calculado, (int, float)):
-                    # Importação local para evitar circularidade
-                    from .memory_optimizer import _gerar_pool_combinatorio
-                    pool_numerico = _gerar_pool_combinatorio(questao_base, params, contexto)
-                    
-                    if pool_numerico is None:
-                        print(f"AVISO: A questão ID {questao_base.get('id', 'N/A')} não é do tipo combinatório. Questão descartada.")
-                        return None
-
-                    pool_de_textos = set()
-                    for valor_num in pool_numerico:
-                        if not permitir_negativos and valor_num < 0:
-                            continue
-                        texto_formatado = formatar_unidade(valor_num, unidade)
-                        if abs(valor_num) < 1e-15:
-                            continue
-                        pool_de_textos.add(texto_formatado)
-
-                    if len(pool_de_textos) < num_alternativas:
-                        print(f"FALHA: A questão ID {questao_base.get('id', 'N/A')} não gerou alternativas suficientes.")
-                        return None
+                    from .memory_optimizer import _gerar_distratores_combinatorio
 
                     resposta_correta_num = resposta_valor_calculado
                     
                     if not permitir_negativos and resposta_correta_num < 0:
-                        print(f"FALHA: Resposta correta negativa não permitida para ID {questao_base.get('id', 'N/A')}.")
-                        return None
+                        return _falha(FALHA_SEED, f"FALHA: Resposta correta negativa não permitida para ID {questao_id}.", questao_id)
 
                     resposta_correta_texto = formatar_unidade(resposta_correta_num, unidade)
 
                     if resposta_correta_texto.strip().startswith('0'):
-                        print(f"FALHA: Resposta correta zero não permitida para ID {questao_base.get('id', 'N/A')}.")
-                        return None
+                        return _falha(FALHA_SEED, f"FALHA: Resposta correta zero não permitida para ID {questao_id}.", questao_id)
+
+                    # Pede ao motor só os distratores necessários (para assim que os encontra)
+                    num_distratores = num_alternativas - 1
+                    pool_da_execucao = pools.get(questao_base.get('id')) if pools else None
+                    resultado_distratores = _gerar_distratores_combinatorio(
+                        questao_base, params, contexto, num_distratores,
+                        lambda valor_num: formatar_unidade(valor_num, unidade),
+                        excluir={resposta_correta_texto}, rng=rng, pool=pool_da_execucao
+                    )
                     
-                    pool_de_textos.add(resposta_correta_texto)
-                    if len(pool_de_textos) < num_alternativas:
-                        print(f"FALHA: Pool insuficiente para ID {questao_base.get('id', 'N/A')}.")
-                        return None
-                    
-                    max_pool_size = 30
-                    if len(pool_de_textos) > max_pool_size:
-                        pool_list = list(pool_de_textos)
-                        if resposta_correta_texto in pool_list:
-                            pool_list.remove(resposta_correta_texto)
-                        pool_list_limited = rng.sample(pool_list, max_pool_size - 1)
-                        pool_de_textos = set(pool_list_limited) | {resposta_correta_texto}
-
-                    pool_sem_resposta = set(pool_de_textos)
-                    pool_sem_resposta.discard(resposta_correta_texto)
-                    
-                    distratores = random.sample(list(pool_sem_resposta), num_alternativas - 1)
+                    # Sem pool nenhum: depende só do código, se repete com qualquer seed
+                    if resultado_distratores is None:
+                        return _falha(FALHA_PERMANENTE, f"AVISO: Não foi possível gerar distratores para a questão ID {questao_id}. Questão descartada.", questao_id)
+
+                    # Faltaram textos: só é permanente se todas as combinações foram avaliadas
+                    distratores, esgotado = resultado_distratores
+                    if len(distratores) < num_distratores:
+                        return _falha(FALHA_PERMANENTE if esgotado else FALHA_SEED,
+                                      f"FALHA: A questão ID {questao_id} não gerou alternativas suficientes.", questao_id)
                     
                     resposta_valor = resposta_correta_texto
                     alternativas_valores = [resposta_valor] + distratores
                 
             else:
                 # Modo 3: Alternativas manuais
-                contexto_formatacao = {}
-                if questao_base.get("parametros"):
-                    params = questao_base.get("parametros", "")
-                    temp_context = _get_math_context()
-                    try:
-                        exec(params, temp_context)
-                        contexto_formatacao = temp_context
-                    except Exception as e:
-                        print(f"AVISO: Erro ao executar parâmetros para formatação do MODO 3 na ID {questao_base.get('id')}: {e}")
+                # Reaproveita o namespace da execução acima (mesmos valores do enunciado)
+                contexto_formatacao = contexto if questao_base.get("parametros") else {}
                 
                 alternativas_valores = []
                 resposta_valor = None
                 
-                letras_base = ["a", "b", "c", "d", "e"]
-                
-                for letra in letras_base[:num_alternativas]:
-                    alt_base = questao_base.get(f"alternativa_{letra}")
+                for letra, alt_base in compilada.alternativas[:num_alternativas]:
                     if alt_base:
                         try:
                             alternativas_valores.append(alt_base.format(**contexto_formatacao))
                         except KeyError as e:
-                            print(f"AVISO: Erro de formatação na alternativa '{letra}': Variável {e} não encontrada.")
+                            eventos.emitir(AVISO, 'variante', "AVISO: ID %s: erro de formatação na alternativa '%s': "
+                                           "variável %s não encontrada.", questao_id, letra, e, questao_id=questao_id)
                             alternativas_valores.append(alt_base)
                 
-                resposta_letra = questao_base.get("resposta_correta", "?").lower()
-                alt_correta_texto = questao_base.get(f"alternativa_{resposta_letra}")
+                resposta_letra = compilada.resposta_letra
+                alt_correta_texto = compilada.resposta_template
                 
                 if alt_correta_texto:
                     try:
                         resposta_valor = alt_correta_texto.format(**contexto_formatacao)
                     except KeyError as e:
-                        print(f"AVISO: Erro de formatação na resposta correta: Variável {e} não encontrada.")
+                        eventos.emitir(AVISO, 'variante', "AVISO: ID %s: erro de formatação na resposta correta: "
+                                       "variável %s não encontrada.", questao_id, e, questao_id=questao_id)
                         resposta_valor = alt_correta_texto
                 else:
-                    print(f"AVISO: 'resposta_correta' ('{resposta_letra}') é inválida.")
+                    eventos.emitir(AVISO, 'variante', "AVISO: ID %s: 'resposta_correta' ('%s') é inválida.",
+                                   questao_id, resposta_letra, questao_id=questao_id)
         
         elif formato_questao == "Verdadeiro ou Falso":
             resposta_valor = resposta_valor_calculado
             if resposta_valor not in ["Verdadeiro", "Falso"] and resposta_valor is not None:
                 resposta_valor = resposta_valor.format(**contexto)
 
+    except MemoryError:
+        # No worker, segue até o laço do worker: ele é reciclado e a questão, bloqueada
+        if em_worker():
+            raise
+        id_questao = questao_base.get('id', 'N/A')
+        return _falha(FALHA_PERMANENTE, (_MOTIVO_MEMORIA + " A questão não será gerada.") % id_questao, id_questao)
     except KeyError as e:
         id_questao = questao_base.get('id', 'N/A')
         variavel_faltante = str(e).strip("'")
         aviso = f"AVISO: Erro de formatação na questão ID {id_questao}: Variável {{{variavel_faltante}}} não definida."
-        print(aviso)
-        return None
+        return _falha(FALHA_PERMANENTE, aviso, id_questao)
     except Exception as e:
         id_questao = questao_base.get('id', 'N/A')
         aviso = f"AVISO: Erro inesperado ao gerar a questão ID {id_questao}: {e}"
-        print(aviso)
         import traceback
-        traceback.print_exc()
-        return None
+        eventos.emitir(AVISO, 'variante', "%s\n%s", aviso, traceback.format_exc().rstrip(), questao_id=id_questao)
+        return ResultadoVariante(falha=FALHA_SEED, motivo=aviso)
 
-    # Processa imagem
-    imagem_path = questao_base.get("imagem", "")
-    if imagem_path:
-        imagem_path = imagem_path.replace('\\', '/')
-        if not os.path.exists(imagem_path):
-            print(f"⚠️ AVISO: Imagem não encontrada - {imagem_path}")
-            imagem_path = ""
+    # Imagem: só o caminho; a existência é verificada pelo registro de imagens da execução
+    imagem_path = (questao_base.get("imagem") or "").replace('\\', '/')
     
     largura_imagem = questao_base.get("imagem_largura_percentual") or 50
     
@@ -305,10 +463,10 @@ def _gerar_variante_questao(questao_base, seed):
 
     #calculation_cache.set(cache_key, variante_final)
     
-    return variante_final
+    return ResultadoVariante(variante_final)
 
 
-def _gerar_gabarito_distribuido(num_questoes):
+def _gerar_gabarito_distribuido(num_questoes, rng=None):
     """Gera gabarito com distribuição balanceada de respostas"""
     letras = ["A", "B", "C", "D", "E"]
     gabarito = []
@@ -320,7 +478,7 @@ def _gerar_gabarito_distribuido(num_questoes):
         gabarito.append(letra_escolhida)
         contagem[letra_escolhida] += 1
     
-    random.shuffle(gabarito)
+    (rng or random).shuffle(gabarito)
     return gabarito
 
 
@@ -339,28 +497,32 @@ def gerar_versoes_prova(questoes_base, num_versoes, opcoes_geracao, log_dialog=N
     Função principal - escolhe automaticamente entre paralelo e serial
     """
     # Importa funções de paralelismo quando necessário (evita circularidade)
-    from .parallel_engine import gerar_versoes_prova_paralelo, gerar_versoes_prova_serial, _deve_usar_paralelismo
+    from .parallel_engine import gerar_versoes_prova_paralelo, gerar_versoes_prova_serial
     
     # Inicia nova geração de cache
     nome_prova = opcoes_geracao.get('nome_prova', 'prova_geral')
     #iniciar_nova_geracao_cache(f"prova_{nome_prova}")
     
+    # Seed mestre da execução: o mesmo seed e as mesmas questões reproduzem as mesmas provas
+    opcoes_geracao = dict(opcoes_geracao, seed=seed_da_execucao(opcoes_geracao))
+
     if log_dialog:
         log_dialog.append_log(f"🔄 Gerando {num_versoes} versão(ões)...")
         log_dialog.append_log(f"   {len(questoes_base)} questões de base")
+        log_dialog.append_log(f"   🎲 Seed da execução: {opcoes_geracao['seed']}")
     
-    # Decide estratégia
-    usar_paralelismo = _deve_usar_paralelismo(questoes_base, num_versoes)
-    
-    if usar_paralelismo:
+    # Eventos da geração alimentam o resumo da execução (entregue a quem o assinou, ex.: LogDialog)
+    eventos.registro.iniciar_execucao(f"da geração ({num_versoes} versão(ões))")
+    try:
+        # Quantos workers (serial, pool aquecido ou mais processos): decide o modelo de custo
         versoes_finais = gerar_versoes_prova_paralelo(questoes_base, num_versoes, opcoes_geracao)
         # Fallback se paralelismo falhar
         if versoes_finais is None:
             if log_dialog:
                 log_dialog.append_log("⚠️  Fallback para serial...")
             versoes_finais = gerar_versoes_prova_serial(questoes_base, num_versoes, opcoes_geracao)
-    else:
-        versoes_finais = gerar_versoes_prova_serial(questoes_base, num_versoes, opcoes_geracao)
+    finally:
+        eventos.registro.finalizar_execucao()
     
     # Estatísticas
     '''if log_dialog:
@@ -372,11 +534,66 @@ def gerar_versoes_prova(questoes_base, num_versoes, opcoes_geracao, log_dialog=N
     return versoes_finais
 
 
-def gerar_cardapio_questoes(caminho_salvar_pdf, disciplina_id=None, tema=None, log_dialog=None):
+def gerar_versoes_prova_em_fluxo(questoes_base, num_versoes, opcoes_geracao, ao_progredir=None):
+    """
+    Como gerar_versoes_prova, mas entrega cada versão assim que ela fica pronta (na ordem
+    de conclusão, não de letra): o PDF dos primeiros cadernos pode começar antes do fim.
+    `ao_progredir(progresso)` recebe o andamento (ProgressoGeracao) na thread da geração.
+    """
+    from .parallel_engine import gerar_versoes_prova_em_fluxo as gerar_em_fluxo, gerar_versoes_prova_serial
+
+    # Seed mestre da execução: o mesmo seed e as mesmas questões reproduzem as mesmas provas
+    opcoes_geracao = dict(opcoes_geracao, seed=seed_da_execucao(opcoes_geracao))
+
+    eventos.registro.iniciar_execucao(f"da geração ({num_versoes} versão(ões))")
+    entregues = 0
+    try:
+        try:
+            for versao_data in gerar_em_fluxo(questoes_base, num_versoes, opcoes_geracao, ao_progredir):
+                entregues += 1
+                yield versao_data
+        except Exception as e:
+            # Fallback só se nada foi entregue: versões já entregues não podem ser refeitas
+            if entregues:
+                raise
+            eventos.emitir(AVISO, 'execucao', "⚠️  Paralelismo falhou: %s. Fallback para serial...", e)
+            yield from gerar_versoes_prova_serial(questoes_base, num_versoes, opcoes_geracao)
+    finally:
+        eventos.registro.finalizar_execucao()
+
+
+TENTATIVAS_CARDAPIO = 100
+
+
+def _bibliotecas_das_questoes(questoes):
+    """Bibliotecas pesadas que os workers de execução isolada devem pré-importar"""
+    from .utils import bibliotecas_referenciadas
+    bibliotecas = set()
+    for questao in questoes:
+        bibliotecas |= bibliotecas_referenciadas(questao.get("parametros") or "")
+    return tuple(sorted(bibliotecas))
+
+
+def _gerar_variante_cardapio(servico, questao_base, seed_mestre, pools, imagens=None):
+    """
+    Variante da questão para o cardápio: novas tentativas de seed só para falhas que
+    dependem do seed. Retorna (ResultadoVariante, número de tentativas feitas).
+    """
+    for tentativa in range(TENTATIVAS_CARDAPIO):
+        seed_da_tentativa = (seed_mestre, 'cardapio', questao_base['id'], tentativa)
+        resultado = _gerar_variante_isolada(servico, questao_base, seed_da_tentativa, pools, imagens)
+        if resultado.ok or resultado.permanente:
+            break
+    return resultado, tentativa + 1
+
+
+def gerar_cardapio_questoes(caminho_salvar_pdf, disciplina_id=None, tema=None, log_dialog=None, seed=None):
     """
     Orquestra a criação do PDF do cardápio
     """
     from database import obter_todas_questoes_para_cardapio, obter_disciplina_nome_por_id
+    # PyQt5 só aqui: os workers de execução isolada importam este módulo e não precisam dele
+    from PyQt5.QtWidgets import QApplication
     import gerador_pdf
     
     def log_message(message):
@@ -395,21 +612,24 @@ def gerar_cardapio_questoes(caminho_salvar_pdf, disciplina_id=None, tema=None, l
             raise ValueError("Nenhuma questão encontrada para os filtros selecionados.")
 
         log_message(f"Encontradas {len(questoes_base)} questões para o cardápio.")
+        seed_mestre = seed_da_execucao({"seed": seed})
+        log_message(f"🎲 Seed da execução: {seed_mestre}")
         
         questoes_geradas = []
-        for questao_base in questoes_base:
-            # Lógica de tentativas
-            variante = None
-            numero_de_tentativas = 100
-
-            for tentativa in range(numero_de_tentativas):
-                seed_da_tentativa = questao_base['id'] + tentativa
-                variante_tentativa = _gerar_variante_questao(questao_base, seed=seed_da_tentativa)
-                
-                if variante_tentativa:
-                    variante = variante_tentativa
-                    break
-
+        pools = {}  # Cada pool é calculado uma vez, mesmo com várias tentativas
+        imagens = RegistroImagens()
+        eventos.registro.iniciar_execucao("do cardápio")
+        servico = iniciar_servico(1, _bibliotecas_das_questoes(questoes_base))
+        try:
+            variantes = [_gerar_variante_cardapio(servico, questao_base, seed_mestre, pools, imagens)
+                         for questao_base in questoes_base]
+        finally:
+            if servico:
+                servico.encerrar()
+            eventos.registro.finalizar_execucao()
+
+        for questao_base, (resultado, tentativas) in zip(questoes_base, variantes):
+            variante = resultado.variante
             if variante:
                 if variante.get("formato_questao") == "Múltipla Escolha":
                     letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
@@ -424,7 +644,8 @@ def gerar_cardapio_questoes(caminho_salvar_pdf, disciplina_id=None, tema=None, l
                 variante['disciplina_id'] = questao_base['disciplina_id']
                 questoes_geradas.append(variante)
             else:
-                log_message(f"AVISO: Questão ID {questao_base['id']} foi descartada do cardápio após {numero_de_tentativas} tentativas.")
+                log_message(f"AVISO: Questão ID {questao_base['id']} foi descartada do cardápio após {tentativas} tentativa(s) "
+                            f"(falha {resultado.falha}): {resultado.motivo}")
 
         log_message(f"Geradas {len(questoes_geradas)} variantes para o PDF.")
 
@@ -454,6 +675,8 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
     Gera provas a partir de IDs específicos, considerando grupos
     REPLICA EXATAMENTE a lógica de rotação do parallel_engine
     """
+    servico = None
+    eventos.registro.iniciar_execucao("da prova por IDs")
     try:
         from database import buscar_questoes_por_ids, obter_questoes_do_grupo
         
@@ -488,17 +711,26 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
             rotacao_gabarito = 1
             embaralhar_questoes = False
         
+        seed_mestre = seed_da_execucao(config_geral)
+        eventos.emitir(INFO, 'execucao', "🎲 Seed da execução: %s", seed_mestre)
+        rng_execucao = derivar_rng(seed_mestre, 'execucao')
+
         # ⭐⭐ PREPARAR GABARITO BALANCEADO (igual ao parallel_engine)
         num_questoes_me = sum(1 for q in questões_encontradas if q.get('formato_questao') == 'Múltipla Escolha')
         
         if num_questoes_me == 1:
-            gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"])]
+            gabarito_me_v1 = [rng_execucao.choice(["A", "B", "C", "D", "E"])]
         elif distribuir_gabarito:
-            gabarito_me_v1 = _gerar_gabarito_distribuido(num_questoes_me)
-            random.shuffle(gabarito_me_v1)
+            gabarito_me_v1 = _gerar_gabarito_distribuido(num_questoes_me, rng_execucao)
+            rng_execucao.shuffle(gabarito_me_v1)
         else:
-            gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"]) for _ in range(num_questoes_me)]
+            gabarito_me_v1 = [rng_execucao.choice(["A", "B", "C", "D", "E"]) for _ in range(num_questoes_me)]
         
+        # Pools e imagens compartilhados por todas as versões (cada um é calculado/verificado uma vez)
+        pools = {}
+        imagens = RegistroImagens()
+        servico = iniciar_servico(1, _bibliotecas_das_questoes(questões_encontradas))
+
         # Gerar cada versão
         for num_prova in range(1, num_versoes + 1):
             prova_versao = []
@@ -520,8 +752,8 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
             
             for i, questao in enumerate(prova_versao):
                 # SEED ÚNICA: inclui num_prova para variar entre versões
-                seed = f"versao_{num_prova}_questao_{questao['id']}_index_{i}"
-                variante = _gerar_variante_questao(questao, seed=seed)
+                seed = (seed_mestre, 'versao', num_prova, 'questao', questao['id'], 'index', i)
+                variante = _gerar_variante_isolada(servico, questao, seed, pools, imagens).variante
                 
                 if not variante:
                     continue
@@ -550,7 +782,7 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
                         continue
 
                     # ⭐⭐ EMBARALHAR E POSICIONAR RESPOSTA (CÓDIGO CRÍTICO)
-                    random.Random(seed).shuffle(alternativas)
+                    derivar_rng(seed, 'alternativas').shuffle(alternativas)
                     
                     try:
                         idx_correta_atual = alternativas.index(resposta_valor)
@@ -558,7 +790,8 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
                         # Trocar a resposta correta para a posição da letra do gabarito
                         alternativas[idx_correta_atual], alternativas[idx_alvo] = alternativas[idx_alvo], alternativas[idx_correta_atual]
                     except (ValueError, IndexError):
-                        print(f"Aviso: não foi possível posicionar a resposta para a questão ID {variante['id_base']}")
+                        eventos.emitir(AVISO, 'gabarito', "Aviso: não foi possível posicionar a resposta para a questão ID %s",
+                                       variante['id_base'], questao_id=variante['id_base'])
                     
                     questao_final["gabarito"] = letra_correta_final
                     questao_final["alternativas"] = {letra: texto for letra, texto in zip(letras_disponiveis, alternativas)}
@@ -573,12 +806,16 @@ def gerar_prova_por_ids(ids_questoes, num_versoes=1, config_geral=None):
             
             # ⭐⭐ EMBARALHAR QUESTÕES (se configurado)
             if embaralhar_questoes:
-                random.Random(num_prova).shuffle(prova_com_variantes)
+                derivar_rng(seed_mestre, 'ordem', num_prova).shuffle(prova_com_variantes)
             
             versoes_provas.append(prova_com_variantes)
         
         return versoes_provas
         
     except Exception as e:
-        print(f"Erro em gerar_prova_por_ids: {e}")
-        return []
\ No newline at end of file
+        eventos.emitir(ERRO, 'execucao', "Erro em gerar_prova_por_ids: %s", e)
+        return []
+    finally:
+        if servico:
+            servico.encerrar()
+        eventos.registro.finalizar_execucao()
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Modelo de custo da geração: tempos medidos por questão (pool e variante) e custo de
+iniciar um worker nesta máquina, guardados entre sessões. A partir deles prevê o tempo
+de parede da execução serial, do pool aquecido e de um pool de processos maior, e
+escolhe a opção mais barata, registrando o raciocínio.
+"""
+
+import heapq
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from . import eventos
+from .eventos import AVISO, DEBUG, INFO
+from .cache_pools import CACHE_DB_NAME
+
+# Média móvel: peso de cada nova medida
+_PESO_NOVA_MEDIDA = 0.5
+
+# Estimativas enquanto não há medidas (segundos)
+_CUSTO_INICIAL_POOL = 0.5
+_CUSTO_INICIAL_VARIANTE_COM_POOL = 0.02
+_CUSTO_INICIAL_VARIANTE_COM_CODIGO = 0.01
+_CUSTO_INICIAL_VARIANTE = 0.002
+_CUSTO_INICIAL_WORKER = 1.5  # interpretador + importações (spawn)
+
+# Orquestração por tarefa quando há várias threads despachando (fila, trocas de contexto)
+_CUSTO_DESPACHO_PARALELO = 0.0005
+
+# Chave do custo de iniciar um worker
+_ETAPA_WORKER = 'worker'
+
+
+class Previsao:
+    """Tempo de parede previsto para uma forma de executar"""
+
+    __slots__ = ("nome", "num_workers", "workers_novos", "segundos")
+
+    def __init__(self, nome, num_workers, workers_novos, segundos):
+        self.nome = nome
+        self.num_workers = num_workers
+        self.workers_novos = workers_novos
+        self.segundos = segundos
+
+    def descrever(self):
+        novos = f", {self.workers_novos} novo(s)" if self.workers_novos else ""
+        return f"{self.nome} ({self.num_workers} worker(s){novos}) ~{self.segundos:.2f}s"
+
+
+def _makespan(custos, num_workers):
+    """Tempo para `num_workers` executarem as tarefas na ordem dada (cada uma no primeiro worker livre)"""
+    if not custos:
+        return 0.0
+    if num_workers <= 1:
+        return float(sum(custos))
+    livres = [0.0] * min(num_workers, len(custos))
+    for custo in custos:
+        heapq.heapreplace(livres, livres[0] + custo)
+    return max(livres)
+
+
+class ModeloCusto:
+    """Custos medidos (média móvel por questão e etapa), persistidos ao lado do cache de pools"""
+
+    def __init__(self, caminho: str = CACHE_DB_NAME):
+        self.caminho = caminho
+        self.medidas = 0
+        self._custos = None        # (etapa, questao_id) -> segundos; carregado no primeiro uso
+        self._alterados = set()
+        self._trava = threading.Lock()
+
+    # --- Persistência ---
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS custos (
+                etapa TEXT NOT NULL,
+                questao_id TEXT NOT NULL,
+                segundos REAL NOT NULL,
+                atualizado REAL NOT NULL,
+                PRIMARY KEY (etapa, questao_id)
+            )
+        """)
+        return conn
+
+    def _carregar(self):
+        if self._custos is not None:
+            return self._custos
+        custos = {}
+        if os.path.exists(self.caminho):
+            conn = None
+            try:
+                conn = self._conectar()
+                for etapa, questao_id, segundos in conn.execute("SELECT etapa, questao_id, segundos FROM custos"):
+                    custos[(etapa, questao_id)] = segundos
+            except sqlite3.Error as e:
+                eventos.emitir(AVISO, 'custos', "   ⚠️  Custos medidos indisponíveis: %s", e)
+            finally:
+                if conn:
+                    conn.close()
+        self._custos = custos
+        return custos
+
+    def salvar(self):
+        """Grava as medidas novas desta execução"""
+        with self._trava:
+            if not self._alterados:
+                return
+            linhas = [(etapa, questao_id, self._custos[(etapa, questao_id)], time.time())
+                      for etapa, questao_id in self._alterados]
+            self._alterados = set()
+        conn = None
+        try:
+            conn = self._conectar()
+            conn.executemany("INSERT OR REPLACE INTO custos (etapa, questao_id, segundos, atualizado) "
+                             "VALUES (?, ?, ?, ?)", linhas)
+            conn.commit()
+        except sqlite3.Error as e:
+            eventos.emitir(AVISO, 'custos', "   ⚠️  Não foi possível gravar os custos medidos: %s", e)
+        finally:
+            if conn:
+                conn.close()
+
+    # --- Medidas ---
+
+    def registrar(self, etapa, questao_id, segundos):
+        """Nova medida (segundos de parede) de uma etapa da questão"""
+        chave = (etapa, str(questao_id))
+        with self._trava:
+            custos = self._carregar()
+            anterior = custos.get(chave)
+            custos[chave] = segundos if anterior is None else anterior + _PESO_NOVA_MEDIDA * (segundos - anterior)
+            self._alterados.add(chave)
+            self.medidas += 1
+
+    def registrar_inicio_worker(self, segundos):
+        self.registrar(_ETAPA_WORKER, '', segundos)
+
+    def medido(self, etapa, questao_id):
+        """Custo medido, ou None"""
+        with self._trava:
+            return self._carregar().get((etapa, str(questao_id)))
+
+    def custo(self, questao, etapa='variante'):
+        """Custo medido da questão na etapa ('variante' ou 'pool'), ou a estimativa inicial pelo tipo"""
+        from .core import _questao_usa_pool
+
+        medido = self.medido(etapa, questao.get('id'))
+        if medido is not None:
+            return medido
+        if etapa == 'pool':
+            return _CUSTO_INICIAL_POOL
+        if _questao_usa_pool(questao):
+            return _CUSTO_INICIAL_VARIANTE_COM_POOL
+        if questao.get("parametros"):
+            return _CUSTO_INICIAL_VARIANTE_COM_CODIGO
+        return _CUSTO_INICIAL_VARIANTE
+
+    def custo_inicio_worker(self):
+        medido = self.medido(_ETAPA_WORKER, '')
+        return _CUSTO_INICIAL_WORKER if medido is None else medido
+
+    # --- Previsão ---
+
+    def prever(self, custos_pools, custos_tarefas, num_workers, workers_vivos, num_cpus):
+        """
+        Tempo de parede previsto: início dos workers que faltam (em paralelo, limitado
+        pelos núcleos), estágio de pools e estágio de variantes, cada um distribuído
+        entre os workers na ordem de despacho
+        """
+        novos = max(0, num_workers - workers_vivos)
+        inicio = self.custo_inicio_worker() * math.ceil(novos / max(1, num_cpus)) if novos else 0.0
+        despacho = _CUSTO_DESPACHO_PARALELO * len(custos_tarefas) if num_workers > 1 else 0.0
+        return inicio + _makespan(custos_pools, num_workers) + _makespan(custos_tarefas, num_workers) + despacho
+
+    def planejar(self, custos_pools, custos_tarefas, workers_vivos, num_cpus):
+        """
+        Compara serial (1 worker), pool aquecido (só os workers já vivos) e pools de
+        processos maiores; devolve (escolhida, previsões) e registra o raciocínio
+        """
+        limite = max(1, min(num_cpus, len(custos_tarefas) or 1))
+
+        def previsao(nome, num_workers):
+            segundos = self.prever(custos_pools, custos_tarefas, num_workers, workers_vivos, num_cpus)
+            return Previsao(nome, num_workers, max(0, num_workers - workers_vivos), segundos)
+
+        previsoes = [previsao("serial", 1)]
+        aquecidos = min(workers_vivos, limite)
+        if aquecidos > 1:
+            previsoes.append(previsao("pool aquecido", aquecidos))
+        candidatas = [previsao("processos", n) for n in range(max(2, aquecidos + 1), limite + 1)]
+        if candidatas:
+            # Entre os pools maiores, o de menor previsão (empate: menos workers)
+            previsoes.append(min(candidatas, key=lambda p: (p.segundos, p.num_workers)))
+
+        escolhida = min(previsoes, key=lambda p: (p.segundos, p.num_workers))
+
+        if eventos.habilitado(DEBUG):
+            with self._trava:
+                medidas = sum(1 for etapa, _ in self._carregar() if etapa != _ETAPA_WORKER)
+            worker_medido = self.medido(_ETAPA_WORKER, '') is not None
+            eventos.emitir(DEBUG, 'custos', "   📐 Base: %d tarefa(s) ~%.2fs, %d pool(s) ~%.2fs, %d custo(s) medido(s), "
+                           "início de worker %.2fs (%s), %d worker(s) vivo(s), %d núcleo(s)",
+                           len(custos_tarefas), sum(custos_tarefas), len(custos_pools), sum(custos_pools), medidas,
+                           self.custo_inicio_worker(), "medido" if worker_medido else "estimado",
+                           workers_vivos, num_cpus)
+        eventos.emitir(INFO, 'custos', "📐 Previsões: %s → %s",
+                       " · ".join(p.descrever() for p in previsoes), escolhida.nome)
+        return escolhida, previsoes
+
+    def stats(self):
+        """Retorna estatísticas do modelo nesta sessão"""
+        with self._trava:
+            custos = self._carregar()
+            return {
+                'custos': len(custos),
+                'medidas': self.medidas,
+                'inicio_worker': custos.get((_ETAPA_WORKER, '')),
+            }
+
+
+# Instância global do modelo
+modelo_custos = ModeloCusto()
@@ -0,0 +1,205 @@
+"""
+Eventos estruturados da geração (nível, fase, questão e duração) no lugar de print().
+O console mostra os eventos a partir de um nível mínimo; durante uma execução, todos
+os eventos alimentam um resumo agregado, entregue a quem o assinar (ex.: LogDialog).
+Nos workers isolados os eventos ficam num buffer e seguem em lote com cada resultado.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+DEBUG, INFO, AVISO, ERRO = 10, 20, 30, 40
+NOMES_NIVEIS = {DEBUG: "debug", INFO: "info", AVISO: "aviso", ERRO: "erro"}
+
+# Nível que nunca é atingido: nada habilitado
+_DESLIGADO = 100
+
+# Quantas questões com problemas o resumo lista
+_MAX_PROBLEMAS_NO_RESUMO = 15
+
+
+class Evento:
+    """Um evento da geração; `mensagem` já vem formatada"""
+
+    __slots__ = ("nivel", "fase", "mensagem", "questao_id", "duracao")
+
+    def __init__(self, nivel, fase, mensagem, questao_id=None, duracao=None):
+        self.nivel = nivel
+        self.fase = fase
+        self.mensagem = mensagem
+        self.questao_id = questao_id
+        self.duracao = duracao
+
+
+class ResumoExecucao:
+    """Agregado de uma execução: eventos por nível, tempo por fase e questões com problemas"""
+
+    def __init__(self, nome=""):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.duracao = None
+        self.por_nivel = Counter()
+        self.fases = {}      # fase -> [ocorrências medidas, segundos]
+        self.problemas = {}  # questao_id -> primeira mensagem de aviso/erro
+
+    def registrar(self, evento):
+        self.por_nivel[evento.nivel] += 1
+        if evento.duracao is not None:
+            contagem = self.fases.setdefault(evento.fase, [0, 0.0])
+            contagem[0] += 1
+            contagem[1] += evento.duracao
+        if evento.nivel >= AVISO and evento.questao_id is not None:
+            self.problemas.setdefault(evento.questao_id, evento.mensagem)
+
+    def finalizar(self):
+        self.duracao = time.perf_counter() - self.inicio
+
+    def formatar(self):
+        """Texto do resumo para o log"""
+        duracao = self.duracao if self.duracao is not None else time.perf_counter() - self.inicio
+        linhas = [f"📊 Resumo {self.nome} ({duracao:.2f}s)".replace("  ", " ")]
+        if self.fases:
+            fases = " · ".join(f"{fase}: {n}× em {segundos:.2f}s"
+                               for fase, (n, segundos) in sorted(self.fases.items(), key=lambda item: -item[1][1]))
+            linhas.append(f"   ⏱️  {fases}")
+        linhas.append(f"   ⚠️  {self.por_nivel[AVISO]} aviso(s) · ❌ {self.por_nivel[ERRO]} erro(s)")
+        for questao_id, mensagem in list(self.problemas.items())[:_MAX_PROBLEMAS_NO_RESUMO]:
+            linhas.append(f"   • ID {questao_id}: {mensagem.strip()}")
+        if len(self.problemas) > _MAX_PROBLEMAS_NO_RESUMO:
+            linhas.append(f"   • ... e mais {len(self.problemas) - _MAX_PROBLEMAS_NO_RESUMO} questão(ões)")
+        return "\n".join(linhas)
+
+
+class RegistroEventos:
+    """Destino dos eventos do processo (console, resumo da execução e buffer do worker)"""
+
+    def __init__(self, nivel_console=INFO):
+        self.nivel_console = nivel_console
+        self.resumo = None
+        self._buffer = None
+        self._nivel_buffer = _DESLIGADO
+        self._assinantes_resumo = []
+        self._trava = threading.Lock()
+        self._atualizar_nivel_minimo()
+
+    def _atualizar_nivel_minimo(self):
+        # Com resumo ativo, até os eventos de depuração contam (tempos por fase)
+        niveis = [self._nivel_buffer if self._buffer is not None else self.nivel_console]
+        if self.resumo is not None:
+            niveis.append(DEBUG)
+        self._nivel_minimo = min(niveis)
+
+    @property
+    def nivel_minimo(self):
+        """Menor nível que ainda é usado (console, resumo ou buffer)"""
+        return self._nivel_minimo
+
+    def habilitado(self, nivel):
+        """Verificação barata, para evitar montar mensagens caras à toa"""
+        return nivel >= self._nivel_minimo
+
+    def emitir(self, nivel, fase, mensagem, *args, questao_id=None, duracao=None):
+        """Registra um evento; `args` formatam a mensagem (estilo %) só se ele for usado"""
+        if nivel < self._nivel_minimo:
+            return
+        if args:
+            mensagem = mensagem % args
+        self.registrar(Evento(nivel, fase, mensagem, questao_id, duracao))
+
+    def registrar(self, evento):
+        with self._trava:
+            if self._buffer is not None:
+                if evento.nivel >= self._nivel_buffer:
+                    self._buffer.append(evento)
+                return
+            if self.resumo is not None:
+                self.resumo.registrar(evento)
+        if evento.nivel >= self.nivel_console:
+            print(evento.mensagem)
+
+    def reemitir(self, eventos):
+        """Eventos vindos de um worker entram aqui como se tivessem sido emitidos agora"""
+        for evento in eventos or ():
+            if evento.nivel >= self._nivel_minimo:
+                self.registrar(evento)
+
+    # --- Buffer (processos worker) ---
+
+    def iniciar_buffer(self, nivel=DEBUG):
+        """A partir daqui os eventos são guardados (não impressos) até serem coletados"""
+        with self._trava:
+            self._buffer = []
+            self._nivel_buffer = nivel
+            self._atualizar_nivel_minimo()
+
+    def coletar(self):
+        """Eventos guardados desde a última coleta (lote enviado ao processo principal)"""
+        with self._trava:
+            if self._buffer is None:
+                return []
+            lote, self._buffer = self._buffer, []
+        return lote
+
+    # --- Execuções e resumo ---
+
+    def iniciar_execucao(self, nome=""):
+        with self._trava:
+            self.resumo = ResumoExecucao(nome)
+            self._atualizar_nivel_minimo()
+
+    def finalizar_execucao(self):
+        """Encerra o resumo da execução atual e o entrega aos assinantes"""
+        with self._trava:
+            resumo, self.resumo = self.resumo, None
+            self._atualizar_nivel_minimo()
+            assinantes = list(self._assinantes_resumo)
+        if resumo is None:
+            return None
+        resumo.finalizar()
+        for callback in assinantes:
+            try:
+                callback(resumo)
+            except Exception as e:
+                print(f"⚠️  Falha ao entregar o resumo da execução: {e}")
+        return resumo
+
+    def assinar_resumo(self, callback):
+        with self._trava:
+            self._assinantes_resumo.append(callback)
+
+    def cancelar_assinatura_resumo(self, callback):
+        with self._trava:
+            if callback in self._assinantes_resumo:
+                self._assinantes_resumo.remove(callback)
+
+    def configurar(self, nivel_console):
+        with self._trava:
+            self.nivel_console = nivel_console
+            self._atualizar_nivel_minimo()
+
+
+# Instância global do processo
+registro = RegistroEventos()
+
+
+def emitir(nivel, fase, mensagem, *args, questao_id=None, duracao=None):
+    registro.emitir(nivel, fase, mensagem, *args, questao_id=questao_id, duracao=duracao)
+
+
+def habilitado(nivel):
+    return registro.habilitado(nivel)
+
+
+@contextmanager
+def medir(fase, questao_id=None, nivel=DEBUG, mensagem=None):
+    """Mede o bloco e emite um evento com a duração (entra no tempo por fase do resumo)"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if registro.habilitado(nivel):
+            duracao = time.perf_counter() - inicio
+            texto = mensagem or f"   ⏱️  {fase}" + (f" - Questão {questao_id}" if questao_id is not None else "")
+            registro.emitir(nivel, fase, f"{texto} ({duracao:.3f}s)", questao_id=questao_id, duracao=duracao)
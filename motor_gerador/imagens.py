@@ -0,0 +1,147 @@
+"""
+Registro de imagens da execução: cada imagem distinta é verificada UMA vez (existência,
+formato e dimensões em pixels, lidos do cabeçalho) e as questões de todas as versões
+recebem o resultado, sem novas consultas ao sistema de arquivos. O registro (com trava)
+fica no motor; as questões levam só uma cópia em dicionário simples (serializável).
+"""
+
+import os
+import struct
+import threading
+
+from . import eventos
+from .eventos import AVISO
+
+# Bytes lidos do início do arquivo; os marcadores SOF de um JPEG podem vir depois de EXIF/ICC grandes
+_TAMANHO_CABECALHO = 64 * 1024
+
+
+class InfoImagem:
+    """Resultado da verificação de uma imagem (largura/altura/formato None se não reconhecidos)"""
+
+    __slots__ = ("caminho", "existe", "tamanho_bytes", "formato", "largura", "altura")
+
+    def __init__(self, caminho, existe=False, tamanho_bytes=0, formato=None, largura=None, altura=None):
+        self.caminho = caminho
+        self.existe = existe
+        self.tamanho_bytes = tamanho_bytes
+        self.formato = formato
+        self.largura = largura
+        self.altura = altura
+
+    @property
+    def proporcao(self):
+        """Altura / largura, ou None sem dimensões"""
+        if not self.largura or not self.altura:
+            return None
+        return self.altura / self.largura
+
+    def como_dict(self):
+        """Cópia em dicionário simples, para o payload das versões (pickle/deepcopy)"""
+        dados = {nome: getattr(self, nome) for nome in self.__slots__}
+        dados["proporcao"] = self.proporcao
+        return dados
+
+
+def _dimensoes_jpeg(dados):
+    posicao = 2
+    while posicao + 9 <= len(dados):
+        if dados[posicao] != 0xFF:
+            return None
+        marcador = dados[posicao + 1]
+        if marcador == 0xFF:
+            posicao += 1
+            continue
+        if marcador in (0xD8, 0x01) or 0xD0 <= marcador <= 0xD7:
+            posicao += 2
+            continue
+        comprimento = struct.unpack(">H", dados[posicao + 2:posicao + 4])[0]
+        # SOF0..SOF15, exceto DHT (C4), JPG (C8) e DAC (CC)
+        if 0xC0 <= marcador <= 0xCF and marcador not in (0xC4, 0xC8, 0xCC):
+            altura, largura = struct.unpack(">HH", dados[posicao + 5:posicao + 9])
+            return largura, altura
+        posicao += 2 + comprimento
+    return None
+
+
+def _ler_cabecalho(dados):
+    """(formato, largura, altura) a partir dos primeiros bytes do arquivo"""
+    if dados[:8] == b"\x89PNG\r\n\x1a\n" and len(dados) >= 24:
+        largura, altura = struct.unpack(">II", dados[16:24])
+        return "png", largura, altura
+    if dados[:6] in (b"GIF87a", b"GIF89a") and len(dados) >= 10:
+        largura, altura = struct.unpack("<HH", dados[6:10])
+        return "gif", largura, altura
+    if dados[:2] == b"BM" and len(dados) >= 26:
+        largura, altura = struct.unpack("<ii", dados[18:26])
+        return "bmp", largura, abs(altura)
+    if dados[:2] == b"\xff\xd8":
+        dimensoes = _dimensoes_jpeg(dados)
+        return ("jpeg", *dimensoes) if dimensoes else ("jpeg", None, None)
+    return None, None, None
+
+
+def inspecionar_imagem(caminho):
+    """Verifica a imagem no disco: um stat e uma leitura do cabeçalho"""
+    try:
+        tamanho = os.stat(caminho).st_size
+    except OSError:
+        return InfoImagem(caminho)
+
+    formato = largura = altura = None
+    try:
+        with open(caminho, "rb") as arquivo:
+            formato, largura, altura = _ler_cabecalho(arquivo.read(_TAMANHO_CABECALHO))
+    except (OSError, struct.error):
+        pass
+    if formato is None:
+        # Formato não reconhecido pelo cabeçalho: a extensão serve de referência
+        formato = os.path.splitext(caminho)[1].lstrip(".").lower() or None
+    return InfoImagem(caminho, True, tamanho, formato, largura, altura)
+
+
+class RegistroImagens:
+    """Imagens de uma execução (seguro entre threads), indexadas pelo caminho normalizado"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entradas = {}
+        self._trava = threading.Lock()
+
+    def resolver(self, caminho, questao_id=None):
+        """InfoImagem do caminho (verificado só na primeira vez); None se não houver caminho"""
+        if not caminho:
+            return None
+        chave = caminho.replace('\\', '/')
+        with self._trava:
+            info = self._entradas.get(chave)
+            if info is not None:
+                self.hits += 1
+                return info
+            self.misses += 1
+            info = inspecionar_imagem(chave)
+            self._entradas[chave] = info
+
+        # Avisado uma vez por imagem, não a cada variante que a usa
+        if not info.existe:
+            eventos.emitir(AVISO, 'imagem', "⚠️ AVISO: Imagem não encontrada - %s", chave, questao_id=questao_id)
+        return info
+
+    def __getitem__(self, chave):
+        return self._entradas[chave]
+
+    def __contains__(self, chave):
+        return chave in self._entradas
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def stats(self):
+        """Retorna estatísticas de uso do registro nesta execução"""
+        return {
+            'imagens': len(self._entradas),
+            'ausentes': sum(1 for info in self._entradas.values() if not info.existe),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
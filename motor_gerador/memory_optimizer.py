@@ -4,105 +4,610 @@ Otimização de memória e processamento combinatorial para questões complexas
 
 import random
 import ast
+import math
 from itertools import product
-from typing import Dict, List, Set, Any, Tuple
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Any, Optional, Tuple
 import hashlib
+import multiprocessing
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import eventos
+from .eventos import AVISO, DEBUG, ERRO
+from .seeds import derivar_rng
+# `np` é um proxy preguiçoso: o numpy só é importado quando um caminho vetorizado o usa
+from .utils import _camada_com_variaveis, _preimportar_bibliotecas, bibliotecas_referenciadas, np
+
+
+
+# Nós AST aceitos pelo caminho vetorizado (aritmética pura sobre as variáveis)
+_NOS_VETORIZAVEIS = (
+    ast.Module, ast.Assign, ast.Name, ast.Load, ast.Store, ast.Constant,
+    ast.BinOp, ast.UnaryOp, ast.Call, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+)
+
+# Funções/constantes de `math` e seus equivalentes vetoriais em NumPy
+_MATH_PARA_NUMPY = {
+    'sqrt': 'sqrt', 'exp': 'exp', 'log10': 'log10', 'log2': 'log2', 'fabs': 'fabs',
+    'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'asin': 'arcsin', 'acos': 'arccos',
+    'atan': 'arctan', 'atan2': 'arctan2', 'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh',
+    'radians': 'radians', 'degrees': 'degrees', 'hypot': 'hypot', 'pow': 'power',
+    'floor': 'floor', 'ceil': 'ceil', 'pi': 'pi', 'e': 'e',
+}
+
+# Atributos de `np` aceitos diretamente
+_NUMPY_PERMITIDOS = set(_MATH_PARA_NUMPY.values()) | {
+    'log', 'abs', 'absolute', 'arcsin', 'arccos', 'arctan', 'arctan2',
+    'deg2rad', 'rad2deg', 'round', 'power',
+}
+
+_BUILTINS_VETORIZAVEIS = {'abs', 'round'}
+
+
+def _decode_index(index: int, value_lists: List[List]) -> Tuple:
+    """Converte um índice do produto cartesiano (base mista) na combinação correspondente"""
+    combination = []
+    for values in reversed(value_lists):
+        index, digit = divmod(index, len(values))
+        combination.append(values[digit])
+    return tuple(reversed(combination))
+
+
+def _diverse_order(total: int, rng: random.Random) -> Iterator[int]:
+    """
+    Percorre todos os índices de [0, total) numa permutação que espalha os primeiros
+    índices pelo espaço inteiro (passo próximo da razão áurea, início sorteado)
+    """
+    if total <= 0:
+        return
+    step = max(1, round(total * 0.6180339887498949))
+    while math.gcd(step, total) != 1:
+        step += 1
+    index = rng.randrange(total)
+    for _ in range(total):
+        yield index
+        index = (index + step) % total
+
+
+def _sample_without_replacement(total: int, rng: random.Random, shuffle_limit: int = 4096) -> Iterator[int]:
+    """Índices distintos de [0, total) em ordem aleatória, sob demanda (sem reposição)"""
+    if total <= shuffle_limit:
+        indices = list(range(total))
+        rng.shuffle(indices)
+        yield from indices
+        return
+    used = set()
+    while len(used) < total:
+        index = rng.randrange(total)
+        if index not in used:
+            used.add(index)
+            yield index
+
+
+def _stratified_indices(total: int, count: int, rng: random.Random) -> Iterator[int]:
+    """Sorteia `count` índices distintos em [0, total), um por estrato de mesmo tamanho"""
+    count = min(count, total)
+    for stratum in range(count):
+        start = stratum * total // count
+        end = (stratum + 1) * total // count
+        yield rng.randrange(start, end)
+
+
+# Nomes que um domínio pode usar sem depender do contexto da questão
+_NOMES_DOMINIO_CONSTANTE = {'range', 'list', 'tuple', 'sorted', 'round', 'abs', 'min', 'max', 'float', 'int', 'math', 'np'}
+
+
+def _calculo_vetorizavel(calculation_tree: ast.Module) -> bool:
+    """Verifica se o cálculo é aritmética pura (nós com equivalente vetorial em NumPy)"""
+    targets = set()
+    for stmt in calculation_tree.body:
+        if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1 or not isinstance(stmt.targets[0], ast.Name):
+            return False
+        targets.add(stmt.targets[0].id)
+
+    # `resposta_valor or resposta` não tem equivalente vetorial quando ambas existem
+    if ('resposta_valor' in targets) == ('resposta' in targets):
+        return False
+
+    for node in ast.walk(calculation_tree):
+        if not isinstance(node, _NOS_VETORIZAVEIS):
+            return False
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+            return False
+        if isinstance(node, ast.Attribute):
+            if not isinstance(node.value, ast.Name):
+                return False
+            if node.value.id == 'math' and node.attr not in _MATH_PARA_NUMPY:
+                return False
+            if node.value.id == 'np' and node.attr not in _NUMPY_PERMITIDOS:
+                return False
+            if node.value.id not in ('math', 'np'):
+                return False
+        if isinstance(node, ast.Call):
+            if node.keywords:
+                return False
+            func = node.func
+            if isinstance(func, ast.Name):
+                if func.id not in _BUILTINS_VETORIZAVEIS:
+                    return False
+            elif not isinstance(func, ast.Attribute):
+                return False
+            # math.log(x, base) não tem a mesma assinatura de np.log
+            if isinstance(func, ast.Attribute) and func.attr == 'log' and len(node.args) != 1:
+                return False
+    return True
+
+
+def _dominio_constante(expr: ast.expr) -> bool:
+    """True se a expressão do domínio só usa literais, builtins simples, `math`/`np` e variáveis de compreensão"""
+    nomes_locais = {
+        alvo.id
+        for gen in ast.walk(expr) if isinstance(gen, ast.comprehension)
+        for alvo in ast.walk(gen.target) if isinstance(alvo, ast.Name)
+    }
+    for node in ast.walk(expr):
+        if isinstance(node, ast.Name) and node.id not in _NOMES_DOMINIO_CONSTANTE and node.id not in nomes_locais:
+            return False
+        if isinstance(node, (ast.NamedExpr, ast.Lambda, ast.Await, ast.Yield, ast.YieldFrom)):
+            return False
+    return True
+
+
+def _dependencias_calculo(statements: List[ast.stmt], choice_names: Tuple[str, ...]) -> List[SimpleNamespace]:
+    """
+    Nomes lidos/escritos por cada comando do cálculo, para a recomputação fatiada.
+    Só aceita cálculos em linha reta, com atribuições simples e cada nome atribuído
+    uma única vez (sem releitura de nomes redefinidos depois); caso contrário, None.
+    """
+    dependencias = []
+    escritos = set()
+    for stmt in statements:
+        if not isinstance(stmt, ast.Assign):
+            return None
+        writes = set()
+        for target in stmt.targets:
+            nomes = target.elts if isinstance(target, (ast.Tuple, ast.List)) else [target]
+            for nome in nomes:
+                if not isinstance(nome, ast.Name):
+                    return None
+                writes.add(nome.id)
+        if any(isinstance(node, ast.NamedExpr) for node in ast.walk(stmt.value)):
+            return None
+        reads = {node.id for node in ast.walk(stmt.value) if isinstance(node, ast.Name)}
+        if writes & escritos or writes & set(choice_names) or writes & reads:
+            return None
+        escritos |= writes
+        dependencias.append(SimpleNamespace(node=stmt, reads=reads, writes=writes))
+
+    # Um nome lido antes de ser redefinido teria valores diferentes entre iterações
+    lidos = set()
+    for dep in dependencias:
+        if dep.writes & lidos:
+            return None
+        lidos |= dep.reads
+    return dependencias
+
+
+def _analisar_script(params_code: str) -> SimpleNamespace:
+    """
+    Análise estática do script de parâmetros: variáveis de random.choice, fonte dos
+    domínios e corpo do cálculo já compilado. `constant_domains` guarda os domínios
+    que não dependem do contexto (None se algum precisar do script executado).
+    """
+    tree = ast.parse(params_code)
+    choice_assignments = []
+    other_nodes = []
+
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and
+            isinstance(node.value, ast.Call) and
+            isinstance(node.value.func, ast.Attribute) and
+            isinstance(node.value.func.value, ast.Name) and
+            node.value.func.value.id == 'random' and
+            node.value.func.attr == 'choice'):
+            choice_assignments.append(node)
+        else:
+            other_nodes.append(node)
+
+    analysis = SimpleNamespace(
+        choice_names=(), domain_sources=(), domain_codes=(), constant_domains=None,
+        calculation_source="", calculation_tree=None, calculation_code=None, vectorizable=False,
+        dependencies=None, slice_plans={},
+    )
+    if not choice_assignments:
+        return analysis
+
+    domain_exprs = [assign_node.value.args[0] for assign_node in choice_assignments]
+    analysis.choice_names = tuple(assign_node.targets[0].id for assign_node in choice_assignments)
+    analysis.domain_sources = tuple(ast.unparse(expr) for expr in domain_exprs)
+    analysis.domain_codes = tuple(compile(src, '<dominio>', 'eval') for src in analysis.domain_sources)
+
+    if all(_dominio_constante(expr) for expr in domain_exprs):
+        contexto = {'math': math, 'np': np}
+        try:
+            analysis.constant_domains = tuple(eval(code, dict(contexto)) for code in analysis.domain_codes)
+        except Exception:
+            analysis.constant_domains = None
+
+    # Prepara o código de cálculo (parte sem random.choice)
+    analysis.calculation_tree = ast.Module(body=other_nodes, type_ignores=[])
+    analysis.calculation_source = ast.unparse(analysis.calculation_tree)
+    analysis.calculation_code = compile(analysis.calculation_source, '<calculo_questao>', 'exec')
+    analysis.vectorizable = _calculo_vetorizavel(analysis.calculation_tree)
+    analysis.dependencies = _dependencias_calculo(other_nodes, analysis.choice_names)
+    return analysis
+
+
+class AnalysisCache:
+    """Cache LRU (em memória) das análises AST, indexado pelo hash do texto de `parametros`"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, params_code: str) -> SimpleNamespace:
+        chave = hashlib.sha256(params_code.encode('utf-8')).hexdigest()
+        analysis = self._entries.get(chave)
+        if analysis is not None:
+            self._entries.move_to_end(chave)
+            self.hits += 1
+            return analysis
+
+        self.misses += 1
+        analysis = _analisar_script(params_code)
+        self._entries[chave] = analysis
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return analysis
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache nesta sessão"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{hit_rate:.1f}%",
+        }
+
+
+# Instância global do cache de análises
+analysis_cache = AnalysisCache()
+
 
 class CombinatorialEngine:
     """Motor otimizado para questões com alto número de combinações - FOCADO EM ELETROTÉCNICA"""
     
-    def __init__(self, max_combinations: int = 20000, max_sample: int = 1000):
+    def __init__(self, max_combinations: int = 20000, max_sample: int = 1000,
+                 max_vectorized_combinations: int = 1_000_000, max_sliced_combinations: int = 1_000_000):
         self.max_combinations = max_combinations
         self.max_sample = max_sample
+        self.max_vectorized_combinations = max_vectorized_combinations
+        self.max_sliced_combinations = max_sliced_combinations
         
-    def generate_smart_pool(self, questao_base: Dict, params_code: str, base_context: Dict) -> Set:
+    def generate_smart_pool(self, questao_base: Dict, params_code: str, base_context: Dict,
+                            rng: random.Random = None) -> Set:
         """
-        Gera pool inteligente com amostragem estratégica para questões de eletrotécnica
+        Gera pool inteligente com amostragem estratégica para questões de eletrotécnica.
+        As amostragens usam `rng` (por padrão, derivado do próprio código: mesmo pool sempre)
         """
         q_id = questao_base.get('id', 'N/A')
+        rng = rng or derivar_rng('pool', params_code)
         
         try:
             # Análise AST do código para identificar variáveis
-            choice_vars, calculation_source = self._analyze_parameters(params_code, base_context)
+            choice_vars, analysis = self._analyze_parameters(params_code, base_context)
             if not choice_vars:
                 return None
                 
-            print(f"🔍 Engine Combinatória - Questão ID {q_id}")
-            print(f"   Variáveis encontradas: {list(choice_vars.keys())}")
-            print(f"   Tamanhos dos domínios: {[len(v) for v in choice_vars.values()]}")
-            
             # Calcula total de combinações possíveis
             total_possible = 1
             for values in choice_vars.values():
                 total_possible *= len(values)
-            print(f"   Combinações totais possíveis: {total_possible:,}")
+
+            if eventos.habilitado(DEBUG):
+                eventos.emitir(DEBUG, 'pool', "🔍 Engine Combinatória - Questão ID %s\n"
+                               "   Variáveis encontradas: %s\n   Tamanhos dos domínios: %s\n"
+                               "   Combinações totais possíveis: %s",
+                               q_id, list(choice_vars), [len(v) for v in choice_vars.values()],
+                               f"{total_possible:,}", questao_id=q_id)
+
+            # Caminho rápido: avalia o produto cartesiano inteiro de uma vez com NumPy
+            if total_possible <= self.max_vectorized_combinations:
+                results = self._vectorized_evaluation(choice_vars, analysis, base_context, questao_base)
+                if results is not None:
+                    eventos.emitir(DEBUG, 'pool', "   ⚡ Avaliação vetorizada (NumPy) de %s combinações: "
+                                   "%d resultados únicos", f"{total_possible:,}", len(results), questao_id=q_id)
+                    return results
+
+            # Enumeração exaustiva fatiada: cada comando só é refeito quando muda uma variável da qual depende
+            plan = self._build_slice_plan(choice_vars, analysis)
+            if plan is not None and self._slice_plan_fits(plan, total_possible):
+                results = self._sliced_evaluation(plan, base_context, questao_base)
+                eventos.emitir(DEBUG, 'pool', "   🧩 Enumeração fatiada: %d comandos, custo %s (ingênuo: %s), "
+                               "%s combinações processadas: %d resultados únicos",
+                               plan.num_statements, f"{plan.cost:,}", f"{total_possible * plan.num_statements:,}",
+                               f"{plan.combinations:,}", len(results), questao_id=q_id)
+                return results
             
             # Seleciona estratégia baseada nas características
             sampling_strategy = self._select_sampling_strategy(choice_vars, total_possible)
-            print(f"   Estratégia selecionada: {sampling_strategy.__name__}")
-            
-            # Gera combinações usando a estratégia selecionada
-            combinations = sampling_strategy(choice_vars, base_context, total_possible)
-            print(f"   Combinações a processar: {len(combinations):,}")
+
+            # Gera combinações sob demanda usando a estratégia selecionada
+            combinations = sampling_strategy(choice_vars, base_context, total_possible, rng)
             
             # Processa as combinações e coleta resultados únicos
             results = self._process_combinations(
-                combinations, choice_vars, calculation_source, base_context, questao_base
+                combinations, choice_vars, analysis.calculation_code, base_context, questao_base
             )
             
-            print(f"   ✅ Resultados únicos gerados: {len(results)}")
+            eventos.emitir(DEBUG, 'pool', "   🎯 Amostragem (%s): %d resultados únicos",
+                           sampling_strategy.__name__, len(results), questao_id=q_id)
             return results
             
+        except MemoryError:
+            # Estouro de memória não é erro do motor: quem executa a questão decide (worker reciclado)
+            raise
         except Exception as e:
-            print(f"   ❌ Erro no motor combinatório: {e}")
             import traceback
-            traceback.print_exc()
+            eventos.emitir(ERRO, 'pool', "   ❌ Erro no motor combinatório (questão %s): %s\n%s",
+                           q_id, e, traceback.format_exc().rstrip(), questao_id=q_id)
             return None
     
-    def _analyze_parameters(self, params_code: str, base_context: Dict) -> Tuple[Dict, str]:
-        """Analisa o código Python e extrai variáveis de random.choice"""
+    def _analyze_parameters(self, params_code: str, base_context: Dict) -> Tuple[Dict, SimpleNamespace]:
+        """Analisa o código Python (com cache) e extrai variáveis de random.choice"""
         try:
-            tree = ast.parse(params_code)
-            choice_assignments = []
-            other_nodes = []
-            
-            for node in tree.body:
-                if (isinstance(node, ast.Assign) and 
-                    isinstance(node.value, ast.Call) and
-                    isinstance(node.value.func, ast.Attribute) and 
-                    isinstance(node.value.func.value, ast.Name) and
-                    node.value.func.value.id == 'random' and 
-                    node.value.func.attr == 'choice'):
-                    choice_assignments.append(node)
-                else:
-                    other_nodes.append(node)
-            
-            if not choice_assignments:
-                return None, ""
-            
-            # Executa o código original para obter os valores reais
-            temp_context = base_context.copy()
-            temp_context['random'] = random
-            exec(params_code, temp_context)
-            
-            # Extrai as listas de valores para cada variável
-            choice_vars = {}
-            for assign_node in choice_assignments:
-                var_name = assign_node.targets[0].id
-                arg_as_string = ast.unparse(assign_node.value.args[0])
-                values = eval(arg_as_string, temp_context)
-                choice_vars[var_name] = values
-            
-            # Prepara o código de cálculo (parte sem random.choice)
-            calculation_tree = ast.Module(body=other_nodes, type_ignores=[])
-            calculation_source = ast.unparse(calculation_tree)
-            
-            return choice_vars, calculation_source
-            
+            analysis = analysis_cache.get(params_code)
+            if not analysis.choice_names:
+                return None, None
+
+            # Domínios constantes vêm prontos; os demais dependem do script executado
+            if analysis.constant_domains is not None:
+                domains = analysis.constant_domains
+            else:
+                temp_context = base_context.copy()
+                temp_context['random'] = derivar_rng('dominios', params_code)
+                exec(params_code, temp_context)
+                domains = [eval(code, temp_context) for code in analysis.domain_codes]
+
+            return dict(zip(analysis.choice_names, domains)), analysis
+
+        except MemoryError:
+            raise
         except Exception as e:
-            print(f"   ❌ Erro na análise AST: {e}")
-            return None, ""
-    
+            eventos.emitir(AVISO, 'analise', "   ❌ Erro na análise AST: %s", e)
+            return None, None
+
+    def _vectorized_values(self, choice_vars: Dict, analysis: SimpleNamespace,
+                           base_context: Dict, full_shape: bool = False):
+        """
+        Avalia todas as combinações em uma única passada com arrays NumPy e devolve
+        os resultados brutos (sem filtros). Com `full_shape`, o array tem exatamente uma
+        posição por combinação, na ordem de itertools.product.
+        Retorna None quando o cálculo não é elegível (o chamador usa o caminho escalar).
+        """
+        if np is None or not analysis.vectorizable:
+            return None
+        for values in choice_vars.values():
+            if not values or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                return None
+
+        # `math` é substituído por equivalentes vetoriais; cada domínio ocupa um eixo
+        vector_context = base_context.copy()
+        vector_context['np'] = np
+        vector_context['math'] = SimpleNamespace(**{nome: getattr(np, nome_np) for nome, nome_np in _MATH_PARA_NUMPY.items()})
+        num_vars = len(choice_vars)
+        for axis, (var_name, values) in enumerate(choice_vars.items()):
+            shape = [1] * num_vars
+            shape[axis] = len(values)
+            vector_context[var_name] = np.asarray(values, dtype=float).reshape(shape)
+
+        try:
+            with np.errstate(all='ignore'):
+                exec(analysis.calculation_code, vector_context)
+            result = np.asarray(vector_context.get('resposta_valor', vector_context.get('resposta')), dtype=float)
+            if full_shape:
+                result = np.broadcast_to(result, tuple(len(v) for v in choice_vars.values()))
+            return result.ravel()
+        except Exception:
+            return None
+
+    def _vectorized_evaluation(self, choice_vars: Dict, analysis: SimpleNamespace,
+                               base_context: Dict, questao_base: Dict) -> Set:
+        """Pool completo pelo caminho vetorizado (None se o cálculo não for elegível)"""
+        values = self._vectorized_values(choice_vars, analysis, base_context)
+        if values is None:
+            return None
+
+        # Mesmos filtros de _is_valid_result: finitos, não nulos e (opcionalmente) não negativos
+        mask = np.isfinite(values) & (np.abs(values) >= 1e-15)
+        if not questao_base.get("permitir_negativos", False):
+            mask &= values >= 0
+        return set(np.unique(values[mask]).tolist())
+
+    def generate_goal_pool(self, questao_base: Dict, params_code: str, base_context: Dict,
+                           num_texts: int, formatter: Callable, exclude: Iterable[str] = (),
+                           rng: random.Random = None) -> Optional[Tuple[List[str], bool]]:
+        """
+        Pool orientado a objetivo (Modo 2): avalia combinações numa ordem que preserva
+        a diversidade e PARA assim que obtém `num_texts` textos formatados distintos,
+        válidos pelos filtros de sinal/zero e fora de `exclude`.
+        Retorna (textos, esgotado), ou None se a questão não for combinatória. A lista
+        pode ser menor que `num_texts`; `esgotado` diz se todas as combinações foram
+        avaliadas (senão o limite de avaliações cortou a busca, que começa num ponto sorteado).
+        """
+        q_id = questao_base.get('id', 'N/A')
+        permitir_negativos = questao_base.get("permitir_negativos", False)
+        rng = rng or derivar_rng('objetivo', params_code)
+
+        try:
+            choice_vars, analysis = self._analyze_parameters(params_code, base_context)
+            if not choice_vars:
+                return None
+
+            value_lists = list(choice_vars.values())
+            var_names = list(choice_vars.keys())
+            total_possible = 1
+            for values in value_lists:
+                total_possible *= len(values)
+
+            # Todos os valores de uma vez (NumPy) ou avaliação escalar sob demanda
+            values = None
+            if total_possible <= self.max_vectorized_combinations:
+                values = self._vectorized_values(choice_vars, analysis, base_context, full_shape=True)
+
+            if values is not None:
+                def evaluate(index):
+                    return float(values[index])
+                max_evaluations = total_possible
+            else:
+                calculation_code = analysis.calculation_code
+                camada = _camada_com_variaveis(base_context)
+
+                def evaluate(index):
+                    exec_context = {'__builtins__': camada}
+                    exec_context.update(zip(var_names, _decode_index(index, value_lists)))
+                    exec(calculation_code, exec_context)
+                    return exec_context.get('resposta_valor') or exec_context.get('resposta')
+                max_evaluations = min(total_possible, self.max_combinations)
+
+            excluded = set(exclude)
+            texts = []
+            seen = set()
+            evaluations = 0
+            for index in _diverse_order(total_possible, rng):
+                if len(texts) >= num_texts or evaluations >= max_evaluations:
+                    break
+                evaluations += 1
+                try:
+                    result = evaluate(index)
+                except Exception:
+                    continue
+                if not isinstance(result, (int, float)) or (isinstance(result, float) and not math.isfinite(result)):
+                    continue
+                if not self._is_valid_result(result, permitir_negativos):
+                    continue
+                text = formatter(result)
+                if text in excluded or text in seen:
+                    continue
+                seen.add(text)
+                texts.append(text)
+
+            eventos.emitir(DEBUG, 'pool', "🎯 Pool por objetivo - Questão ID %s: %d/%d textos em %s de %s combinações",
+                           q_id, len(texts), num_texts, f"{evaluations:,}", f"{total_possible:,}", questao_id=q_id)
+            return texts, evaluations >= total_possible
+
+        except MemoryError:
+            raise
+        except Exception as e:
+            eventos.emitir(ERRO, 'pool', "   ❌ Erro no motor combinatório (pool por objetivo, questão %s): %s",
+                           q_id, e, questao_id=q_id)
+            return None
+
+    def _build_slice_plan(self, choice_vars: Dict, analysis: SimpleNamespace) -> SimpleNamespace:
+        """
+        Plano de laços aninhados a partir do grafo comando→variável: as variáveis de que
+        mais comandos dependem ficam nos laços externos e cada comando é executado no
+        laço mais interno do qual depende (invariantes são içados). None se não aplicável.
+        """
+        dependencies = analysis.dependencies
+        if not dependencies:
+            return None
+
+        # Variáveis de random.choice das quais cada comando depende (transitivamente)
+        origem = {}
+        stmt_vars = []
+        for dep in dependencies:
+            depende = {nome for nome in dep.reads if nome in choice_vars}
+            for nome in dep.reads:
+                depende |= origem.get(nome, set())
+            for nome in dep.writes:
+                origem[nome] = depende
+            stmt_vars.append(depende)
+
+        # Variáveis sem dependentes não precisam de laço (o resultado não muda com elas)
+        dependentes = {nome: sum(1 for depende in stmt_vars if nome in depende) for nome in choice_vars}
+        order = sorted((nome for nome in choice_vars if dependentes[nome]),
+                       key=lambda nome: (-dependentes[nome], len(choice_vars[nome])))
+        if not order:
+            return None
+
+        key = tuple(order)
+        plan = analysis.slice_plans.get(key)
+        if plan is None:
+            posicao = {nome: i for i, nome in enumerate(order)}
+            niveis = [[] for _ in range(len(order) + 1)]
+            for dep, depende in zip(dependencies, stmt_vars):
+                nivel = max((posicao[nome] + 1 for nome in depende), default=0)
+                niveis[nivel].append(dep.node)
+            plan = SimpleNamespace(
+                order=order,
+                level_sizes=[len(nivel) for nivel in niveis],
+                level_codes=[compile(ast.Module(body=nivel, type_ignores=[]), f'<calculo_nivel_{i}>', 'exec') if nivel else None
+                             for i, nivel in enumerate(niveis)],
+                num_statements=len(dependencies),
+            )
+            analysis.slice_plans[key] = plan
+
+        # Custo em execuções de comando: cada nível roda uma vez por prefixo do produto
+        domains = [choice_vars[nome] for nome in plan.order]
+        cost = plan.level_sizes[0]
+        prefix = 1
+        for size, values in zip(plan.level_sizes[1:], domains):
+            prefix *= len(values)
+            cost += size * prefix
+        return SimpleNamespace(order=plan.order, domains=domains, level_codes=plan.level_codes,
+                               num_statements=plan.num_statements, combinations=prefix, cost=cost + prefix)
+
+    def _slice_plan_fits(self, plan: SimpleNamespace, total_possible: int) -> bool:
+        """A enumeração fatiada é usada se couber no mesmo orçamento da exaustiva ingênua"""
+        if total_possible > self.max_sliced_combinations:
+            return False
+        return plan.cost <= self.max_combinations * (plan.num_statements + 1)
+
+    def _sliced_evaluation(self, plan: SimpleNamespace, base_context: Dict, questao_base: Dict) -> Set:
+        """Percorre o produto em laços aninhados, reexecutando só os comandos afetados"""
+        possible_outcomes = set()
+        permitir_negativos = questao_base.get("permitir_negativos", False)
+        order, domains, level_codes = plan.order, plan.domains, plan.level_codes
+        last = len(order) - 1
+        namespace = base_context.copy()
+
+        def loop(level):
+            code = level_codes[level + 1]
+            for value in domains[level]:
+                namespace[order[level]] = value
+                if code is not None:
+                    try:
+                        exec(code, namespace)
+                    except Exception:
+                        # Todas as combinações deste ramo falhariam no mesmo comando
+                        continue
+                if level < last:
+                    loop(level + 1)
+                else:
+                    result = namespace.get('resposta_valor') or namespace.get('resposta')
+                    self._add_outcome(result, permitir_negativos, possible_outcomes)
+
+        try:
+            if level_codes[0] is not None:
+                exec(level_codes[0], namespace)
+        except Exception:
+            return possible_outcomes
+        loop(0)
+        return possible_outcomes
+
     def _select_sampling_strategy(self, choice_vars: Dict, total_possible: int) -> callable:
         """Seleciona a melhor estratégia de amostragem baseada nas variáveis"""
         if total_possible <= self.max_combinations:
@@ -125,28 +630,31 @@ class CombinatorialEngine:
         else:
             return self._discrete_sampling
     
-    def _exhaustive_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int) -> List[Tuple]:
-        """Processamento completo (para combinações pequenas)"""
-        var_names = list(choice_vars.keys())
-        value_lists = list(choice_vars.values())
-        return list(product(*value_lists))
+    def _exhaustive_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int,
+                             rng: random.Random) -> Iterator[Tuple]:
+        """Processamento completo, percorrendo o produto cartesiano sob demanda"""
+        return product(*choice_vars.values())
     
-    def _continuous_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int) -> List[Tuple]:
+    def _continuous_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int,
+                             rng: random.Random) -> Iterator[Tuple]:
         """
-        Amostragem REOTIMIZADA: Gera menos combinações para evitar pool excessivo
+        Amostragem REOTIMIZADA: Gera menos combinações para evitar pool excessivo.
+        As combinações são produzidas sob demanda; a memória usada é limitada por max_samples.
         """
         var_names = list(choice_vars.keys())
+        value_lists = list(choice_vars.values())
         
         # 1. Combinação correta garantida
         correct_combination = tuple(base_context.get(v) for v in var_names)
-        samples = set([correct_combination])
+        emitted = {correct_combination}
+        yield correct_combination
         
         # 2. Estratégia MAIS CONSERVADORA para variáveis contínuas
         max_samples = min(200, total_possible)  # REDUZIDO drasticamente
         
         # 3. Para eletrotécnica: foca nos valores mais representativos
-        for i, (var_name, values) in enumerate(choice_vars.items()):
-            if all(isinstance(v, (int, float)) for v in values) and len(samples) < max_samples:
+        for i, values in enumerate(value_lists):
+            if all(isinstance(v, (int, float)) for v in values) and len(emitted) < max_samples:
                 sorted_vals = sorted(values)
                 n = len(sorted_vals)
                 
@@ -159,110 +667,99 @@ class CombinatorialEngine:
                 
                 # Para cada valor crítico, cria uma combinação
                 for critical_val in critical_values:
-                    if len(samples) >= max_samples:
+                    if len(emitted) >= max_samples:
                         break
                     new_comb = list(correct_combination)
                     new_comb[i] = critical_val
-                    samples.add(tuple(new_comb))
-        
-        # 4. Amostra aleatória MUITO limitada
-        attempts = 0
-        max_attempts = 500
+                    new_comb = tuple(new_comb)
+                    if new_comb not in emitted:
+                        emitted.add(new_comb)
+                        yield new_comb
         
-        while len(samples) < max_samples and attempts < max_attempts:
-            new_sample = tuple(random.choice(values) for values in choice_vars.values())
-            samples.add(new_sample)
-            attempts += 1
-        
-        print(f"   🎯 Amostras geradas: {len(samples)} (limite: {max_samples})")
-        return list(samples)
+        # 4. Completa com amostra estratificada do espaço de combinações
+        remaining = max_samples - len(emitted)
+        for index in _stratified_indices(total_possible, remaining, rng):
+            combination = _decode_index(index, value_lists)
+            if combination not in emitted:
+                yield combination
     
-    def _discrete_large_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int) -> List[Tuple]:
+    def _discrete_large_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int,
+                                 rng: random.Random) -> Iterator[Tuple]:
         """Amostragem para variáveis discretas com domínios grandes"""
-        var_names = list(choice_vars.keys())
-        correct_combination = tuple(base_context.get(v) for v in var_names)
-        samples = set([correct_combination])
-        
-        # Estratégia: amostra proporcional ao tamanho do domínio
-        max_samples = min(self.max_sample, total_possible)
-        
-        while len(samples) < max_samples:
-            new_sample = []
-            for var_name, values in choice_vars.items():
-                # Amostra mais diversa para domínios maiores
-                if len(values) > 5:
-                    # Pega valores espaçados para domínios grandes
-                    idx = random.randint(0, len(values) - 1)
-                    new_sample.append(values[idx])
-                else:
-                    new_sample.append(random.choice(values))
-            
-            samples.add(tuple(new_sample))
-        
-        return list(samples)
+        return self._stratified_sampling(choice_vars, base_context, total_possible, rng)
     
-    def _discrete_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int) -> List[Tuple]:
+    def _discrete_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int,
+                           rng: random.Random) -> Iterator[Tuple]:
         """Amostragem padrão para variáveis discretas"""
+        return self._stratified_sampling(choice_vars, base_context, total_possible, rng)
+
+    def _stratified_sampling(self, choice_vars: Dict, base_context: Dict, total_possible: int,
+                             rng: random.Random) -> Iterator[Tuple]:
+        """
+        Combinação correta + uma combinação sorteada em cada estrato do espaço de índices.
+        Passada única, sem materializar o produto nem guardar conjuntos de tuplas.
+        """
         var_names = list(choice_vars.keys())
+        value_lists = list(choice_vars.values())
+
         correct_combination = tuple(base_context.get(v) for v in var_names)
-        samples = set([correct_combination])
-        
+        yield correct_combination
+
         max_samples = min(self.max_sample, total_possible)
-        attempts = 0
-        max_attempts = max_samples * 2
-        
-        while len(samples) < max_samples and attempts < max_attempts:
-            new_sample = tuple(random.choice(values) for values in choice_vars.values())
-            samples.add(new_sample)
-            attempts += 1
-        
-        return list(samples)
+        for index in _stratified_indices(total_possible, max_samples - 1, rng):
+            combination = _decode_index(index, value_lists)
+            if combination != correct_combination:
+                yield combination
     
-    def _process_combinations(self, combinations: List[Tuple], choice_vars: Dict, 
-                            calculation_source: str, base_context: Dict, questao_base: Dict) -> Set:
+    def _process_combinations(self, combinations: Iterable[Tuple], choice_vars: Dict, 
+                            calculation_code, base_context: Dict, questao_base: Dict) -> Set:
         """Executa o cálculo para cada combinação e filtra resultados válidos"""
         var_names = list(choice_vars.keys())
         possible_outcomes = set()
         permitir_negativos = questao_base.get("permitir_negativos", False)
         
-        print(f"   🔄 Processando {len(combinations)} combinações...")
-        
-        for i, combination in enumerate(combinations):
+        # O cálculo vem compilado do cache de análises; cada combinação só troca o namespace.
+        # O contexto da questão vira uma camada congelada: nada é copiado por combinação
+        camada = _camada_com_variaveis(base_context)
+        processed = 0
+        for combination in combinations:
+            processed += 1
             try:
-                # Monta o script de atribuição
-                assignment_script = ""
-                current_combination_dict = dict(zip(var_names, combination))
-                
-                for var_name, value in current_combination_dict.items():
-                    assignment_script += f"{var_name} = {repr(value)}\n"
-                
-                full_script = assignment_script + calculation_source
-                
-                # Executa em contexto isolado
-                exec_context = base_context.copy()
-                exec_context.update(current_combination_dict)
-                exec(full_script, exec_context)
+                # Executa em contexto isolado, com as variáveis da combinação já atribuídas
+                exec_context = {'__builtins__': camada}
+                exec_context.update(zip(var_names, combination))
+                exec(calculation_code, exec_context)
                 
-                # Obtém o resultado
+                # Obtém o resultado e aplica filtros
                 result = exec_context.get('resposta_valor') or exec_context.get('resposta')
-                
-                # Aplica filtros
-                if self._is_valid_result(result, permitir_negativos):
-                    if isinstance(result, dict) and 'valores' in result:
-                        # Modo 1: Múltiplos valores
-                        vals_dict = result['valores']
-                        hashable_result = tuple(sorted(vals_dict.items()))
-                        possible_outcomes.add(hashable_result)
-                    elif isinstance(result, (int, float)):
-                        # Modo 2: Valor único
-                        possible_outcomes.add(result)
+                self._add_outcome(result, permitir_negativos, possible_outcomes)
                         
             except Exception as e:
                 # Ignora erros em combinações individuais
                 continue
         
+        eventos.emitir(DEBUG, 'pool', "   🔄 Combinações processadas: %s", f"{processed:,}",
+                       questao_id=questao_base.get('id'))
         return possible_outcomes
     
+    def _add_outcome(self, result, permitir_negativos: bool, possible_outcomes: Set):
+        """Adiciona o resultado ao pool se passar pelos filtros"""
+        outcome = self._hashable_outcome(result, permitir_negativos)
+        if outcome is not None:
+            possible_outcomes.add(outcome)
+
+    def _hashable_outcome(self, result, permitir_negativos: bool):
+        """Resultado no formato armazenado no pool (None se for filtrado)"""
+        if self._is_valid_result(result, permitir_negativos):
+            if isinstance(result, dict) and 'valores' in result:
+                # Modo 1: Múltiplos valores
+                vals_dict = result['valores']
+                return tuple(sorted(vals_dict.items()))
+            elif isinstance(result, (int, float)):
+                # Modo 2: Valor único
+                return result
+        return None
+
     def _is_valid_result(self, result, permitir_negativos: bool) -> bool:
         """Verifica se o resultado é válido baseado nos filtros"""
         if result is None:
@@ -286,24 +783,242 @@ class CombinatorialEngine:
         return True
 
 
-def _gerar_pool_combinatorio(questao_base, params_code, base_context):
+# Limites do pool por Monte Carlo (questões que a análise AST não consegue enumerar)
+_MC_MAX_EXECUCOES = 2000
+_MC_TEMPO_LIMITE = 5.0
+_MC_JANELA_CONVERGENCIA = 200
+_MC_TAMANHO_LOTE = 50
+_MC_TEMPO_MINIMO_PROCESSOS = 1.0
+
+
+def _executar_lote_monte_carlo(params_code: str, seeds: List[int], permitir_negativos: bool) -> List:
+    """
+    Executa o script completo uma vez por seed e devolve o resultado de cada execução
+    no formato do pool (None quando a execução falha ou o resultado é filtrado).
+    Função de módulo para poder rodar em um ProcessPoolExecutor.
     """
-    ✅ VERSÃO SEM CACHE: Usa o CombinatorialEngine diretamente
+    from .utils import _novo_contexto
+
+    engine = CombinatorialEngine()
+    try:
+        codigo = compile(params_code, '<monte_carlo>', 'exec')
+    except SyntaxError:
+        return [None] * len(seeds)
+    usa_numpy = np is not None and 'numpy' in bibliotecas_referenciadas(params_code)
+    estado_random = random.getstate()
+    estado_numpy = np.random.get_state() if usa_numpy else None
+    resultados = []
+    try:
+        for seed in seeds:
+            # Cobre random.*, rng.*, `import random` dentro do script e np.random.*
+            rng = random.Random(seed)
+            random.seed(seed)
+            if usa_numpy:
+                np.random.seed(seed % 2**32)
+            contexto = _novo_contexto()
+            contexto['avisos'] = []
+            contexto['rng'] = rng
+            contexto['random'] = rng
+            try:
+                exec(codigo, contexto)
+            except Exception:
+                resultados.append(None)
+                continue
+            result = contexto.get('resposta_valor') or contexto.get('resposta')
+            resultados.append(engine._hashable_outcome(result, permitir_negativos))
+    finally:
+        random.setstate(estado_random)
+        if estado_numpy is not None:
+            np.random.set_state(estado_numpy)
+    return resultados
+
+
+def _gerar_pool_monte_carlo(questao_base, params_code, formatador_lote=None, seed_base=0):
+    """
+    Pool genérico para scripts sem `x = random.choice(...)` no nível superior
+    (randint, uniform, rng.choice, np.random, sorteios em laços...): reexecuta o script
+    inteiro com seeds independentes até convergir (nenhum valor formatado novo em
+    _MC_JANELA_CONVERGENCIA execuções), esgotar o tempo ou atingir _MC_MAX_EXECUCOES.
+    Lotes caros são distribuídos num pool de processos. `formatador_lote` formata de uma
+    vez os resultados numéricos de um lote. Retorna None se nada for válido.
     """
     questao_id = questao_base.get('id', 'N/A')
-    print(f"   🔄 Processando - Questão {questao_id}")
-    
-    # Processa normalmente sem cache
-    engine = CombinatorialEngine(
-        max_combinations=20000,
-        max_sample=200
+    permitir_negativos = questao_base.get("permitir_negativos", False)
+    formatador_lote = formatador_lote or (lambda valores: valores)
+    inicio = time.perf_counter()
+
+    pool = set()
+    chaves = set()
+    execucoes = 0
+    sem_novidade = 0
+
+    def registrar(resultados):
+        nonlocal execucoes, sem_novidade
+        numericos = [resultado for resultado in resultados if isinstance(resultado, (int, float))]
+        textos = iter(formatador_lote(numericos))
+        for resultado in resultados:
+            execucoes += 1
+            sem_novidade += 1
+            if resultado is None:
+                continue
+            pool.add(resultado)
+            chave = next(textos) if isinstance(resultado, (int, float)) else resultado
+            if chave not in chaves:
+                chaves.add(chave)
+                sem_novidade = 0
+
+    def convergiu():
+        return (sem_novidade >= _MC_JANELA_CONVERGENCIA or agendadas >= _MC_MAX_EXECUCOES
+                or time.perf_counter() - inicio >= _MC_TEMPO_LIMITE)
+
+    def proximo_lote():
+        nonlocal agendadas
+        tamanho = min(_MC_TAMANHO_LOTE, _MC_MAX_EXECUCOES - agendadas)
+        seeds = list(range(seed_base + agendadas, seed_base + agendadas + tamanho))
+        agendadas += tamanho
+        return seeds
+
+    agendadas = 0
+
+    # Lote inicial no próprio processo: mede o custo por execução
+    registrar(_executar_lote_monte_carlo(params_code, proximo_lote(), permitir_negativos))
+    if not pool:
+        eventos.emitir(AVISO, 'monte_carlo', "   ❌ Monte Carlo - Questão %s: nenhuma execução válida",
+                       questao_id, questao_id=questao_id)
+        return None
+
+    # Processos só compensam para scripts caros, e nunca dentro de um worker
+    custo_previsto = (time.perf_counter() - inicio) / execucoes * (_MC_MAX_EXECUCOES - execucoes)
+    usar_processos = (custo_previsto >= _MC_TEMPO_MINIMO_PROCESSOS
+                      and multiprocessing.parent_process() is None)
+
+    if usar_processos:
+        try:
+            num_workers = min(os.cpu_count() or 1, 4)
+            bibliotecas = tuple(sorted(bibliotecas_referenciadas(params_code)))
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=_preimportar_bibliotecas,
+                                     initargs=(bibliotecas,)) as executor:
+                pendentes = deque()
+                while not convergiu() or pendentes:
+                    while not convergiu() and len(pendentes) < num_workers:
+                        pendentes.append(executor.submit(_executar_lote_monte_carlo, params_code,
+                                                         proximo_lote(), permitir_negativos))
+                    # Consome em ordem de seed: o resultado não depende do escalonamento
+                    registrar(pendentes.popleft().result())
+                    if (sem_novidade >= _MC_JANELA_CONVERGENCIA
+                            or time.perf_counter() - inicio >= _MC_TEMPO_LIMITE):
+                        for futuro in pendentes:
+                            futuro.cancel()
+                        break
+        except Exception as e:
+            eventos.emitir(AVISO, 'monte_carlo', "   ⚠️  Monte Carlo em processos falhou (%s); continuando no processo atual",
+                           e, questao_id=questao_id)
+            usar_processos = False
+
+    while not convergiu():
+        registrar(_executar_lote_monte_carlo(params_code, proximo_lote(), permitir_negativos))
+
+    duracao = time.perf_counter() - inicio
+    eventos.emitir(DEBUG, 'monte_carlo', "   🎲 Monte Carlo - Questão %s: %d valores distintos em %s execuções (%.2fs%s)",
+                   questao_id, len(chaves), f"{execucoes:,}", duracao, ', processos' if usar_processos else '',
+                   questao_id=questao_id, duracao=duracao)
+    return pool
+
+
+def _chave_pool(params_code: str, questao_base: Dict, engine: CombinatorialEngine) -> str:
+    """Chave do cache: hash de tudo que determina o pool (o seed não entra)"""
+    conteudo = "\x1f".join([
+        "pool_v3",
+        params_code or "",
+        str(bool(questao_base.get("permitir_negativos", False))),
+        str(engine.max_combinations),
+        str(engine.max_sample),
+        str(engine.max_vectorized_combinations),
+        str(engine.max_sliced_combinations),
+    ])
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _criar_engine() -> CombinatorialEngine:
+    """Engine com os limites usados na geração (os limites fazem parte da chave do cache)"""
+    return CombinatorialEngine(
+        max_combinations=50000,
+        max_sample=200,
+        max_vectorized_combinations=1_000_000,
+        max_sliced_combinations=1_000_000
     )
-    
-    result = engine.generate_smart_pool(questao_base, params_code, base_context)
-    
+
+
+def _gerar_pool_combinatorio(questao_base, params_code, base_context):
+    """
+    Usa o CombinatorialEngine com cache persistente em disco (chave = hash do conteúdo)
+    """
+    from .cache_pools import pool_cache
+
+    questao_id = questao_base.get('id', 'N/A')
+    engine = _criar_engine()
+
+    chave = _chave_pool(params_code, questao_base, engine)
+    result = pool_cache.get(chave)
+    if result is not None:
+        eventos.emitir(DEBUG, 'cache', "   💾 Pool em cache - Questão %s", questao_id, questao_id=questao_id)
+        return result
+
+    with eventos.medir('pool', questao_id, mensagem=f"   🔄 Pool calculado - Questão {questao_id}"):
+        result = engine.generate_smart_pool(questao_base, params_code, base_context)
+
+    if result is None:
+        # Script fora do padrão `x = random.choice(...)`: amostra o script inteiro
+        from .utils import formatar_unidades
+        unidade = questao_base.get("unidade_resposta", "")
+        result = _gerar_pool_monte_carlo(questao_base, params_code,
+                                         lambda valores: formatar_unidades(valores, unidade))
+
+    if result:
+        pool_cache.set(chave, result, questao_id)
+
     return result
 
 
+def _gerar_distratores_combinatorio(questao_base, params_code, base_context, num_distratores,
+                                    formatador, excluir=(), rng=None, pool=None):
+    """
+    Retorna (textos, esgotado): até `num_distratores` textos distintos (fora de `excluir`)
+    para o Modo 2 e se o espaço inteiro de combinações foi avaliado. Só nesse caso uma
+    falta de textos se repete com qualquer seed.
+    O motor para assim que encontra textos suficientes; um pool completo só é usado se
+    vier em `pool`. O cache em disco não é consultado aqui: o resultado de um seed não
+    depende de um pool completo ter sido salvo antes. Scripts que não são do tipo
+    combinatório recorrem ao pool por Monte Carlo (amostrado: nunca esgotado).
+    Retorna None se nenhum pool puder ser gerado.
+    """
+    rng = rng or derivar_rng('distratores', params_code)
+    engine = _criar_engine()
+
+    if pool is None:
+        resultado = engine.generate_goal_pool(questao_base, params_code, base_context,
+                                              num_distratores, formatador, excluir, rng)
+        if resultado is not None:
+            return resultado
+        # Não combinatória: pool por Monte Carlo (também fica no cache em disco)
+        pool = _gerar_pool_combinatorio(questao_base, params_code, base_context)
+        if pool is None:
+            return None
+
+    # Ordem canônica: a seleção não depende da ordem interna do set (cache x recálculo)
+    valores = sorted(pool)
+    excluidos = set(excluir)
+    textos = []
+    for indice in _diverse_order(len(valores), rng):
+        if len(textos) >= num_distratores:
+            break
+        texto = formatador(valores[indice])
+        if texto not in excluidos:
+            excluidos.add(texto)
+            textos.append(texto)
+    return textos, False
+
+
 def optimize_memory_usage():
     """
     Funções para otimização de uso de memória
@@ -3,29 +3,181 @@ Sistema inteligente de paralelismo para geração de múltiplas versões
 """
 
 import multiprocessing
-import random
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import groupby
 from collections import Counter
 
-def _gerar_versao_unica_wrapper(args):
+from . import eventos
+from .eventos import AVISO, INFO
+from .seeds import derivar_rng, seed_da_execucao
+from .custos import modelo_custos
+from .imagens import RegistroImagens
+from .sandbox import iniciar_servico, workers_vivos
+
+
+def _preparar_execucao(questoes_base, opcoes_geracao):
     """
-    Wrapper para gerar uma única versão em processo separado
+    Slots (grupos/questões individuais) e gabarito da 1ª versão, sorteados pelo
+    gerador da execução: o mesmo seed dá o mesmo resultado no serial e no paralelo
     """
-    slots, opcoes_geracao, seed_offset, num_questoes_me, gabarito_me_v1 = args
-    return _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gabarito_me_v1)
+    # Importação local para evitar circularidade
+    from .core import _gerar_gabarito_distribuido
+
+    rng = derivar_rng(opcoes_geracao["seed"], 'execucao')
 
+    questoes_base.sort(key=lambda q: q.get("grupo") or f"__individual_{q['id']}__")
+    slots = []
+    for key, group in groupby(questoes_base, key=lambda q: q.get("grupo")):
+        questoes_do_grupo = list(group)
+        if key and key.strip():
+            slots.append(questoes_do_grupo)
+        else:
+            slots.extend([[q] for q in questoes_do_grupo])
+    
+    if opcoes_geracao.get("gabarito", {}).get("embaralhar_questoes", True):
+        rng.shuffle(slots)
 
-def _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gabarito_me_v1):
+    num_questoes_me = sum(1 for slot in slots if slot[0]['formato_questao'] == 'Múltipla Escolha')
+    
+    if num_questoes_me == 1:
+        gabarito_me_v1 = [rng.choice(["A", "B", "C", "D", "E"])]
+    elif opcoes_geracao.get("gabarito", {}).get("distribuir", True):
+        gabarito_me_v1 = _gerar_gabarito_distribuido(num_questoes_me, rng)
+        rng.shuffle(gabarito_me_v1)
+    else:
+        gabarito_me_v1 = [rng.choice(["A", "B", "C", "D", "E"]) for _ in range(num_questoes_me)]
+
+    return slots, num_questoes_me, gabarito_me_v1
+
+
+def _questoes_da_execucao(slots, num_versoes):
+    """Questões base distintas que alguma versão efetivamente vai usar"""
+    questoes = {}
+    for slot in slots:
+        for i in range(min(num_versoes, len(slot))):
+            questao = slot[i % len(slot)]
+            questoes.setdefault(questao['id'], questao)
+    return list(questoes.values())
+
+
+def _calcular_pools_da_execucao(questoes, executor=None, servico=None, ao_concluir=None):
     """
-    Gera uma única versão de prova - função interna para paralelismo
+    Estágio de pools: calcula o pool de cada questão base UMA vez por execução,
+    em paralelo entre questões quando há um executor disponível, nos workers isolados
+    quando há um serviço de execução. `ao_concluir(questao)` é avisado a cada pool.
+    """
+    from .core import _obter_pool_isolado, _questao_usa_pool_completo
+
+    # Só o Modo 1 usa o pool completo; pools mais caros primeiro
+    questoes_com_pool = sorted((q for q in questoes if _questao_usa_pool_completo(q)),
+                               key=lambda q: -modelo_custos.custo(q, 'pool'))
+    if not questoes_com_pool:
+        return {}
+
+    def calcular(questao):
+        inicio = time.perf_counter()
+        pool = _obter_pool_isolado(servico, questao)
+        modelo_custos.registrar('pool', questao['id'], time.perf_counter() - inicio)
+        if ao_concluir:
+            ao_concluir(questao)
+        return pool
+
+    mapear = executor.map if executor else map
+    resultados = mapear(calcular, questoes_com_pool)
+    pools = {q['id']: pool for q, pool in zip(questoes_com_pool, resultados) if pool is not None}
+
+    eventos.emitir(INFO, 'pool', "🧮 Pools calculados: %d de %d questão(ões) combinatória(s)",
+                   len(pools), len(questoes_com_pool))
+    return pools
+
+
+def _bibliotecas_da_execucao(questoes):
+    """
+    Bibliotecas pesadas que os workers devem pré-importar: as referenciadas pelos
+    scripts da execução, mais o numpy se houver pools (caminho vetorizado do motor)
+    """
+    from .core import _questao_usa_pool
+    from .utils import bibliotecas_referenciadas, np
+
+    bibliotecas = set()
+    for questao in questoes:
+        bibliotecas |= bibliotecas_referenciadas(questao.get("parametros") or "")
+        if np is not None and _questao_usa_pool(questao):
+            bibliotecas.add('numpy')
+    return tuple(sorted(bibliotecas))
+
+
+def _registrar_medidas_da_execucao(servico):
+    """Leva ao modelo de custo o início dos workers medido nesta execução e grava as medidas"""
+    if servico:
+        for segundos in servico.coletar_tempos_inicio():
+            modelo_custos.registrar_inicio_worker(segundos)
+    modelo_custos.salvar()
+
+
+def _informar_interrupcoes(servico):
+    """Resumo das questões interrompidas pelo serviço de execução isolada"""
+    if servico and servico.bloqueadas:
+        ids = ", ".join(str(questao_id) for questao_id in servico.stats()['bloqueadas'])
+        eventos.emitir(AVISO, 'isolamento', "⛔ Questões interrompidas (tempo/memória) e omitidas: %s", ids)
+
+
+def _tarefas_da_versao(slots, opcoes_geracao, seed_offset):
+    """
+    Unidades de trabalho de uma versão: uma por slot, (versão, slot, questão que o
+    slot usa na versão, seed da variante)
+    """
+    seed_versao = (opcoes_geracao["seed"], 'versao', seed_offset)
+    tarefas = []
+    for indice_slot, slot in enumerate(slots):
+        questao = slot[seed_offset % len(slot)]
+        tarefas.append((seed_offset, indice_slot, questao, seed_versao + ('questao', questao['id'], indice_slot)))
+    return tarefas
+
+
+def _tarefas_da_execucao(slots, opcoes_geracao, num_versoes):
+    """Tarefas (versão, slot) de todas as versões"""
+    return [tarefa for seed_offset in range(num_versoes)
+            for tarefa in _tarefas_da_versao(slots, opcoes_geracao, seed_offset)]
+
+
+def _gerar_variante_medida(servico, questao, seed, pools=None, imagens=None):
+    """Variante da tarefa (ou None), registrando o tempo gasto como custo da questão"""
+    from .core import _gerar_variante_isolada
+
+    inicio = time.perf_counter()
+    resultado = _gerar_variante_isolada(servico, questao, seed, pools, imagens)
+    modelo_custos.registrar('variante', questao['id'], time.perf_counter() - inicio)
+    return resultado.variante
+
+
+def _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gabarito_me_v1, pools=None,
+                        servico=None, imagens=None):
+    """
+    Gera uma única versão de prova, slot a slot.
+    `pools` traz os pools pré-calculados; a versão só sorteia e escolhe distratores.
+    Com `servico`, cada variante é gerada num worker isolado.
+    `imagens` é o registro de imagens da execução (cada questão leva a sua `imagem_info`).
+    """
+    variantes = [_gerar_variante_medida(servico, questao, seed, pools, imagens)
+                 for _, _, questao, seed in _tarefas_da_versao(slots, opcoes_geracao, seed_offset)]
+    return _montar_versao(slots, opcoes_geracao, seed_offset, gabarito_me_v1, variantes)
+
+
+def _montar_versao(slots, opcoes_geracao, seed_offset, gabarito_me_v1, variantes):
+    """
+    Monta a versão a partir das variantes já geradas (uma por slot, None = falhou),
+    na ordem dos slots: rotação do gabarito, `contador_me` e embaralhamento das
+    alternativas são os mesmos de uma geração slot a slot
     """
     # Importação local para evitar circularidade
-    from .core import _gerar_variante_questao, _rotacionar_letra
+    from .core import _rotacionar_letra
     
-    # Configura seed única para esta versão
-    import random
-    random.seed(seed_offset)
+    # Gerador próprio da versão, derivado do seed mestre da execução
+    seed_versao = (opcoes_geracao["seed"], 'versao', seed_offset)
+    rng_versao = derivar_rng(*seed_versao)
     
     opcoes_gabarito = opcoes_geracao.get("gabarito", {})
     opcoes_pontuacao = opcoes_geracao.get("pontuacao", {})
@@ -40,11 +192,7 @@ def _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gab
     gabarito_me_atual = [_rotacionar_letra(letra, seed_offset * opcoes_gabarito.get("rotacao", 0)) for letra in gabarito_me_v1]
     contador_me = 0
 
-    for slot in slots:
-        questao_base_para_versao = slot[seed_offset % len(slot)]
-        
-        variante = _gerar_variante_questao(questao_base_para_versao, None)
-        
+    for variante in variantes:
         if not variante:
             continue
 
@@ -72,13 +220,14 @@ def _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gab
             if resposta_valor not in alternativas and len(alternativas) < num_alternativas:
                 alternativas.append(resposta_valor)
             
-            random.shuffle(alternativas)
+            rng_versao.shuffle(alternativas)
             try:
                 idx_correta_atual = alternativas.index(resposta_valor)
                 idx_alvo = letras_disponiveis.index(letra_correta_final)
                 alternativas[idx_correta_atual], alternativas[idx_alvo] = alternativas[idx_alvo], alternativas[idx_correta_atual]
             except (ValueError, IndexError):
-                print(f"Aviso: não foi possível posicionar a resposta para a questão ID {variante['id_base']}...")
+                eventos.emitir(AVISO, 'gabarito', "Aviso: não foi possível posicionar a resposta para a questão ID %s...",
+                               variante['id_base'], questao_id=variante['id_base'])
             
             questao_final["gabarito"] = letra_correta_final
             questao_final["alternativas"] = {letra: texto for letra, texto in zip(letras_disponiveis, alternativas)}
@@ -93,136 +242,222 @@ def _gerar_versao_unica(slots, opcoes_geracao, seed_offset, num_questoes_me, gab
     return versao_data
 
 
-def _detectar_melhor_estrategia_paralelismo():
-    """
-    Detecta a melhor estratégia baseada no hardware
-    """
-    num_cores = multiprocessing.cpu_count()
-    
-    # Estimativa simples de memória
-    try:
-        import psutil
-        memoria_gb = psutil.virtual_memory().total / (1024.**3)
-    except:
-        memoria_gb = 4  # Fallback
-    
-    print(f"🔍 Detectado: {num_cores} cores, ~{memoria_gb:.1f}GB RAM")
-    
-    if num_cores >= 4 and memoria_gb >= 8:
-        return "processos"  # PCs bons
-    elif num_cores >= 2 and memoria_gb >= 4:
-        return "threads"    # PCs médios
-    else:
-        return "serial"     # PCs fracos
+def _planejar_execucao(custos_pools, custos_tarefas):
+    """Plano escolhido pelo modelo de custo (tempos medidos e início de workers)"""
+    escolhida, _ = modelo_custos.planejar(sorted(custos_pools, reverse=True), custos_tarefas,
+                                          workers_vivos(), multiprocessing.cpu_count())
+    return escolhida
+
+
+class ProgressoGeracao:
+    """Andamento de uma execução: pools, questões (tarefas versão × slot), versões e ETA em segundos"""
+
+    __slots__ = ("pools_concluidos", "pools_total", "questoes_concluidas", "questoes_total",
+                 "versoes_concluidas", "versoes_total", "eta")
 
+    def __init__(self, pools_concluidos, pools_total, questoes_concluidas, questoes_total,
+                 versoes_concluidas, versoes_total, eta=None):
+        self.pools_concluidos = pools_concluidos
+        self.pools_total = pools_total
+        self.questoes_concluidas = questoes_concluidas
+        self.questoes_total = questoes_total
+        self.versoes_concluidas = versoes_concluidas
+        self.versoes_total = versoes_total
+        self.eta = eta
 
-def _deve_usar_paralelismo(questoes_base, num_versoes):
+    def descrever(self):
+        partes = []
+        if self.pools_total:
+            partes.append(f"🧮 Pools {self.pools_concluidos}/{self.pools_total}")
+        partes.append(f"🧩 Questões {self.questoes_concluidas}/{self.questoes_total}")
+        partes.append(f"📄 Versões {self.versoes_concluidas}/{self.versoes_total}")
+        if self.eta is not None:
+            partes.append(f"⏳ ~{self.eta:.0f}s restantes")
+        return " · ".join(partes)
+
+
+# Intervalo mínimo entre avisos de progresso por pool/tarefa (versões concluídas sempre avisam)
+_INTERVALO_PROGRESSO = 0.25
+
+
+class _AcompanhamentoExecucao:
     """
-    Decide se vale a pena usar paralelismo
+    Conta o que já foi feito e avisa `ao_progredir`. O ETA usa os custos estimados como
+    pesos: tempo decorrido × (custo restante / custo concluído).
     """
-    if num_versoes == 1:
-        return False
-    
-    # Conta questões complexas (combinatórias)
-    questao_complexas = sum(1 for q in questoes_base 
-                          if q.get("gerar_alternativas_auto") and q.get("parametros"))
-    
-    return questao_complexas >= max(1, len(questoes_base) * 0.25)
 
+    def __init__(self, ao_progredir, custos_pools, custos_tarefas, num_versoes):
+        self.ao_progredir = ao_progredir
+        self.pools_total = len(custos_pools)
+        self.questoes_total = len(custos_tarefas)
+        self.versoes_total = num_versoes
+        self.pools_concluidos = 0
+        self.questoes_concluidas = 0
+        self.versoes_concluidas = 0
+        self.custo_total = sum(custos_pools) + sum(custos_tarefas)
+        self.custo_concluido = 0.0
+        self.inicio = time.perf_counter()
+        self._ultimo_aviso = 0.0
+        self._trava = threading.Lock()
+
+    def pool_concluido(self, custo):
+        with self._trava:
+            self.pools_concluidos += 1
+            self.custo_concluido += custo
+        self._avisar()
+
+    def questao_concluida(self, custo):
+        with self._trava:
+            self.questoes_concluidas += 1
+            self.custo_concluido += custo
+        self._avisar()
+
+    def versao_concluida(self):
+        with self._trava:
+            self.versoes_concluidas += 1
+        self._avisar(forcar=True)
 
-def gerar_versoes_prova_paralelo(questoes_base, num_versoes, opcoes_geracao):
+    def _avisar(self, forcar=False):
+        if self.ao_progredir is None:
+            return
+        agora = time.perf_counter()
+        with self._trava:
+            if not forcar and agora - self._ultimo_aviso < _INTERVALO_PROGRESSO:
+                return
+            self._ultimo_aviso = agora
+            eta = None
+            if self.custo_concluido > 0:
+                restante = max(0.0, self.custo_total - self.custo_concluido)
+                eta = (agora - self.inicio) * restante / self.custo_concluido
+            progresso = ProgressoGeracao(self.pools_concluidos, self.pools_total, self.questoes_concluidas,
+                                         self.questoes_total, self.versoes_concluidas, self.versoes_total, eta)
+        self.ao_progredir(progresso)
+
+
+def _variantes_na_conclusao(tarefas, executor, servico, pools, imagens):
+    """(índice da tarefa, variante) na ordem em que as tarefas terminam"""
+    if executor is None:
+        for indice, (_, _, questao, seed) in enumerate(tarefas):
+            yield indice, _gerar_variante_medida(servico, questao, seed, pools, imagens)
+        return
+    futuros = {executor.submit(_gerar_variante_medida, servico, questao, seed, pools, imagens): indice
+               for indice, (_, _, questao, seed) in enumerate(tarefas)}
+    for futuro in as_completed(futuros):
+        yield futuros[futuro], futuro.result()
+
+
+def gerar_versoes_prova_em_fluxo(questoes_base, num_versoes, opcoes_geracao, ao_progredir=None):
     """
-    Versão paralelizada inteligente
+    Gera as versões e entrega cada uma (yield) assim que fica pronta, na ordem de conclusão.
+    Quantos workers: o modelo de custo decide (serial, pool aquecido ou mais processos).
+    `ao_progredir(ProgressoGeracao)` é chamado da thread da geração. Erros são propagados.
     """
-    # Importação local para evitar circularidade
-    from .core import _gerar_gabarito_distribuido
-    
-    # Prepara slots e gabarito (mesma lógica da versão serial)
-    questoes_base.sort(key=lambda q: q.get("grupo") or f"__individual_{q['id']}__")
-    slots = []
-    for key, group in groupby(questoes_base, key=lambda q: q.get("grupo")):
-        questoes_do_grupo = list(group)
-        if key and key.strip():
-            slots.append(questoes_do_grupo)
-        else:
-            slots.extend([[q] for q in questoes_do_grupo])
-    
-    if opcoes_geracao.get("gabarito", {}).get("embaralhar_questoes", True):
-        random.shuffle(slots)
+    from .core import _questao_usa_pool_completo
 
-    num_questoes_me = sum(1 for slot in slots if slot[0]['formato_questao'] == 'Múltipla Escolha')
-    
-    if num_questoes_me == 1:
-        gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"])]
-    elif opcoes_geracao.get("gabarito", {}).get("distribuir", True):
-        gabarito_me_v1 = _gerar_gabarito_distribuido(num_questoes_me)
-        random.shuffle(gabarito_me_v1)
-    else:
-        gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"]) for _ in range(num_questoes_me)]
+    # Slots e gabarito (mesma lógica da versão serial)
+    opcoes_geracao = dict(opcoes_geracao, seed=seed_da_execucao(opcoes_geracao))
+    slots, num_questoes_me, gabarito_me_v1 = _preparar_execucao(questoes_base, opcoes_geracao)
+
+    questoes_da_execucao = _questoes_da_execucao(slots, num_versoes)
+
+    # Unidade de trabalho = (versão, slot). As versões são despachadas em ordem (o caderno A
+    # fica pronto primeiro); dentro de cada versão, as tarefas mais caras vão antes
+    # (sort estável: empates mantêm a ordem dos slots)
+    tarefas = []
+    for seed_offset in range(num_versoes):
+        tarefas_versao = _tarefas_da_versao(slots, opcoes_geracao, seed_offset)
+        tarefas_versao.sort(key=lambda tarefa: -modelo_custos.custo(tarefa[2]))
+        tarefas.extend(tarefas_versao)
+    custos_tarefas = [modelo_custos.custo(questao) for _, _, questao, _ in tarefas]
+    custos_pools = {q['id']: modelo_custos.custo(q, 'pool') for q in questoes_da_execucao
+                    if _questao_usa_pool_completo(q)}
+
+    # O código das questões roda sempre nos workers isolados (processos com orçamento de
+    # tempo/memória); as threads só orquestram
+    plano = _planejar_execucao(list(custos_pools.values()), custos_tarefas)
+    num_workers = plano.num_workers
+    acompanhamento = _AcompanhamentoExecucao(ao_progredir, list(custos_pools.values()), custos_tarefas, num_versoes)
+    # Cada worker importa só as bibliotecas que esta execução usa
+    servico = iniciar_servico(num_workers, _bibliotecas_da_execucao(questoes_da_execucao))
+    executor = ThreadPoolExecutor(max_workers=num_workers) if num_workers > 1 else None
 
-    estrategia = _detectar_melhor_estrategia_paralelismo()
-    print(f"🔄 Usando estratégia: {estrategia}")
-    
-    # Prepara argumentos para cada versão
-    args_list = [(slots, opcoes_geracao, i, num_questoes_me, gabarito_me_v1) for i in range(num_versoes)]
-    
     try:
-        if estrategia == "processos":
-            # Máximo desempenho - ProcessPoolExecutor
-            num_workers = min(multiprocessing.cpu_count(), num_versoes, 4)
-            with ProcessPoolExecutor(max_workers=num_workers) as executor:
-                versoes_geradas = list(executor.map(_gerar_versao_unica_wrapper, args_list))
-                
-        else:  # estrategia == "threads"
-            # Balanceado - ThreadPoolExecutor
-            num_workers = min(multiprocessing.cpu_count() * 2, num_versoes, 8)
-            with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                versoes_geradas = list(executor.map(_gerar_versao_unica_wrapper, args_list))
-        
-        print(f"✅ Paralelismo ({estrategia}): {num_versoes} versões com {num_workers} workers")
-        return versoes_geradas
-        
+        # 1º estágio: pools (paralelo entre questões); 2º: variantes (paralelo entre tarefas)
+        pools = _calcular_pools_da_execucao(questoes_da_execucao, executor, servico,
+                                            lambda questao: acompanhamento.pool_concluido(custos_pools[questao['id']]))
+        imagens = RegistroImagens()
+        variantes = {}
+        restantes = Counter(seed_offset for seed_offset, _, _, _ in tarefas)
+        for indice, variante in _variantes_na_conclusao(tarefas, executor, servico, pools, imagens):
+            seed_offset, indice_slot, _, _ = tarefas[indice]
+            variantes[(seed_offset, indice_slot)] = variante
+            acompanhamento.questao_concluida(custos_tarefas[indice])
+            restantes[seed_offset] -= 1
+            if restantes[seed_offset]:
+                continue
+
+            # 3º estágio: a versão completa é montada na ordem dos slots (gabarito e contador_me intactos)
+            versao_data = _montar_versao(slots, opcoes_geracao, seed_offset, gabarito_me_v1,
+                                         [variantes.pop((seed_offset, i)) for i in range(len(slots))])
+            acompanhamento.versao_concluida()
+            yield versao_data
+
+        # Sem slots (nenhuma questão de base) não há tarefas: as versões saem vazias
+        for seed_offset in range(num_versoes):
+            if seed_offset not in restantes:
+                acompanhamento.versao_concluida()
+                yield _montar_versao(slots, opcoes_geracao, seed_offset, gabarito_me_v1, [])
+
+        _informar_interrupcoes(servico)
+        eventos.emitir(INFO, 'execucao', "✅ Execução (%s): %d versões, %d tarefas com %d worker(s)",
+                       plano.nome, num_versoes, len(tarefas), num_workers)
+    finally:
+        if executor is not None:
+            # Consumidor desistiu ou houve erro: o que ainda não começou não roda mais
+            executor.shutdown(cancel_futures=True)
+        _registrar_medidas_da_execucao(servico)
+        if servico:
+            servico.encerrar()
+
+
+def gerar_versoes_prova_paralelo(questoes_base, num_versoes, opcoes_geracao, ao_progredir=None):
+    """
+    Todas as versões, em ordem de letra (ver gerar_versoes_prova_em_fluxo); None se a execução falhar
+    """
+    try:
+        versoes_geradas = list(gerar_versoes_prova_em_fluxo(questoes_base, num_versoes, opcoes_geracao,
+                                                            ao_progredir))
     except Exception as e:
-        print(f"⚠️  Paralelismo falhou: {e}")
+        eventos.emitir(AVISO, 'execucao', "⚠️  Paralelismo falhou: %s", e)
         return None
+    return sorted(versoes_geradas, key=lambda versao: versao['letra'])
 
 
 def gerar_versoes_prova_serial(questoes_base, num_versoes, opcoes_geracao):
     """
     Versão serial de fallback
     """
-    # Importação local para evitar circularidade
-    from .core import _gerar_gabarito_distribuido
-    
-    print("🔄 Usando processamento serial...")
+    eventos.emitir(INFO, 'execucao', "🔄 Usando processamento serial...")
     
     # Prepara slots e gabarito
-    questoes_base.sort(key=lambda q: q.get("grupo") or f"__individual_{q['id']}__")
-    slots = []
-    for key, group in groupby(questoes_base, key=lambda q: q.get("grupo")):
-        questoes_do_grupo = list(group)
-        if key and key.strip():
-            slots.append(questoes_do_grupo)
-        else:
-            slots.extend([[q] for q in questoes_do_grupo])
-    
-    if opcoes_geracao.get("gabarito", {}).get("embaralhar_questoes", True):
-        random.shuffle(slots)
+    opcoes_geracao = dict(opcoes_geracao, seed=seed_da_execucao(opcoes_geracao))
+    slots, num_questoes_me, gabarito_me_v1 = _preparar_execucao(questoes_base, opcoes_geracao)
 
-    num_questoes_me = sum(1 for slot in slots if slot[0]['formato_questao'] == 'Múltipla Escolha')
-    
-    if num_questoes_me == 1:
-        gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"])]
-    elif opcoes_geracao.get("gabarito", {}).get("distribuir", True):
-        gabarito_me_v1 = _gerar_gabarito_distribuido(num_questoes_me)
-        random.shuffle(gabarito_me_v1)
-    else:
-        gabarito_me_v1 = [random.choice(["A", "B", "C", "D", "E"]) for _ in range(num_questoes_me)]
-
-    versoes_geradas = []
-    
-    for i in range(num_versoes):
-        versao_data = _gerar_versao_unica(slots, opcoes_geracao, i, num_questoes_me, gabarito_me_v1)
-        versoes_geradas.append(versao_data)
+    questoes_da_execucao = _questoes_da_execucao(slots, num_versoes)
+    servico = iniciar_servico(1, _bibliotecas_da_execucao(questoes_da_execucao))
+    try:
+        pools = _calcular_pools_da_execucao(questoes_da_execucao, servico=servico)
+        imagens = RegistroImagens()
+        versoes_geradas = []
+        
+        for i in range(num_versoes):
+            versao_data = _gerar_versao_unica(slots, opcoes_geracao, i, num_questoes_me, gabarito_me_v1, pools, servico,
+                                              imagens)
+            versoes_geradas.append(versao_data)
+    finally:
+        _registrar_medidas_da_execucao(servico)
+        if servico:
+            servico.encerrar()
     
+    _informar_interrupcoes(servico)
     return versoes_geradas
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Questões compiladas: código de `parametros`, template do enunciado e templates
+das alternativas preparados UMA vez por questão base (por processo) e reutilizados
+por todas as variantes, tentativas do cardápio e testes de código
+"""
+
+import ast
+import hashlib
+import re
+from collections import OrderedDict
+from string import Formatter
+
+from .utils import PREFIX_DIVISORS, VALID_BASE_UNITS, bibliotecas_referenciadas
+
+# {variavel} seguido de um possível prefixo+unidade (ex.: "{R} kΩ")
+PADRAO_PLACEHOLDER_UNIDADE = re.compile(r'\{(\w+)\}(?:\s*)(\S+)\b')
+
+# Ponto decimal -> vírgula no texto final
+PADRAO_DECIMAL = re.compile(r'(\d+)\.(\d+)')
+
+LETRAS_ALTERNATIVAS = ["a", "b", "c", "d", "e"]
+
+# Campos da questão que determinam o conteúdo compilado
+_CAMPOS_CHAVE = (
+    "id", "tipo_questao", "parametros", "enunciado", "resposta_correta",
+    *(f"alternativa_{letra}" for letra in LETRAS_ALTERNATIVAS),
+)
+
+
+def _resposta_em_dicionario(parametros: str) -> bool:
+    """
+    Modo 1 visto no código: algum dicionário com a chave 'formato_texto' (literal ou
+    dict(formato_texto=...)). Análise estática; na dúvida (erro de sintaxe), False.
+    """
+    try:
+        arvore = ast.parse(parametros)
+    except (SyntaxError, ValueError):
+        return False
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Dict):
+            if any(isinstance(chave, ast.Constant) and chave.value == "formato_texto" for chave in no.keys):
+                return True
+        elif isinstance(no, ast.Call) and isinstance(no.func, ast.Name) and no.func.id == "dict":
+            if any(argumento.arg == "formato_texto" for argumento in no.keywords):
+                return True
+    return False
+
+
+def _arredondar_para_exibicao(valor):
+    """Floats com 2 casas; inteiros exatos perdem o ',0'"""
+    arredondado = round(valor, 2)
+    return int(arredondado) if arredondado == int(arredondado) else arredondado
+
+
+class TemplateEnunciado:
+    """
+    Enunciado analisado uma vez: campos referenciados e conversões de prefixo de
+    unidade. Cada variante só converte/arredonda esses campos antes de formatar.
+    """
+
+    def __init__(self, texto: str):
+        self.texto = texto or ""
+
+        # Conversões na ordem em que aparecem no texto ({R} kΩ -> R / 1e3)
+        self.conversoes = []
+        for var_name, unidade in PADRAO_PLACEHOLDER_UNIDADE.findall(self.texto):
+            if len(unidade) > 1 and unidade[0] in PREFIX_DIVISORS and unidade[1:] in VALID_BASE_UNITS:
+                self.conversoes.append((var_name, PREFIX_DIVISORS[unidade[0]]))
+
+        # Nomes-raiz dos campos ({a}, {a.b}, {a[0]}); None = formatar com o contexto inteiro
+        try:
+            self.campos = set()
+            self._coletar_campos(self.texto)
+        except ValueError:
+            self.campos = None
+
+    def _coletar_campos(self, texto: str):
+        for _, campo, especificacao, _ in Formatter().parse(texto):
+            if campo is None:
+                continue
+            raiz = re.match(r'[^.\[]*', campo).group(0)
+            if not raiz or raiz.isdigit():
+                raise ValueError("campo posicional")
+            self.campos.add(raiz)
+            if especificacao:
+                # Especificações aninhadas, como {x:.{casas}f}
+                self._coletar_campos(especificacao)
+
+    def formatar(self, contexto: dict) -> str:
+        """Texto final da variante (KeyError se faltar alguma variável referenciada)"""
+        if self.campos is None:
+            valores = dict(contexto)
+        else:
+            valores = {nome: contexto[nome] for nome in self.campos if nome in contexto}
+
+        for var_name, divisor in self.conversoes:
+            valor = valores.get(var_name)
+            if isinstance(valor, (int, float)):
+                convertido = float(valor) / divisor
+                valores[var_name] = int(convertido) if convertido == int(convertido) else convertido
+
+        for nome, valor in valores.items():
+            if isinstance(valor, float):
+                valores[nome] = _arredondar_para_exibicao(valor)
+
+        return PADRAO_DECIMAL.sub(r'\1,\2', self.texto.format(**valores))
+
+
+class QuestaoCompilada:
+    """Partes imutáveis de uma questão base, prontas para gerar variantes"""
+
+    def __init__(self, questao_base: dict):
+        questao_id = questao_base.get('id', 'N/A')
+        self.parametros = questao_base.get("parametros") or ""
+        self.codigo = None
+        self.erro_compilacao = None
+        if self.parametros and questao_base.get("tipo_questao", "Código (Python)") == "Código (Python)":
+            try:
+                self.codigo = compile(self.parametros, f"<questao_{questao_id}>", "exec")
+            except SyntaxError as e:
+                self.erro_compilacao = e
+        self.bibliotecas = bibliotecas_referenciadas(self.parametros)
+        # Modo 1 (resposta em dicionário) precisa do pool completo; o Modo 2 usa o pool por objetivo
+        self.resposta_multivalor = self.codigo is not None and _resposta_em_dicionario(self.parametros)
+
+        self.enunciado = TemplateEnunciado(questao_base.get("enunciado", ""))
+
+        # Modo 3: templates das alternativas e da resposta correta
+        self.alternativas = [(letra, questao_base.get(f"alternativa_{letra}")) for letra in LETRAS_ALTERNATIVAS]
+        self.resposta_letra = (questao_base.get("resposta_correta") or "?").lower()
+        self.resposta_template = questao_base.get(f"alternativa_{self.resposta_letra}")
+
+        # Modo 1: tabelas de valores já formatados, por pool (preenchido sob demanda)
+        self.tabelas_modo1 = {}
+
+    def executar(self, contexto: dict):
+        """Executa o código já compilado no contexto (relança o erro de sintaxe, se houver)"""
+        if self.erro_compilacao is not None:
+            raise SyntaxError(*self.erro_compilacao.args)
+        exec(self.codigo, contexto)
+
+
+class CacheQuestoesCompiladas:
+    """Cache LRU em memória, indexado pelo hash dos campos que a compilação usa"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _chave(self, questao_base: dict) -> str:
+        conteudo = "\x1f".join(str(questao_base.get(campo) or "") for campo in _CAMPOS_CHAVE)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def get(self, questao_base: dict) -> QuestaoCompilada:
+        chave = self._chave(questao_base)
+        compilada = self._entries.get(chave)
+        if compilada is not None:
+            self._entries.move_to_end(chave)
+            self.hits += 1
+            return compilada
+
+        self.misses += 1
+        compilada = QuestaoCompilada(questao_base)
+        self._entries[chave] = compilada
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return compilada
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Retorna estatísticas de uso do cache nesta sessão"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{hit_rate:.1f}%",
+        }
+
+
+# Instância global do cache
+questoes_compiladas = CacheQuestoesCompiladas()
+
+
+def obter_questao_compilada(questao_base: dict) -> QuestaoCompilada:
+    """Questão compilada (do cache, ou compilada agora)"""
+    return questoes_compiladas.get(questao_base)
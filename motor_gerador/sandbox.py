@@ -0,0 +1,603 @@
+"""
+Execução isolada do código das questões: workers em processos separados, iniciados
+de antemão, com orçamento de tempo de CPU por questão e limite de memória.
+Um worker que estoura o orçamento é encerrado e substituído; a questão é bloqueada
+até o fim da execução e o erro informa o seu ID.
+O pool de workers é persistente: criado no primeiro uso, reaproveitado (já aquecido,
+com as bibliotecas importadas) pelas execuções seguintes e encerrado na saída do app.
+Dados da execução (questões, pools) são compartilhados: cada worker recebe cada item
+uma vez por sessão e as tarefas seguintes só o referenciam pela chave.
+"""
+
+import atexit
+import itertools
+import math
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from multiprocessing.reduction import ForkingPickler
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem setrlimit, vale só o limite de tempo de parede aplicado pelo processo principal
+    resource = None
+
+from . import eventos
+from .eventos import AVISO, DEBUG, INFO
+from .utils import _preimportar_bibliotecas
+
+# Orçamentos padrão (segundos de CPU por tarefa)
+TEMPO_LIMITE_QUESTAO = 20.0
+TEMPO_LIMITE_POOL = 120.0
+
+# Espaço de endereçamento de cada worker (só onde o sistema permite limitar)
+LIMITE_MEMORIA_WORKER = 2 * 1024 ** 3
+
+# Tempo de parede tolerado = orçamento de CPU x fator + folga (concorrência entre workers)
+_FATOR_TEMPO_PAREDE = 2.0
+_FOLGA_TEMPO_PAREDE = 1.0
+
+# Espera máxima pela inicialização de um worker (interpretador + importações)
+_TEMPO_INICIO_WORKER = 60.0
+
+# True dentro de um processo worker
+_em_worker = False
+
+# Hits/misses dos caches do motor contados nos workers, somados de todas as sessões:
+# os contadores dos caches do processo principal não veem o trabalho feito nos workers
+_caches_workers = {}
+_trava_caches = threading.Lock()
+
+
+class Compartilhado:
+    """Referência a um item compartilhado da sessão (só a chave viaja com a tarefa)"""
+
+    __slots__ = ("chave",)
+
+    def __init__(self, chave):
+        self.chave = chave
+
+
+class ServicoIndisponivel(RuntimeError):
+    """Um worker não iniciou (falhou ou demorou demais): o pool não é mais usado nesta execução"""
+
+
+class ExecucaoInterrompida(Exception):
+    """O código de uma questão estourou o orçamento de tempo/memória (ou derrubou o worker)"""
+
+    def __init__(self, questao_id, motivo, repetida=False):
+        super().__init__(f"Questão ID {questao_id} interrompida: {motivo}")
+        self.questao_id = questao_id
+        self.motivo = motivo
+        # True quando a questão já estava bloqueada (a interrupção já foi informada)
+        self.repetida = repetida
+
+
+def _aplicar_limite_memoria(limite_bytes):
+    if resource is None or not limite_bytes:
+        return
+    _, rigido = resource.getrlimit(resource.RLIMIT_AS)
+    if rigido != resource.RLIM_INFINITY:
+        limite_bytes = min(limite_bytes, rigido)
+    resource.setrlimit(resource.RLIMIT_AS, (limite_bytes, rigido))
+
+
+def _aplicar_limite_cpu(segundos):
+    """Limite flexível de CPU = tempo já usado pelo worker + orçamento da tarefa (SIGXCPU ao estourar)"""
+    if resource is None or not segundos:
+        return
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    limite = int(math.ceil(uso.ru_utime + uso.ru_stime + segundos))
+    _, rigido = resource.getrlimit(resource.RLIMIT_CPU)
+    if rigido != resource.RLIM_INFINITY:
+        limite = min(limite, rigido)
+    resource.setrlimit(resource.RLIMIT_CPU, (limite, rigido))
+
+
+def _contadores_caches():
+    """(hits, misses) de cada cache do motor neste processo"""
+    from .memory_optimizer import analysis_cache
+    from .cache_pools import pool_cache
+    from .questao_compilada import questoes_compiladas
+
+    caches = (('analises', analysis_cache), ('pools', pool_cache), ('compiladas', questoes_compiladas))
+    return {nome: (cache.hits, cache.misses) for nome, cache in caches}
+
+
+def _variacao_caches(antes):
+    """Hits/misses contados desde `antes` (só os caches que mudaram)"""
+    variacao = {}
+    for nome, (hits, misses) in _contadores_caches().items():
+        hits_antes, misses_antes = antes.get(nome, (0, 0))
+        if hits != hits_antes or misses != misses_antes:
+            variacao[nome] = (hits - hits_antes, misses - misses_antes)
+    return variacao
+
+
+def _somar_caches(total, caches):
+    for nome, (hits, misses) in caches.items():
+        hits_total, misses_total = total.get(nome, (0, 0))
+        total[nome] = (hits_total + hits, misses_total + misses)
+
+
+def caches_dos_workers():
+    """(hits, misses) de cada cache do motor contados nos workers isolados, desde o início do app"""
+    with _trava_caches:
+        return dict(_caches_workers)
+
+
+def _laco_worker(conexao, bibliotecas, limite_memoria, criado_em):
+    """
+    Processo worker: recebe (função, argumentos, orçamento, nível dos eventos, sessão,
+    itens compartilhados novos) e devolve (status, valor, eventos emitidos durante a tarefa,
+    hits/misses dos caches do motor durante a tarefa)
+    """
+    global _em_worker
+    _em_worker = True
+    _aplicar_limite_memoria(limite_memoria)
+    eventos.registro.iniciar_buffer()
+    _preimportar_bibliotecas(bibliotecas)
+    # Quanto custou iniciar (interpretador + importações), para o modelo de custo
+    conexao.send(('pronto', time.time() - criado_em))
+
+    # Itens compartilhados da sessão atual (os de uma sessão anterior são descartados)
+    sessao_atual = None
+    compartilhados = {}
+
+    while True:
+        try:
+            tarefa = conexao.recv()
+        except (EOFError, OSError):
+            break
+        if tarefa is None:
+            break
+
+        funcao, args, tempo_limite, nivel_eventos, sessao, novos = tarefa
+        if sessao != sessao_atual:
+            sessao_atual = sessao
+            compartilhados = {}
+        if novos is not None:
+            compartilhados.update(ForkingPickler.loads(novos))
+        # Só guarda os eventos que o processo principal vai usar
+        eventos.registro.iniciar_buffer(nivel_eventos)
+        caches_antes = _contadores_caches()
+        _aplicar_limite_cpu(tempo_limite)
+        try:
+            args = tuple(compartilhados[a.chave] if isinstance(a, Compartilhado) else a for a in args)
+            resposta = ('ok', funcao(*args))
+        except MemoryError:
+            # Estado do processo incerto: avisa e sai (o principal inicia outro worker)
+            conexao.send(('memoria', None, [], {}))
+            break
+        except (Exception, SystemExit) as e:
+            resposta = ('erro', e)
+
+        lote = eventos.registro.coletar()
+        caches = _variacao_caches(caches_antes)
+        try:
+            conexao.send((*resposta, lote, caches))
+        except Exception as e:
+            # Resultado ou exceção que não pode ser serializado
+            conexao.send(('erro', RuntimeError(f"Resultado não serializável: {e!r}"), lote, caches))
+
+
+def em_worker():
+    """Indica se o código roda num worker isolado (onde um MemoryError deve chegar ao laço do worker)"""
+    return _em_worker
+
+
+class _Worker:
+    def __init__(self, contexto, bibliotecas, limite_memoria):
+        self.conexao, conexao_filho = contexto.Pipe()
+        self.processo = contexto.Process(target=_laco_worker,
+                                         args=(conexao_filho, bibliotecas, limite_memoria, time.time()),
+                                         daemon=True)
+        self.processo.start()
+        conexao_filho.close()
+        self.pronto = False
+        # Sessão cujos itens compartilhados este worker já recebeu, e quais
+        self.sessao = None
+        self.compartilhados = set()
+
+    def aguardar_inicio(self):
+        """Espera o worker ficar pronto; na primeira vez devolve quantos segundos ele levou para iniciar"""
+        if self.pronto:
+            return None
+        if not self.conexao.poll(_TEMPO_INICIO_WORKER):
+            raise ServicoIndisponivel("worker de execução isolada não iniciou a tempo")
+        try:
+            _, segundos = self.conexao.recv()
+        except (EOFError, OSError):
+            self.processo.join(1)
+            raise ServicoIndisponivel(f"worker de execução isolada falhou ao iniciar (código {self.processo.exitcode})")
+        self.pronto = True
+        return segundos
+
+    def motivo_saida(self):
+        """Por que o processo morreu (SIGXCPU = orçamento de CPU; o resto, em geral, falta de memória)"""
+        self.processo.join(1)
+        codigo = self.processo.exitcode
+        if hasattr(signal, 'SIGXCPU') and codigo == -signal.SIGXCPU:
+            return "orçamento de tempo de CPU excedido"
+        return f"worker encerrado inesperadamente (código {codigo})"
+
+    def encerrar(self, forcar=False):
+        if not forcar:
+            try:
+                self.conexao.send(None)
+            except (OSError, ValueError):
+                pass
+            self.processo.join(1)
+        if self.processo.is_alive():
+            self.processo.kill()
+            self.processo.join(1)
+        self.conexao.close()
+
+
+class ServicoExecucao:
+    """
+    Pool de workers isolados. `executar` é seguro entre threads: cada chamada
+    usa um worker livre (as threads do chamador dão o paralelismo).
+    Os bloqueios de questões ficam nas sessões (SessaoExecucao), uma por execução.
+    """
+
+    def __init__(self, num_workers: int = 1, bibliotecas=(), tempo_limite: float = TEMPO_LIMITE_QUESTAO,
+                 limite_memoria: int = LIMITE_MEMORIA_WORKER):
+        # spawn em todas as plataformas: igual ao Windows e seguro com threads no processo principal
+        self._contexto = multiprocessing.get_context('spawn')
+        self.num_workers = max(1, num_workers)
+        self.bibliotecas = tuple(bibliotecas)
+        self.tempo_limite = tempo_limite
+        self.limite_memoria = limite_memoria
+
+        self.tarefas = 0
+        self.interrompidas = 0
+        self.reinicios = 0
+        self.tempos_inicio = []  # segundos para iniciar cada worker (ainda não coletados)
+        self.indisponivel = None  # motivo, se um worker não conseguiu iniciar
+        self._trava = threading.Lock()
+
+        self._livres = queue.Queue()
+        self._workers = []
+        for _ in range(self.num_workers):
+            self._livres.put(self._novo_worker())
+
+    def _novo_worker(self):
+        worker = _Worker(self._contexto, self.bibliotecas, self.limite_memoria)
+        with self._trava:
+            self._workers.append(worker)
+        return worker
+
+    def ampliar(self, num_workers, bibliotecas=()):
+        """
+        Adapta o pool a uma nova execução: inicia workers até `num_workers` (o pool não
+        encolhe) e inclui `bibliotecas` nas pré-importações dos workers novos. Os workers
+        já aquecidos importam uma biblioteca nova no primeiro uso.
+        """
+        with self._trava:
+            self.bibliotecas = tuple(sorted(set(self.bibliotecas) | set(bibliotecas)))
+            novos = max(0, num_workers - self.num_workers)
+            self.num_workers += novos
+        for _ in range(novos):
+            self._livres.put(self._novo_worker())
+
+    def _substituir(self, worker):
+        worker.encerrar(forcar=True)
+        with self._trava:
+            self._workers.remove(worker)
+            self.reinicios += 1
+        return self._novo_worker()
+
+    def _interromper(self, questao_id, motivo):
+        with self._trava:
+            self.interrompidas += 1
+        return ExecucaoInterrompida(questao_id, motivo)
+
+    def _mensagem(self, worker, funcao, args, tempo_limite, sessao):
+        """
+        Tarefa serializada para o worker; os itens compartilhados (Compartilhado nos args)
+        que ele ainda não tem nesta sessão seguem juntos, serializados à parte.
+        Devolve (bytes da mensagem, bytes dos itens compartilhados, chaves novas).
+        """
+        id_sessao = sessao.id if sessao is not None else None
+        if worker.sessao != id_sessao:
+            worker.sessao = id_sessao
+            worker.compartilhados = set()
+        chaves = [a.chave for a in args
+                  if isinstance(a, Compartilhado) and a.chave not in worker.compartilhados]
+        novos = bytes(ForkingPickler.dumps(sessao.itens_compartilhados(chaves))) if chaves else None
+        mensagem = ForkingPickler.dumps((funcao, args, tempo_limite, eventos.registro.nivel_minimo,
+                                         id_sessao, novos))
+        return mensagem, len(novos) if novos is not None else 0, chaves
+
+    def executar(self, funcao, *args, questao_id=None, tempo_limite=None, sessao=None):
+        """
+        Executa funcao(*args) num worker e devolve o resultado (exceções comuns são relançadas).
+        Levanta ExecucaoInterrompida se o orçamento de tempo ou de memória estourar.
+        Argumentos Compartilhado são resolvidos no worker com os itens de `sessao`;
+        o volume serializado (ida e volta) é somado à sessão.
+        Levanta ServicoIndisponivel se um worker não iniciar (daí em diante, sempre).
+        """
+        tempo_limite = tempo_limite or self.tempo_limite
+        worker = self._livres.get()
+        try:
+            if self.indisponivel:
+                raise ServicoIndisponivel(self.indisponivel)
+            if not worker.processo.is_alive():
+                # Morreu entre execuções (pool persistente): um worker novo assume
+                worker = self._substituir(worker)
+            try:
+                segundos_inicio = worker.aguardar_inicio()
+            except ServicoIndisponivel as e:
+                with self._trava:
+                    self.indisponivel = str(e)
+                worker.encerrar(forcar=True)
+                raise
+            with self._trava:
+                self.tarefas += 1
+                if segundos_inicio is not None:
+                    self.tempos_inicio.append(segundos_inicio)
+            mensagem, bytes_compartilhados, chaves = self._mensagem(worker, funcao, args, tempo_limite, sessao)
+            worker.conexao.send_bytes(mensagem)
+            worker.compartilhados.update(chaves)
+
+            if not worker.conexao.poll(tempo_limite * _FATOR_TEMPO_PAREDE + _FOLGA_TEMPO_PAREDE):
+                worker = self._substituir(worker)
+                raise self._interromper(questao_id, f"tempo limite de {tempo_limite:g}s excedido")
+            try:
+                resposta = worker.conexao.recv_bytes()
+            except (EOFError, OSError):
+                motivo = worker.motivo_saida()
+                worker = self._substituir(worker)
+                raise self._interromper(questao_id, motivo)
+            status, valor, lote, caches = ForkingPickler.loads(resposta)
+            if sessao is not None:
+                sessao.registrar_volume(len(mensagem) - bytes_compartilhados, bytes_compartilhados, len(resposta))
+                sessao.registrar_caches(caches)
+
+            # Eventos do worker chegam em lote, junto com o resultado da tarefa
+            eventos.registro.reemitir(lote)
+            if status == 'memoria':
+                worker = self._substituir(worker)
+                raise self._interromper(questao_id, f"limite de memória de {self.limite_memoria // 1024 ** 2} MB excedido")
+            if status == 'erro':
+                raise valor
+            return valor
+        finally:
+            self._livres.put(worker)
+
+    def coletar_tempos_inicio(self):
+        """Tempos de início de workers medidos desde a última coleta"""
+        with self._trava:
+            tempos, self.tempos_inicio = self.tempos_inicio, []
+        return tempos
+
+    def encerrar(self):
+        """Encerra todos os workers"""
+        for worker in list(self._workers):
+            worker.encerrar()
+        self._workers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def stats(self):
+        """Retorna estatísticas de uso do serviço desde que foi criado"""
+        return {
+            'workers': self.num_workers,
+            'tarefas': self.tarefas,
+            'interrompidas': self.interrompidas,
+            'reinicios': self.reinicios,
+        }
+
+
+def _formatar_bytes(n):
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 ** 2:
+        return f"{n / 1024:.1f} KB"
+    return f"{n / 1024 ** 2:.1f} MB"
+
+
+class SessaoExecucao:
+    """
+    Uma execução (versões, prova por IDs, cardápio) sobre o pool persistente: as questões
+    interrompidas ficam bloqueadas só nesta sessão, os itens compartilhados (questões,
+    pools) valem só para ela, e encerrá-la mantém os workers vivos
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, servico: ServicoExecucao):
+        self.servico = servico
+        self.id = next(self._ids)
+        self.tarefas = 0
+        self.interrompidas = 0
+        self.bloqueadas = {}
+        # Volume serializado para os workers: argumentos das tarefas, itens compartilhados e respostas
+        self.bytes_tarefas = 0
+        self.bytes_compartilhados = 0
+        self.bytes_respostas = 0
+        self._compartilhados = {}
+        # Hits/misses dos caches do motor nos workers, durante esta sessão
+        self.caches = {}
+        # Motivo, se o pool não pôde ser usado: o código passa a rodar no processo principal
+        self.no_processo = None
+        self._trava = threading.Lock()
+        # Questões com uma execução já concluída nesta sessão (liberadas para rodar em paralelo)
+        self._concluidas = set()
+        self._portoes = {}
+
+    @property
+    def num_workers(self):
+        return self.servico.num_workers
+
+    def executar(self, funcao, *args, questao_id=None, tempo_limite=None):
+        """
+        ServicoExecucao.executar, mais o bloqueio: uma questão interrompida nesta sessão
+        levanta ExecucaoInterrompida(repetida=True) sem voltar a um worker.
+        A primeira execução de cada questão roda sozinha: se ela estourar o orçamento,
+        as demais tarefas da mesma questão não ocupam (e perdem) outros workers.
+        """
+        if questao_id is None or questao_id in self._concluidas:
+            return self._executar(funcao, args, questao_id, tempo_limite)
+        with self._trava:
+            portao = self._portoes.setdefault(questao_id, threading.Lock())
+        with portao:
+            try:
+                return self._executar(funcao, args, questao_id, tempo_limite)
+            finally:
+                self._concluidas.add(questao_id)
+
+    def _executar(self, funcao, args, questao_id, tempo_limite):
+        if questao_id is not None and questao_id in self.bloqueadas:
+            raise ExecucaoInterrompida(questao_id, self.bloqueadas[questao_id], repetida=True)
+        with self._trava:
+            self.tarefas += 1
+        if self.no_processo:
+            return self._executar_no_processo(funcao, args)
+        try:
+            return self.servico.executar(funcao, *args, questao_id=questao_id, tempo_limite=tempo_limite,
+                                         sessao=self)
+        except ExecucaoInterrompida as e:
+            with self._trava:
+                self.interrompidas += 1
+                if questao_id is not None:
+                    self.bloqueadas[questao_id] = e.motivo
+            raise
+        except ServicoIndisponivel as e:
+            with self._trava:
+                primeira = not self.no_processo
+                self.no_processo = str(e)
+            if primeira:
+                eventos.emitir(AVISO, 'isolamento', "⚠️  Execução isolada indisponível (%s): o código das questões "
+                               "roda no processo principal", e)
+            return self._executar_no_processo(funcao, args)
+
+    def _executar_no_processo(self, funcao, args):
+        """A tarefa aqui mesmo, sem orçamento de tempo/memória (itens compartilhados resolvidos localmente)"""
+        with self._trava:
+            args = tuple(self._compartilhados[a.chave] if isinstance(a, Compartilhado) else a for a in args)
+        return funcao(*args)
+
+    def compartilhar(self, chave, valor):
+        """
+        Publica `valor` (somente leitura) para os workers desta sessão e devolve a referência
+        a usar nos argumentos; se a chave já existe, vale o item publicado primeiro
+        """
+        with self._trava:
+            self._compartilhados.setdefault(chave, valor)
+        return Compartilhado(chave)
+
+    def itens_compartilhados(self, chaves):
+        with self._trava:
+            return {chave: self._compartilhados[chave] for chave in chaves}
+
+    def registrar_volume(self, bytes_tarefa, bytes_compartilhados, bytes_resposta):
+        with self._trava:
+            self.bytes_tarefas += bytes_tarefa
+            self.bytes_compartilhados += bytes_compartilhados
+            self.bytes_respostas += bytes_resposta
+
+    def registrar_caches(self, caches):
+        """Soma os hits/misses de uma tarefa à sessão e ao total dos workers (caches_dos_workers)"""
+        if not caches:
+            return
+        with self._trava:
+            _somar_caches(self.caches, caches)
+        with _trava_caches:
+            _somar_caches(_caches_workers, caches)
+
+    def coletar_tempos_inicio(self):
+        return self.servico.coletar_tempos_inicio()
+
+    def encerrar(self):
+        """Fim da execução: os workers voltam aquecidos para a próxima"""
+        if self.tarefas:
+            eventos.emitir(INFO, 'isolamento', "📦 Enviado aos workers: %s (%d tarefa(s): %s; %d item(ns) compartilhado(s): %s) · "
+                           "recebido: %s",
+                           _formatar_bytes(self.bytes_tarefas + self.bytes_compartilhados), self.tarefas,
+                           _formatar_bytes(self.bytes_tarefas), len(self._compartilhados),
+                           _formatar_bytes(self.bytes_compartilhados), _formatar_bytes(self.bytes_respostas))
+        eventos.emitir(DEBUG, 'isolamento', "♻️  Sessão encerrada: %d tarefa(s) em %d worker(s) persistente(s)",
+                       self.tarefas, self.servico.num_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def stats(self):
+        """Retorna estatísticas de uso nesta execução"""
+        return {
+            'workers': self.servico.num_workers,
+            'tarefas': self.tarefas,
+            'interrompidas': self.interrompidas,
+            'bloqueadas': sorted(self.bloqueadas, key=str),
+            'compartilhados': len(self._compartilhados),
+            'bytes_tarefas': self.bytes_tarefas,
+            'bytes_compartilhados': self.bytes_compartilhados,
+            'bytes_respostas': self.bytes_respostas,
+            'caches': dict(self.caches),
+        }
+
+
+# Pool persistente do processo (criado no primeiro uso)
+_servico_persistente = None
+_trava_persistente = threading.Lock()
+
+
+def obter_servico(num_workers=1, bibliotecas=()):
+    """Pool persistente, criado no primeiro uso e ampliado quando uma execução pede mais"""
+    global _servico_persistente
+    with _trava_persistente:
+        if _servico_persistente is not None and _servico_persistente.indisponivel:
+            # Workers não iniciaram na execução anterior: nova tentativa com um pool novo
+            _servico_persistente.encerrar()
+            _servico_persistente = None
+        if _servico_persistente is None:
+            _servico_persistente = ServicoExecucao(num_workers, bibliotecas)
+            eventos.emitir(DEBUG, 'isolamento', "🔥 Pool persistente de execução isolada iniciado: %d worker(s)",
+                           num_workers)
+        else:
+            _servico_persistente.ampliar(num_workers, bibliotecas)
+        return _servico_persistente
+
+
+def workers_vivos():
+    """Workers do pool persistente já iniciados (0 se ele ainda não existe)"""
+    servico = _servico_persistente
+    return servico.num_workers if servico is not None else 0
+
+
+def encerrar_servico_persistente():
+    """Encerra os workers do pool persistente (na saída do aplicativo)"""
+    global _servico_persistente
+    with _trava_persistente:
+        servico, _servico_persistente = _servico_persistente, None
+    if servico is not None:
+        servico.encerrar()
+
+
+# Saída limpa mesmo sem o aplicativo chamar encerrar_servico_persistente
+atexit.register(encerrar_servico_persistente)
+
+
+def iniciar_servico(num_workers=1, bibliotecas=()):
+    """
+    Sessão de execução isolada sobre o pool persistente, ou None (código roda no
+    processo principal) se o pool não puder ser iniciado
+    """
+    try:
+        return SessaoExecucao(obter_servico(num_workers, bibliotecas))
+    except (OSError, RuntimeError) as e:
+        eventos.emitir(AVISO, 'isolamento', "⚠️  Execução isolada indisponível (%s): o código das questões "
+                       "roda no processo principal", e)
+        return None
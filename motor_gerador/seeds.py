@@ -0,0 +1,32 @@
+"""
+Disciplina de seeds: um seed mestre por execução deriva, de forma determinística,
+os geradores de cada versão, questão e motor combinatório
+"""
+
+import hashlib
+import random
+
+
+def gerar_seed_mestre() -> int:
+    """Seed mestre novo (63 bits) para uma execução que não informou um"""
+    return random.SystemRandom().getrandbits(63)
+
+
+def derivar_seed(*partes) -> int:
+    """
+    Seed derivado das partes (hash SHA-256), estável entre processos e execuções.
+    O hash() do Python não serve aqui: ele é randomizado por processo.
+    """
+    conteudo = "\x1f".join(str(parte) for parte in partes)
+    return int.from_bytes(hashlib.sha256(conteudo.encode("utf-8")).digest()[:8], "big")
+
+
+def derivar_rng(*partes) -> random.Random:
+    """Gerador independente para o fluxo identificado pelas partes"""
+    return random.Random(derivar_seed(*partes))
+
+
+def seed_da_execucao(opcoes: dict) -> int:
+    """Seed mestre das opções (chave 'seed'), gerando um novo se ausente"""
+    seed = (opcoes or {}).get("seed")
+    return int(seed) if seed is not None else gerar_seed_mestre()
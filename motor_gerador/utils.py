@@ -2,23 +2,95 @@
 Funções utilitárias e helpers para o sistema de geração
 """
 
+import ast
+import builtins
+import importlib
+import importlib.util
 import random
 import math
 import json
+import re
+from types import ModuleType
 from constants import PREFIX_DIVISORS, VALID_BASE_UNITS
 
-try:
-    import numpy as np
-except ImportError:
-    np = None
 try:
     import cmath
 except ImportError:
     cmath = None
-try:
-    import sympy as sp
-except ImportError:
-    sp = None
+
+
+class _ModuloPreguicoso:
+    """
+    Proxy de um módulo pesado (numpy, sympy): só importa no primeiro acesso a um
+    atributo. Evita pagar a importação na abertura do programa e em cada worker.
+    """
+
+    def __init__(self, nome_modulo, apelido):
+        self._nome_modulo = nome_modulo
+        self._apelido = apelido
+        self._modulo = None
+
+    def _carregar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome_modulo)
+            # Os próximos contextos já recebem o módulo real
+            if _CAMADA_BASE.get(self._apelido) is self:
+                _CAMADA_BASE[self._apelido] = self._modulo
+        return self._modulo
+
+    def __getattr__(self, nome):
+        return getattr(self._carregar(), nome)
+
+    def __dir__(self):
+        return dir(self._carregar())
+
+    def __repr__(self):
+        estado = "carregado" if self._modulo is not None else "não carregado"
+        return f"<módulo preguiçoso '{self._nome_modulo}' ({estado})>"
+
+
+def _modulo_preguicoso(nome_modulo, apelido):
+    """Proxy do módulo, ou None se ele não estiver instalado"""
+    if importlib.util.find_spec(nome_modulo) is None:
+        return None
+    return _ModuloPreguicoso(nome_modulo, apelido)
+
+
+np = _modulo_preguicoso('numpy', 'np')
+sp = _modulo_preguicoso('sympy', 'sp')
+
+# Apelidos usados nos scripts de questões -> módulo importado
+_BIBLIOTECAS_PESADAS = {'np': 'numpy', 'numpy': 'numpy', 'sp': 'sympy', 'sympy': 'sympy'}
+_PADRAO_BIBLIOTECAS = re.compile(r'\b(np|numpy|sp|sympy)\b')
+
+
+def bibliotecas_referenciadas(params_code):
+    """Varredura estática: quais bibliotecas pesadas o script usa (ex.: {'numpy'})"""
+    if not params_code:
+        return frozenset()
+    try:
+        tree = ast.parse(params_code)
+    except SyntaxError:
+        return frozenset(_BIBLIOTECAS_PESADAS[nome] for nome in _PADRAO_BIBLIOTECAS.findall(params_code))
+
+    usadas = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in _BIBLIOTECAS_PESADAS:
+            usadas.add(_BIBLIOTECAS_PESADAS[node.id])
+        elif isinstance(node, ast.Import):
+            usadas.update(_BIBLIOTECAS_PESADAS[a.name.split('.')[0]] for a in node.names
+                          if a.name.split('.')[0] in ('numpy', 'sympy'))
+        elif isinstance(node, ast.ImportFrom) and node.module and node.module.split('.')[0] in ('numpy', 'sympy'):
+            usadas.add(node.module.split('.')[0])
+    return frozenset(usadas)
+
+
+def _preimportar_bibliotecas(nomes):
+    """Importa de antemão as bibliotecas indicadas (initializer dos workers)"""
+    for nome in nomes:
+        proxy = {'numpy': np, 'sympy': sp}.get(nome)
+        if proxy is not None:
+            proxy._carregar()
 
 
 def _get_math_context():
@@ -33,6 +105,44 @@ def _get_math_context():
     return context
 
 
+# Camada base (builtins + bibliotecas) dos contextos de execução.
+# O Python procura em __builtins__ os nomes que não estão no dicionário de globais,
+# então cada variante só precisa de um dicionário pequeno com as saídas do script.
+# Cada contexto recebe uma cópia rasa: um script que altere __builtins__ (ex.:
+# __builtins__['round'] = ...) não afeta os contextos seguintes. Um MappingProxyType
+# não serve aqui: o `import` dos scripts exige que __builtins__ seja um dict.
+_CAMADA_BASE = {**vars(builtins), **_get_math_context()}
+
+
+def _novo_contexto():
+    """Contexto de execução por variante: camada leve sobre uma cópia da camada base"""
+    return {'__builtins__': dict(_CAMADA_BASE)}
+
+
+def _camada_com_variaveis(contexto):
+    """
+    Nova camada com as variáveis de um contexto já executado, própria do cálculo de um
+    pool, para execuções repetidas (uma por combinação no motor) sem copiar o contexto a cada vez
+    """
+    base = contexto.get('__builtins__', _CAMADA_BASE)
+    camada = dict(vars(base) if isinstance(base, ModuleType) else base)
+    camada.update((nome, valor) for nome, valor in contexto.items() if nome != '__builtins__')
+    return camada
+
+
+def _semear_geradores_globais(rng):
+    """
+    Semeia random/np.random a partir do rng (scripts que importam os módulos diretamente).
+    O numpy só é semeado se já estiver carregado: quem o usa é pré-importado pela varredura.
+    (Não basta olhar sys.modules: lá o módulo aparece antes de terminar de ser importado
+    por outra thread.)
+    """
+    random.seed(rng.getrandbits(64))
+    semente_numpy = rng.getrandbits(32)
+    if np is not None and np._modulo is not None:
+        np._modulo.random.seed(semente_numpy)
+
+
 def formatar_unidade(valor, unidade="", incluir_unidade=True):
     """
     Formata um número usando notação de engenharia, mas APENAS para unidades permitidas.
@@ -89,6 +199,95 @@ def formatar_unidade(valor, unidade="", incluir_unidade=True):
         return valor_str
 
 
+# Prefixos de formatar_unidade, do maior para o menor (índice 9 = notação científica)
+_PREFIXOS_ENGENHARIA = [(1e12, 'T'), (1e9, 'G'), (1e6, 'M'), (1e3, 'k'), (1, ''),
+                        (1e-3, 'm'), (1e-6, 'µ'), (1e-9, 'n'), (1e-12, 'p')]
+
+
+def _inteiros_para_exibicao(v):
+    """
+    Em lote, o teste `round(v, 2) == int(v)` de formatar_unidade: parte fracionária
+    (exata) abaixo de 0,005. Valores colados no limite usam o round() do Python.
+    """
+    fracao = np.abs(v - np.trunc(v))
+    inteiros = fracao < 0.005
+    for i in np.flatnonzero(np.abs(fracao - 0.005) < 1e-12):
+        inteiros[i] = round(float(v[i]), 2) == int(v[i])
+    return inteiros
+
+
+def formatar_unidades(valores, unidade="", incluir_unidade=True):
+    """
+    Versão em lote de formatar_unidade: mesmo texto, valor a valor.
+    A escolha do prefixo (log10), a divisão e a detecção de inteiros são feitas de
+    uma vez com NumPy; só a montagem das strings continua valor a valor.
+    """
+    valores = list(valores)
+    if np is None or not valores:
+        return [formatar_unidade(v, unidade, incluir_unidade) for v in valores]
+
+    textos = [None] * len(valores)
+    posicoes = []
+    for i, valor in enumerate(valores):
+        if not isinstance(valor, (int, float)):
+            textos[i] = str(valor)
+        elif unidade not in VALID_BASE_UNITS and isinstance(valor, int):
+            textos[i] = f"{valor} {unidade}" if incluir_unidade and unidade else str(valor)
+        else:
+            posicoes.append(i)
+    if not posicoes:
+        return textos
+
+    try:
+        x = np.array([valores[i] for i in posicoes], dtype=float)
+    except OverflowError:
+        x = None
+    if x is None or not np.isfinite(x).all():
+        # inf/nan (e inteiros enormes): o caminho escalar decide (inclusive os erros)
+        for i in posicoes:
+            textos[i] = formatar_unidade(valores[i], unidade, incluir_unidade)
+        return textos
+
+    if unidade in VALID_BASE_UNITS:
+        magnitudes = np.abs(x)
+        zeros = magnitudes < 1e-15
+        with np.errstate(divide='ignore'):
+            expoentes = np.floor(np.log10(np.where(zeros, 1.0, magnitudes)) / 3)
+        indices = np.clip(4 - expoentes, 0, 9).astype(int)
+
+        # Corrige o arredondamento do log10 nas fronteiras com as mesmas comparações do escalar
+        multiplicadores = np.array([mult for mult, _ in _PREFIXOS_ENGENHARIA] + [0.0])
+        anterior = np.maximum(indices - 1, 0)
+        indices = np.where((indices > 0) & (magnitudes >= multiplicadores[anterior]), anterior, indices)
+        indices = np.where((indices < 9) & (magnitudes < multiplicadores[indices]), indices + 1, indices)
+
+        ajustados = x / np.where(indices < 9, multiplicadores[indices], 1.0)
+        inteiros = _inteiros_para_exibicao(ajustados)
+
+        sufixos = [f" {prefixo}{unidade if incluir_unidade else ''}".rstrip() for _, prefixo in _PREFIXOS_ENGENHARIA]
+        sufixo_cientifico = f" {unidade}" if incluir_unidade and unidade else ""
+        texto_zero = f"0 {unidade}" if incluir_unidade and unidade else "0"
+
+        for i, zero, indice, ajustado, inteiro in zip(posicoes, zeros.tolist(), indices.tolist(),
+                                                      ajustados.tolist(), inteiros.tolist()):
+            if zero:
+                textos[i] = texto_zero
+            elif indice == 9:
+                textos[i] = f"{ajustado:.2e}".replace('.', ',') + sufixo_cientifico
+            elif inteiro:
+                textos[i] = f"{int(ajustado)}{sufixos[indice]}"
+            else:
+                textos[i] = f"{ajustado:.2f}".replace('.', ',') + sufixos[indice]
+    else:
+        inteiros = _inteiros_para_exibicao(x)
+        sufixo = f" {unidade}" if incluir_unidade and unidade else ""
+        for i, valor, inteiro in zip(posicoes, x.tolist(), inteiros.tolist()):
+            valor_str = f"{int(valor)}" if inteiro else f"{valor:.2f}".replace('.', ',')
+            textos[i] = valor_str + sufixo
+
+    return textos
+
+
 def _executar_logica_tabela(params_json, contexto):
     """Executa a lógica de tabela de parâmetros"""
     params = json.loads(params_json)
@@ -115,7 +314,7 @@ def _executar_logica_tabela(params_json, contexto):
             
     formula = params.get("formula_resposta", "")
     if formula: 
-        contexto['resposta_valor'] = eval(formula, {"__builtins__": None}, contexto)
+        contexto['resposta_valor'] = eval(formula, {"__builtins__": None, **_get_math_context()}, contexto)
 
 
 def _calcular_apenas_resposta(questao_base, seed):
@@ -137,7 +336,12 @@ def _calcular_apenas_resposta(questao_base, seed):
 # Exportar constantes para uso externo
 __all__ = [
     '_get_math_context',
+    'bibliotecas_referenciadas',
+    '_preimportar_bibliotecas',
+    '_novo_contexto',
+    '_camada_com_variaveis',
     'formatar_unidade', 
+    'formatar_unidades',
     '_executar_logica_tabela',
     '_calcular_apenas_resposta',
     'PREFIX_DIVISORS',
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do projeto (constants, motor_gerador) são importados a partir da raiz
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
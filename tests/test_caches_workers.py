@@ -0,0 +1,76 @@
+"""
+O código das questões roda nos workers isolados: os hits/misses dos caches contados lá
+devem chegar ao processo principal (sessão e get_cache_stats_formatted).
+"""
+
+import re
+
+from motor_gerador import get_cache_stats_formatted
+from motor_gerador.cache_pools import invalidar_pool_questao, pool_cache
+from motor_gerador.core import _gerar_variante_isolada, _obter_pool_isolado
+from motor_gerador.memory_optimizer import analysis_cache
+from motor_gerador.sandbox import caches_dos_workers, iniciar_servico
+
+# Modo 1 (resposta em dicionário): passa pelo pool completo, calculado no worker
+QUESTAO_COM_POOL = {
+    'id': 990001,
+    'enunciado': 'Dados I1 = {I1} A e I2 = {I2} A, determine I3 e I4.',
+    'formato_questao': 'Múltipla Escolha',
+    'tipo_questao': 'Código (Python)',
+    'gerar_alternativas_auto': 1,
+    'unidade_resposta': 'A',
+    'permitir_negativos': 0,
+    'is_teorica': 0,
+    'imagem': '',
+    'parametros': (
+        "I1 = random.choice([8, 7, 10, 12])\n"
+        "I2 = random.choice([3, 5, 6])\n"
+        "I3 = I1 + I2\n"
+        "I4 = I1 * I2\n"
+        "resposta_valor = {\n"
+        "    'valores': {'I3': I3, 'I4': I4},\n"
+        "    'formato_texto': 'I3 = {I3}A; I4 = {I4}A'\n"
+        "}\n"
+    ),
+}
+
+
+def _contadores(texto, rotulo):
+    hits, misses = re.search(rf"{rotulo}: (\d+) hits / (\d+) misses", texto).groups()
+    return int(hits), int(misses)
+
+
+def test_contadores_dos_workers_chegam_ao_processo_principal():
+    # Sem o pool em disco, o worker analisa o código e consulta (e grava) o cache de pools
+    invalidar_pool_questao(QUESTAO_COM_POOL['id'])
+    antes = caches_dos_workers()
+    sessao = iniciar_servico(1)
+    assert sessao is not None
+    try:
+        pool = _obter_pool_isolado(sessao, QUESTAO_COM_POOL)
+        resultado = _gerar_variante_isolada(sessao, QUESTAO_COM_POOL, ('teste', 1), {QUESTAO_COM_POOL['id']: pool})
+    finally:
+        sessao.encerrar()
+        invalidar_pool_questao(QUESTAO_COM_POOL['id'])
+    assert resultado.ok
+    assert sessao.no_processo is None, sessao.no_processo
+
+    # A sessão soma o que os seus workers contaram...
+    caches_sessao = sessao.stats()['caches']
+    assert sum(caches_sessao['analises']) > 0
+    assert sum(caches_sessao['pools']) > 0
+
+    # ...e o total dos workers cresce o mesmo tanto
+    depois = caches_dos_workers()
+    for nome in ('analises', 'pools'):
+        hits_antes, misses_antes = antes.get(nome, (0, 0))
+        assert depois[nome] == (hits_antes + caches_sessao[nome][0], misses_antes + caches_sessao[nome][1])
+
+    # O log soma processo principal e workers
+    texto = get_cache_stats_formatted()
+    assert _contadores(texto, "Análises AST") == (analysis_cache.hits + depois['analises'][0],
+                                                   analysis_cache.misses + depois['analises'][1])
+    assert _contadores(texto, "Pools em disco") == (pool_cache.hits + depois['pools'][0],
+                                                     pool_cache.misses + depois['pools'][1])
+    assert sum(_contadores(texto, "Análises AST")) > 0
+    assert sum(_contadores(texto, "Pools em disco")) > 0
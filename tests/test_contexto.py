@@ -0,0 +1,43 @@
+"""
+Contextos de execução dos scripts: o que um script faz com __builtins__ fica na
+própria execução e não chega aos contextos seguintes.
+"""
+
+from motor_gerador.utils import _camada_com_variaveis, _novo_contexto
+
+SCRIPT_QUE_ALTERA_BUILTINS = (
+    "__builtins__['round'] = lambda *args: 'alterado'\n"
+    "__builtins__['math'] = None\n"
+    "del __builtins__['abs']\n"
+    "resultado = round(2.5)\n"
+)
+
+SCRIPT_SEGUINTE = (
+    "import cmath\n"
+    "resultado = round(2.5)\n"
+    "raiz = math.sqrt(16)\n"
+    "modulo = abs(-3)\n"
+)
+
+
+def test_script_nao_altera_o_proximo_contexto():
+    contexto = _novo_contexto()
+    exec(SCRIPT_QUE_ALTERA_BUILTINS, contexto)
+    assert contexto['resultado'] == 'alterado'
+
+    proximo = _novo_contexto()
+    exec(SCRIPT_SEGUINTE, proximo)
+    assert (proximo['resultado'], proximo['raiz'], proximo['modulo']) == (2, 4.0, 3)
+
+
+def test_camada_do_motor_nao_altera_o_proximo_contexto():
+    contexto = _novo_contexto()
+    exec("x = 2\n", contexto)
+    camada = _camada_com_variaveis(contexto)
+    exec(SCRIPT_QUE_ALTERA_BUILTINS, {'__builtins__': camada})
+    assert camada['x'] == 2
+
+    proximo = _novo_contexto()
+    exec(SCRIPT_SEGUINTE, proximo)
+    assert (proximo['resultado'], proximo['raiz'], proximo['modulo']) == (2, 4.0, 3)
+    assert 'x' not in proximo['__builtins__']
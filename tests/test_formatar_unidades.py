@@ -0,0 +1,94 @@
+"""
+formatar_unidades (lote, NumPy) deve produzir exatamente o texto de formatar_unidade
+(escalar) para cada valor, em todas as unidades da interface.
+"""
+
+import math
+import random
+
+import pytest
+
+from constants import UNIDADES_PARA_DROPDOWN
+from motor_gerador.utils import formatar_unidade, formatar_unidades
+
+SEED = 20240611
+MULTIPLICADORES = [1e12, 1e9, 1e6, 1e3, 1, 1e-3, 1e-6, 1e-9, 1e-12]
+
+
+def _escalar(valor, unidade, incluir_unidade):
+    """Texto do caminho escalar, ou o tipo da exceção que ele levanta"""
+    try:
+        return formatar_unidade(valor, unidade, incluir_unidade)
+    except Exception as e:
+        return type(e)
+
+
+def _em_lote(valores, unidade, incluir_unidade):
+    try:
+        return formatar_unidades(valores, unidade, incluir_unidade)
+    except Exception as e:
+        return type(e)
+
+
+def _comparar(valores, unidade, incluir_unidade):
+    """Compara o lote com o escalar; valores que fazem o escalar falhar são comparados sozinhos"""
+    esperados = [_escalar(v, unidade, incluir_unidade) for v in valores]
+    validos = [v for v, esperado in zip(valores, esperados) if isinstance(esperado, str)]
+    assert formatar_unidades(validos, unidade, incluir_unidade) == [e for e in esperados if isinstance(e, str)]
+    for valor, esperado in zip(valores, esperados):
+        if not isinstance(esperado, str):
+            assert _em_lote([valor], unidade, incluir_unidade) == esperado, valor
+
+
+def _fronteiras_de_prefixo():
+    """Cada múltiplo de prefixo, os vizinhos em ponto flutuante e o arredondamento logo abaixo"""
+    valores = []
+    for mult in MULTIPLICADORES:
+        for base in (mult, 999.995 * mult / 1e3, 999.994 * mult / 1e3):
+            valores += [base, math.nextafter(base, 0), math.nextafter(base, math.inf)]
+    valores += [1e-15, math.nextafter(1e-15, 0), 1e-13, 9.99e-13]
+    return valores + [-v for v in valores]
+
+
+def _bordas_de_arredondamento(rng):
+    """Partes fracionárias em torno de 0,005 e 0,995 (limite do teste de inteiro)"""
+    valores = []
+    for _ in range(200):
+        inteiro = rng.randint(0, 999)
+        escala = rng.choice(MULTIPLICADORES)
+        for fracao in (0.005, 0.995, 0.0049999, 0.0050001, 0.9949999, 0.9950001):
+            valores.append((inteiro + fracao) * escala)
+    return valores + [-v for v in valores]
+
+
+def _aleatorios(rng):
+    valores = []
+    for _ in range(2000):
+        valores.append(rng.uniform(-1, 1) * 10 ** rng.uniform(-16, 15))
+        valores.append(round(rng.uniform(-1000, 1000), rng.randint(0, 3)))
+        valores.append(rng.randint(-10 ** 13, 10 ** 13))
+        valores.append(rng.randint(-1000, 1000))
+    return valores
+
+
+ESPECIAIS = [0, 0.0, -0.0, 1, -1, True, False, math.nan, math.inf, -math.inf, 10 ** 400, "texto", None]
+
+
+@pytest.mark.parametrize("incluir_unidade", [True, False])
+@pytest.mark.parametrize("unidade", UNIDADES_PARA_DROPDOWN)
+def test_lote_igual_ao_escalar(unidade, incluir_unidade):
+    rng = random.Random(f"{SEED}:{unidade}:{incluir_unidade}")
+    valores = _fronteiras_de_prefixo() + _bordas_de_arredondamento(rng) + _aleatorios(rng) + ESPECIAIS
+    rng.shuffle(valores)
+    _comparar(valores, unidade, incluir_unidade)
+
+
+@pytest.mark.parametrize("unidade", ["V", "kWh", ""])
+def test_especiais_isolados(unidade):
+    for valor in ESPECIAIS:
+        esperado = _escalar(valor, unidade, True)
+        assert _em_lote([valor], unidade, True) == ([esperado] if isinstance(esperado, str) else esperado), valor
+
+
+def test_lista_vazia():
+    assert formatar_unidades([], "V") == []
@@ -0,0 +1,77 @@
+"""
+Seed mestre da execução: o mesmo seed gera exatamente as mesmas versões em qualquer
+modo (processo principal, um worker isolado, vários workers em paralelo); seeds
+diferentes geram versões diferentes.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+import motor_gerador.parallel_engine as parallel_engine
+from motor_gerador.custos import Previsao
+
+BANCO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'banco_questoes.db')
+SEED = 12345
+NUM_VERSOES = 3
+MODOS = ('processo principal', 'serial', 'processos')
+
+# Scripts do banco com sequências de escape do LaTeX em strings comuns ('\%', '\$')
+pytestmark = pytest.mark.filterwarnings("ignore:invalid escape sequence:DeprecationWarning")
+
+
+@pytest.fixture(scope='module')
+def questoes():
+    conn = sqlite3.connect(BANCO)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM questoes WHERE ativa = 1 ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def _gerar(questoes, seed, modo, monkeypatch):
+    opcoes = {
+        "gabarito": {"distribuir": True, "rotacao": 1, "embaralhar_questoes": True},
+        "pontuacao": {},
+        "seed": seed,
+    }
+    with monkeypatch.context() as m:
+        if modo == 'processo principal':
+            # Sem serviço de execução isolada: o código das questões roda aqui mesmo
+            m.setattr(parallel_engine, 'iniciar_servico', lambda *args, **kwargs: None)
+            gerar = parallel_engine.gerar_versoes_prova_serial
+        elif modo == 'serial':
+            gerar = parallel_engine.gerar_versoes_prova_serial
+        else:
+            # Força vários workers, qualquer que seja a previsão do modelo de custo
+            m.setattr(parallel_engine, '_planejar_execucao',
+                      lambda custos_pools, custos_tarefas: Previsao('processos', 3, 0, 0.0))
+            gerar = parallel_engine.gerar_versoes_prova_paralelo
+        return gerar([dict(q) for q in questoes], NUM_VERSOES, opcoes)
+
+
+def test_mesmo_seed_gera_as_mesmas_versoes_em_todos_os_modos(questoes, monkeypatch):
+    versoes = {modo: _gerar(questoes, SEED, modo, monkeypatch) for modo in MODOS}
+
+    referencia = versoes['processo principal']
+    assert len(referencia) == NUM_VERSOES
+    assert all(versao['questoes'] for versao in referencia)
+    for modo in MODOS[1:]:
+        assert versoes[modo] == referencia, modo
+
+
+def test_mesmo_seed_repete_a_execucao(questoes, monkeypatch):
+    assert _gerar(questoes, SEED, 'serial', monkeypatch) == _gerar(questoes, SEED, 'serial', monkeypatch)
+
+
+def test_seeds_diferentes_geram_versoes_diferentes(questoes, monkeypatch):
+    versoes = _gerar(questoes, SEED, 'serial', monkeypatch)
+    outras = _gerar(questoes, SEED + 1, 'serial', monkeypatch)
+
+    assert versoes != outras
+    # Não é só a ordem: os valores sorteados das questões também mudam
+    enunciados = {q['enunciado'] for v in versoes for q in v['questoes']}
+    outros_enunciados = {q['enunciado'] for v in outras for q in v['questoes']}
+    assert enunciados != outros_enunciados